@@ -0,0 +1,104 @@
+"""
+Pre-computed answers for the fixed suggested questions
+"""
+import os
+import time
+import asyncio
+import logging
+from typing import Dict, Any, Optional, List, Callable, Awaitable, Tuple
+
+from knowledge_base import normalize_query
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() in ("1", "true", "yes")
+WARMUP_REFRESH_SECONDS = float(os.getenv("WARMUP_REFRESH_SECONDS", "21600"))
+# Minimum gap between two LLM calls made by the warm-up job
+WARMUP_MIN_LLM_INTERVAL_SECONDS = float(os.getenv("WARMUP_MIN_LLM_INTERVAL_SECONDS", "2.0"))
+# How often the job checks whether the knowledge base was rebuilt
+WARMUP_POLL_SECONDS = float(os.getenv("WARMUP_POLL_SECONDS", "10"))
+
+# answer_fn(question) -> (search_results, response) or None if no LLM answer could be produced
+AnswerFn = Callable[[str], Awaitable[Optional[Tuple[List[Dict[str, Any]], str]]]]
+
+
+class SuggestedAnswerCache:
+    """
+    Runs the full retrieval + generation pipeline for every suggested question in the
+    background and serves the results by exact (normalized) question match. Answers are
+    tied to the knowledge base's index_version; a rebuild triggers a fresh warm-up.
+    """
+
+    def __init__(self, questions: List[str], answer_fn: AnswerFn, version_fn: Callable[[], int],
+                 refresh_seconds: float = WARMUP_REFRESH_SECONDS,
+                 min_llm_interval: float = WARMUP_MIN_LLM_INTERVAL_SECONDS,
+                 poll_seconds: float = WARMUP_POLL_SECONDS):
+        self.questions = list(dict.fromkeys(questions))
+        self.answer_fn = answer_fn
+        self.version_fn = version_fn
+        self.refresh_seconds = refresh_seconds
+        self.min_llm_interval = min_llm_interval
+        self.poll_seconds = poll_seconds
+
+        self._answers: Dict[str, Dict[str, Any]] = {}
+        self._version: Optional[int] = None
+        self._last_warmup: Optional[float] = None
+        self.hits = 0
+        self.warmups = 0
+
+    def get(self, question: str, version: int) -> Optional[Dict[str, Any]]:
+        """Return {"sources", "response"} for a warmed question, or None"""
+        if version != self._version:
+            return None
+        answer = self._answers.get(normalize_query(question))
+        if answer is not None:
+            self.hits += 1
+        return answer
+
+    async def warm(self):
+        """Answer every suggested question once, pacing LLM calls"""
+        version = self.version_fn()
+        if version != self._version:
+            self._answers = {}
+            self._version = version
+
+        started = time.monotonic()
+        warmed = 0
+        for question in self.questions:
+            result = await self.answer_fn(question)
+            if self.version_fn() != version:
+                # The run loop notices the new version and starts over
+                logger.info("Knowledge base changed during warm-up, restarting")
+                return
+            if result is not None:
+                sources, response = result
+                self._answers[normalize_query(question)] = {"sources": sources, "response": response}
+                warmed += 1
+            await asyncio.sleep(self.min_llm_interval)
+
+        self._last_warmup = time.monotonic()
+        self.warmups += 1
+        logger.info(f"Warmed {warmed}/{len(self.questions)} suggested answers in {self._last_warmup - started:.1f}s")
+
+    async def run(self):
+        """Background job: warm on start, on knowledge base rebuilds and every refresh_seconds"""
+        while True:
+            try:
+                refresh_due = self._last_warmup is None or time.monotonic() - self._last_warmup >= self.refresh_seconds
+                if refresh_due or self.version_fn() != self._version:
+                    await self.warm()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Suggested answer warm-up failed: {e}")
+                self._last_warmup = time.monotonic()
+            await asyncio.sleep(self.poll_seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "questions": len(self.questions),
+            "warmed": len(self._answers),
+            "hits": self.hits,
+            "warmups": self.warmups,
+            "last_warmup_age_seconds": round(time.monotonic() - self._last_warmup, 1) if self._last_warmup else None
+        }
@@ -0,0 +1,106 @@
+"""
+Benchmark query-encoding throughput with the encoder in-process vs. in an encoder process pool.
+
+Concurrent clients each encode one query at a time (the way /chat does). For each pool size it
+reports queries/s, p50/p95 latency and how late a 1 ms ticker thread in the API process wakes up,
+which is the time request handling would wait on the GIL:
+
+    python bench_encoder_pool.py                          # pool sizes 0 (in-process), 1, 2, 4
+    python bench_encoder_pool.py --pool-sizes 0,2,4,8 --clients 16 --backend onnx-int8
+"""
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
+
+import numpy as np
+
+from encoders import create_encoder, ENCODER_BACKENDS, ONNX_MODEL_DIR
+
+QUERIES = [
+    "What projects has Hunter worked on?",
+    "What programming languages does Hunter know?",
+    "Tell me about Hunter's work at Microsoft",
+    "What does Hunter know about AI infrastructure and Kubernetes?",
+    "How can I contact Hunter?",
+    "What is Hunter studying?",
+    "Has Hunter built anything with React Native?",
+    "Which machine learning frameworks has Hunter used?"
+]
+
+
+class TickerLag:
+    """Thread that sleeps 1 ms at a time and records how late it wakes up"""
+
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.lags: List[float] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            time.sleep(self.interval)
+            self.lags.append((time.perf_counter() - started - self.interval) * 1000.0)
+
+
+def benchmark_pool_size(pool_size: int, args: argparse.Namespace) -> Dict[str, Any]:
+    encoder = create_encoder(args.model, args.backend, args.model_dir, pool_size=pool_size, threads=args.threads)
+    encoder.encode(QUERIES)  # load the model (and start the processes) before timing
+
+    def client(client_index: int) -> List[float]:
+        latencies = []
+        for request in range(args.requests):
+            query = f"{QUERIES[(client_index + request) % len(QUERIES)]} #{client_index}-{request}"
+            started = time.perf_counter()
+            encoder.encode([query])
+            latencies.append((time.perf_counter() - started) * 1000.0)
+        return latencies
+
+    with TickerLag() as ticker, ThreadPoolExecutor(max_workers=args.clients) as clients:
+        started = time.perf_counter()
+        latencies = [latency for result in clients.map(client, range(args.clients)) for latency in result]
+        elapsed = time.perf_counter() - started
+
+    if pool_size:
+        encoder.close()
+    return {
+        "pool_size": pool_size,
+        "qps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+        "ticker_lag_p95_ms": round(float(np.percentile(ticker.lags, 95)), 2) if ticker.lags else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pool-sizes", default="0,1,2,4", help="comma-separated; 0 encodes in-process")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent client threads")
+    parser.add_argument("--requests", type=int, default=50, help="queries per client")
+    parser.add_argument("--threads", type=int, default=1, help="inference threads per encoder process")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--backend", default="torch", choices=ENCODER_BACKENDS)
+    parser.add_argument("--model-dir", default=ONNX_MODEL_DIR)
+    args = parser.parse_args()
+
+    rows = [benchmark_pool_size(int(size), args) for size in args.pool_sizes.split(",")]
+    baseline = rows[0]["qps"]
+    print(f"{'pool':>5} {'QPS':>8} {'speedup':>8} {'p50 ms':>8} {'p95 ms':>8} {'ticker lag p95 ms':>18}")
+    for row in rows:
+        print(f"{row['pool_size'] or 'none':>5} {row['qps']:>8} {row['qps'] / baseline:>7.2f}x {row['p50_ms']:>8} "
+              f"{row['p95_ms']:>8} {str(row['ticker_lag_p95_ms']):>18}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Benchmark the FAISS index backends on synthetic embeddings.
+
+Reports build time, index size, recall@k against the exact float32 Flat index and
+single-query QPS for each backend (and vector storage precision) at each corpus size:
+
+    python bench_vector_index.py                      # 10k, 100k and 1M vectors
+    python bench_vector_index.py --sizes 10000,100000 --backends auto,hnsw,ivf,ivfpq
+    python bench_vector_index.py --sizes 100000 --backends flat,hnsw --storage float32,float16,int8
+"""
+import argparse
+import json
+import time
+from typing import Dict, Any, List
+
+import numpy as np
+import faiss
+
+from vector_index import choose_index_spec, build_faiss_index, search_parameters
+
+
+class SyntheticEmbeddings:
+    """
+    Normalized vectors with sentence-embedding-like structure: topic clusters in a
+    low-dimensional latent space, projected up to the embedding dimension plus a little noise.
+    (Isotropic high-dimensional noise has no near neighbors and makes every ANN index look bad.)
+    """
+
+    def __init__(self, dimension: int, clusters: int, rng: np.random.Generator, latent_dimension: int = 48):
+        self.dimension = dimension
+        self.rng = rng
+        self.centers = rng.standard_normal((clusters, latent_dimension)).astype(np.float32)
+        self.projection = (rng.standard_normal((latent_dimension, dimension)) / np.sqrt(latent_dimension)).astype(np.float32)
+
+    def sample(self, count: int, chunk: int = 100_000) -> np.ndarray:
+        vectors = np.empty((count, self.dimension), dtype=np.float32)
+        for start in range(0, count, chunk):
+            stop = min(start + chunk, count)
+            assignment = self.rng.integers(0, len(self.centers), stop - start)
+            latent = self.centers[assignment] + 0.6 * self.rng.standard_normal((stop - start, self.centers.shape[1]), dtype=np.float32)
+            noise = 0.05 * self.rng.standard_normal((stop - start, self.dimension), dtype=np.float32)
+            vectors[start:stop] = latent @ self.projection + noise
+        faiss.normalize_L2(vectors)
+        return vectors
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    hits = sum(len(set(row_found[:k]) & set(row_truth)) for row_found, row_truth in zip(found, truth))
+    return hits / truth.size
+
+
+def single_query_qps(index: faiss.Index, queries: np.ndarray, k: int, params) -> float:
+    """Queries issued one at a time, the way the chat endpoint searches"""
+    started = time.perf_counter()
+    for row in range(len(queries)):
+        index.search(queries[row:row + 1], k, params=params)
+    return len(queries) / (time.perf_counter() - started)
+
+
+def benchmark_size(count: int, args: argparse.Namespace, data: SyntheticEmbeddings) -> List[Dict[str, Any]]:
+    vectors = data.sample(count)
+    queries = data.sample(args.queries)
+    ids = np.arange(count, dtype=np.int64)
+
+    # Exact float32 baseline first, then every backend/storage combination
+    combinations = [("flat", "float32")] + [
+        (backend, storage)
+        for backend in args.backends
+        for storage in (["float32"] if backend == "ivfpq" else args.storage)
+        if (backend, storage) != ("flat", "float32")
+    ]
+
+    rows = []
+    truth = None
+    for backend, storage in combinations:
+        spec = choose_index_spec(count, args.dim, kind=backend, target_recall=args.target_recall, storage=storage)
+        started = time.perf_counter()
+        index = build_faiss_index(spec, vectors, ids)
+        build_seconds = time.perf_counter() - started
+
+        params = search_parameters(spec)
+        _, found = index.search(queries, args.k, params=params)
+        if truth is None:
+            truth = found  # the Flat index is exact
+        rows.append({
+            "vectors": count,
+            "backend": backend if backend != "auto" else f"auto ({spec.kind})",
+            "storage": spec.storage if spec.kind != "ivfpq" else "pq",
+            "params": spec.params,
+            "build_s": round(build_seconds, 2),
+            "size_mb": round(faiss.serialize_index(index).nbytes / (1024 * 1024), 1),
+            f"recall@{args.k}": round(recall_at_k(found, truth), 4),
+            "qps": round(single_query_qps(index, queries, args.k, params), 1)
+        })
+        print(json.dumps(rows[-1]), flush=True)
+        del index
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="comma-separated corpus sizes")
+    parser.add_argument("--backends", default="auto,hnsw,ivf,ivfpq", help="comma-separated: auto, flat, hnsw, ivf, ivfpq")
+    parser.add_argument("--storage", default="float32", help="comma-separated: float32, float16, int8")
+    parser.add_argument("--dim", type=int, default=384, help="embedding dimension (all-MiniLM-L6-v2 is 384)")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--clusters", type=int, default=1000, help="topic centers in the synthetic data")
+    parser.add_argument("--target-recall", type=float, default=0.95)
+    parser.add_argument("--threads", type=int, default=1, help="FAISS OpenMP threads (1 matches a single request)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    args.backends = [backend.strip() for backend in args.backends.split(",") if backend.strip()]
+    args.storage = [storage.strip() for storage in args.storage.split(",") if storage.strip()]
+
+    faiss.omp_set_num_threads(args.threads)
+    data = SyntheticEmbeddings(args.dim, args.clusters, np.random.default_rng(args.seed))
+
+    rows = []
+    for count in (int(size) for size in args.sizes.split(",")):
+        rows.extend(benchmark_size(count, args, data))
+
+    recall_key = f"recall@{args.k}"
+    print()
+    print(f"{'vectors':>9}  {'backend':<14} {'storage':<8} {'build s':>8} {'size MB':>8} {recall_key:>10} {'QPS':>9}")
+    for row in rows:
+        print(f"{row['vectors']:>9}  {row['backend']:<14} {row['storage']:<8} {row['build_s']:>8} {row['size_mb']:>8} "
+              f"{row[recall_key]:>10} {row['qps']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Shared pytest fixtures. Knowledge-base tests use a small deterministic bag-of-words encoder in
+place of the sentence-transformers model, so they run without downloading it.
+"""
+import re
+import zlib
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from knowledge_base import PortfolioKnowledgeBase, iter_hunter_knowledge_items
+
+
+class HashingEncoder:
+    """encode() / get_sentence_embedding_dimension() like SentenceTransformer: hashed word counts"""
+
+    dimension = 128
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def encode(self, sentences, batch_size: int = 32, show_progress_bar=None, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        sentences = [sentences] if single else list(sentences)
+        embeddings = np.zeros((len(sentences), self.dimension), dtype=np.float32)
+        for row, sentence in enumerate(sentences):
+            for word in re.findall(r"\w+", sentence.lower()):
+                embeddings[row, zlib.crc32(word.encode("utf-8")) % self.dimension] += 1.0
+            embeddings[row, 0] += 0.01  # no all-zero rows
+        return embeddings[0] if single else embeddings
+
+
+def make_knowledge_base(items=None) -> PortfolioKnowledgeBase:
+    """A knowledge base over items (default: Hunter's portfolio) indexed with the HashingEncoder"""
+    with mock.patch("knowledge_base.create_encoder", return_value=HashingEncoder()):
+        kb = PortfolioKnowledgeBase()
+    kb.add_knowledge_items(iter_hunter_knowledge_items() if items is None else items)
+    kb.build_index()
+    return kb
+
+
+@pytest.fixture
+def knowledge_base() -> PortfolioKnowledgeBase:
+    return make_knowledge_base()
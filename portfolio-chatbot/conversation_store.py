@@ -0,0 +1,368 @@
+"""
+Bounded conversation stores with LRU + TTL eviction: in-memory (one process) or
+SQLite-backed (shared by every worker on the machine)
+"""
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import logging
+import threading
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONVERSATION_MAX_SESSIONS = int(os.getenv("CONVERSATION_MAX_SESSIONS", "10000"))
+CONVERSATION_MAX_MESSAGES = int(os.getenv("CONVERSATION_MAX_MESSAGES", "10"))
+CONVERSATION_TTL_SECONDS = float(os.getenv("CONVERSATION_TTL_SECONDS", "3600"))
+# Global cap on stored message text (characters), a cheap proxy for memory use
+CONVERSATION_MAX_CHARS = int(os.getenv("CONVERSATION_MAX_CHARS", "20000000"))
+# SQLite file shared by all worker processes; unset keeps conversations in process memory
+CONVERSATION_DB = os.getenv("CONVERSATION_DB")
+
+
+@dataclass
+class _Conversation:
+    messages: List[Dict[str, str]] = field(default_factory=list)
+    chars: int = 0
+    last_access: float = field(default_factory=time.monotonic)
+    # Rolling summary of the first summary_covers messages; total counts every message ever appended
+    summary: str = ""
+    summary_covers: int = 0
+    total: int = 0
+
+
+def _uncovered(messages: List[Dict[str, str]], total: int, summary_covers: int) -> List[Dict[str, str]]:
+    """The stored messages the summary doesn't cover yet"""
+    return messages[max(0, summary_covers - (total - len(messages))):]
+
+
+class ConversationStore:
+    """
+    Keeps the recent messages of each conversation, plus a rolling summary of the older ones.
+    Conversations are evicted when they have been idle longer than the TTL, or least-recently-used
+    first once the session or character cap is exceeded, so memory stays flat no matter how many
+    visitors come by.
+    """
+
+    def __init__(self, max_sessions: int = CONVERSATION_MAX_SESSIONS,
+                 max_messages: int = CONVERSATION_MAX_MESSAGES,
+                 ttl_seconds: float = CONVERSATION_TTL_SECONDS,
+                 max_chars: int = CONVERSATION_MAX_CHARS):
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        self.ttl_seconds = ttl_seconds
+        self.max_chars = max_chars
+
+        self._conversations: "OrderedDict[str, _Conversation]" = OrderedDict()
+        self._mutex = threading.Lock()
+        # Per-conversation locks live only as long as someone holds them
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self._total_chars = 0
+        self._evictions = {"ttl": 0, "lru": 0, "memory": 0}
+
+    def lock(self, conversation_id: str) -> asyncio.Lock:
+        """Lock serializing turns within one conversation (within this process only)"""
+        with self._mutex:
+            lock = self._locks.get(conversation_id)
+            if lock is None:
+                lock = asyncio.Lock()
+                self._locks[conversation_id] = lock
+            return lock
+
+    def get(self, conversation_id: str) -> List[Dict[str, str]]:
+        """Return a copy of the conversation's recent messages (empty if unknown or expired)"""
+        now = time.monotonic()
+        with self._mutex:
+            self._evict_expired(now)
+            conversation = self._conversations.get(conversation_id)
+            if conversation is None:
+                return []
+            conversation.last_access = now
+            self._conversations.move_to_end(conversation_id)
+            return list(conversation.messages)
+
+    def append(self, conversation_id: str, messages: List[Dict[str, str]]):
+        """Add messages to a conversation, keeping only the last max_messages"""
+        now = time.monotonic()
+        with self._mutex:
+            conversation = self._conversations.get(conversation_id)
+            if conversation is None:
+                conversation = _Conversation()
+                self._conversations[conversation_id] = conversation
+
+            conversation.messages.extend(messages)
+            conversation.total += len(messages)
+            if len(conversation.messages) > self.max_messages:
+                conversation.messages = conversation.messages[-self.max_messages:]
+            self._touch(conversation_id, conversation, now)
+
+    def get_with_summary(self, conversation_id: str) -> Tuple[str, List[Dict[str, str]]]:
+        """The rolling summary and the recent messages it doesn't cover yet"""
+        now = time.monotonic()
+        with self._mutex:
+            self._evict_expired(now)
+            conversation = self._conversations.get(conversation_id)
+            if conversation is None:
+                return "", []
+            conversation.last_access = now
+            self._conversations.move_to_end(conversation_id)
+            return conversation.summary, _uncovered(conversation.messages, conversation.total, conversation.summary_covers)
+
+    def pending_summary(self, conversation_id: str, keep_recent: int) -> Optional[Tuple[str, List[Dict[str, str]], int]]:
+        """
+        (summary, messages to fold into it, message count the new summary will cover) when
+        messages other than the last keep_recent aren't summarized yet, otherwise None
+        """
+        with self._mutex:
+            conversation = self._conversations.get(conversation_id)
+            if conversation is None:
+                return None
+            return self._pending(conversation.summary, conversation.messages, conversation.total,
+                                 conversation.summary_covers, keep_recent)
+
+    def set_summary(self, conversation_id: str, summary: str, covers: int) -> bool:
+        """Store a new summary, unless the conversation is gone or already has a newer one"""
+        with self._mutex:
+            conversation = self._conversations.get(conversation_id)
+            if conversation is None or covers <= conversation.summary_covers:
+                return False
+            conversation.summary = summary
+            conversation.summary_covers = covers
+            self._touch(conversation_id, conversation, time.monotonic())
+            return True
+
+    def _touch(self, conversation_id: str, conversation: _Conversation, now: float):
+        chars = len(conversation.summary) + sum(len(message["content"]) for message in conversation.messages)
+        self._total_chars += chars - conversation.chars
+        conversation.chars = chars
+        conversation.last_access = now
+        self._conversations.move_to_end(conversation_id)
+
+        self._evict_expired(now)
+        self._evict_over_capacity()
+
+    @staticmethod
+    def _pending(summary: str, messages: List[Dict[str, str]], total: int, summary_covers: int,
+                 keep_recent: int) -> Optional[Tuple[str, List[Dict[str, str]], int]]:
+        uncovered = _uncovered(messages, total, summary_covers)
+        fold = uncovered[:max(0, len(uncovered) - keep_recent)]
+        if not fold:
+            return None
+        return summary, fold, total - len(uncovered) + len(fold)
+
+    def delete(self, conversation_id: str):
+        with self._mutex:
+            conversation = self._conversations.pop(conversation_id, None)
+            if conversation is not None:
+                self._total_chars -= conversation.chars
+
+    def __len__(self) -> int:
+        return len(self._conversations)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._mutex:
+            self._evict_expired(time.monotonic())
+            return {
+                "live_sessions": len(self._conversations),
+                "stored_chars": self._total_chars,
+                "max_sessions": self.max_sessions,
+                "max_chars": self.max_chars,
+                "ttl_seconds": self.ttl_seconds,
+                "evictions": dict(self._evictions)
+            }
+
+    def _evict_expired(self, now: float):
+        # Entries are ordered by last access, so expired ones are always at the front
+        while self._conversations:
+            conversation = next(iter(self._conversations.values()))
+            if now - conversation.last_access <= self.ttl_seconds:
+                break
+            self._pop_oldest("ttl")
+
+    def _evict_over_capacity(self):
+        while len(self._conversations) > self.max_sessions:
+            self._pop_oldest("lru")
+        while self._total_chars > self.max_chars and len(self._conversations) > 1:
+            self._pop_oldest("memory")
+
+    def _pop_oldest(self, reason: str):
+        conversation_id, conversation = self._conversations.popitem(last=False)
+        self._total_chars -= conversation.chars
+        self._evictions[reason] += 1
+        logger.debug(f"Evicted conversation {conversation_id} ({reason})")
+
+
+class SharedConversationStore(ConversationStore):
+    """
+    ConversationStore kept in a local SQLite database, so every worker process on the
+    machine sees the same conversations. Same eviction rules; timestamps are wall-clock
+    because monotonic clocks aren't comparable across processes.
+
+    lock() is still a per-process asyncio lock: it orders turns handled by this worker only.
+    Across workers every read-modify-write runs in its own BEGIN IMMEDIATE transaction, so
+    turns of one conversation handled by two workers at once are both kept (neither sees the
+    other's messages in its prompt).
+    """
+
+    def __init__(self, path: str = CONVERSATION_DB, **limits):
+        super().__init__(**limits)
+        self.path = path
+        self._db = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        # Workers start at the same time; only one of them may create or migrate the schema
+        with self._transaction():
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS conversations ("
+                "id TEXT PRIMARY KEY, messages TEXT NOT NULL, chars INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS conversations_last_access ON conversations (last_access)")
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(conversations)")}
+            for column, definition in (("summary", "TEXT NOT NULL DEFAULT ''"), ("summary_covers", "INTEGER NOT NULL DEFAULT 0"),
+                                       ("total", "INTEGER NOT NULL DEFAULT 0")):
+                if column not in columns:
+                    # Database file left by an older version (it lives as long as the machine's /dev/shm)
+                    self._db.execute(f"ALTER TABLE conversations ADD COLUMN {column} {definition}")
+                    if column == "total":
+                        self._db.execute("UPDATE conversations SET total = json_array_length(messages)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS evictions (reason TEXT PRIMARY KEY, count INTEGER NOT NULL)")
+
+    @contextmanager
+    def _transaction(self):
+        """Hold the process mutex and SQLite's write lock, so no other thread or worker can
+        interleave between our reads and writes"""
+        with self._mutex:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def get(self, conversation_id: str) -> List[Dict[str, str]]:
+        now = time.time()
+        with self._transaction():
+            self._evict_expired(now)
+            row = self._db.execute("SELECT messages FROM conversations WHERE id = ?", (conversation_id,)).fetchone()
+            if row is None:
+                return []
+            self._db.execute("UPDATE conversations SET last_access = ? WHERE id = ?", (now, conversation_id))
+            return json.loads(row[0])
+
+    def append(self, conversation_id: str, messages: List[Dict[str, str]]):
+        now = time.time()
+        with self._transaction():
+            row = self._db.execute(
+                "SELECT messages, summary, summary_covers, total FROM conversations WHERE id = ?", (conversation_id,)
+            ).fetchone()
+            stored, summary, summary_covers, total = (json.loads(row[0]), *row[1:]) if row else ([], "", 0, 0)
+            stored = (stored + list(messages))[-self.max_messages:]
+            total += len(messages)
+            chars = len(summary) + sum(len(message["content"]) for message in stored)
+            self._db.execute(
+                "INSERT OR REPLACE INTO conversations (id, messages, chars, last_access, summary, summary_covers, total) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (conversation_id, json.dumps(stored, ensure_ascii=False), chars, now, summary, summary_covers, total)
+            )
+            self._evict_expired(now)
+            self._evict_over_capacity()
+
+    def get_with_summary(self, conversation_id: str) -> Tuple[str, List[Dict[str, str]]]:
+        now = time.time()
+        with self._transaction():
+            self._evict_expired(now)
+            row = self._db.execute(
+                "SELECT messages, summary, summary_covers, total FROM conversations WHERE id = ?", (conversation_id,)
+            ).fetchone()
+            if row is None:
+                return "", []
+            self._db.execute("UPDATE conversations SET last_access = ? WHERE id = ?", (now, conversation_id))
+            return row[1], _uncovered(json.loads(row[0]), row[3], row[2])
+
+    def pending_summary(self, conversation_id: str, keep_recent: int) -> Optional[Tuple[str, List[Dict[str, str]], int]]:
+        with self._mutex:
+            row = self._db.execute(
+                "SELECT messages, summary, summary_covers, total FROM conversations WHERE id = ?", (conversation_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            return self._pending(row[1], json.loads(row[0]), row[3], row[2], keep_recent)
+
+    def set_summary(self, conversation_id: str, summary: str, covers: int) -> bool:
+        with self._transaction():
+            # The covers check makes a summary computed by another worker for a later turn win
+            updated = self._db.execute(
+                "UPDATE conversations SET chars = chars - length(summary) + ?, summary = ?, summary_covers = ? "
+                "WHERE id = ? AND summary_covers < ?",
+                (len(summary), summary, covers, conversation_id, covers)
+            ).rowcount
+            return updated > 0
+
+    def delete(self, conversation_id: str):
+        with self._mutex:
+            self._db.execute("DELETE FROM conversations WHERE id = ?", (conversation_id,))
+
+    def __len__(self) -> int:
+        with self._mutex:
+            return self._db.execute("SELECT COUNT(*) FROM conversations").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._transaction():
+            self._evict_expired(time.time())
+            sessions, chars = self._db.execute("SELECT COUNT(*), COALESCE(SUM(chars), 0) FROM conversations").fetchone()
+            evictions = {"ttl": 0, "lru": 0, "memory": 0}
+            evictions.update(dict(self._db.execute("SELECT reason, count FROM evictions")))
+            return {
+                "live_sessions": sessions,
+                "stored_chars": chars,
+                "max_sessions": self.max_sessions,
+                "max_chars": self.max_chars,
+                "ttl_seconds": self.ttl_seconds,
+                "evictions": evictions,
+                "shared_db": self.path
+            }
+
+    def _evict_expired(self, now: float):
+        removed = self._db.execute("DELETE FROM conversations WHERE last_access < ?", (now - self.ttl_seconds,)).rowcount
+        self._count_evictions("ttl", removed)
+
+    def _evict_over_capacity(self):
+        sessions, chars = self._db.execute("SELECT COUNT(*), COALESCE(SUM(chars), 0) FROM conversations").fetchone()
+        if sessions > self.max_sessions:
+            removed = self._db.execute(
+                "DELETE FROM conversations WHERE id IN (SELECT id FROM conversations ORDER BY last_access LIMIT ?)",
+                (sessions - self.max_sessions,)
+            ).rowcount
+            self._count_evictions("lru", removed)
+            sessions -= removed
+        while chars > self.max_chars and sessions > 1:
+            conversation_id, conversation_chars = self._db.execute(
+                "SELECT id, chars FROM conversations ORDER BY last_access LIMIT 1"
+            ).fetchone()
+            self._db.execute("DELETE FROM conversations WHERE id = ?", (conversation_id,))
+            self._count_evictions("memory", 1)
+            chars -= conversation_chars
+            sessions -= 1
+
+    def _count_evictions(self, reason: str, count: int):
+        if count > 0:
+            self._db.execute(
+                "INSERT INTO evictions (reason, count) VALUES (?, ?) "
+                "ON CONFLICT(reason) DO UPDATE SET count = count + excluded.count",
+                (reason, count)
+            )
+
+
+def create_conversation_store() -> ConversationStore:
+    """Shared SQLite store when CONVERSATION_DB is set (multi-worker serving), otherwise in-memory"""
+    if CONVERSATION_DB:
+        logger.info(f"Conversations are shared through {CONVERSATION_DB}")
+        return SharedConversationStore(CONVERSATION_DB)
+    return ConversationStore()
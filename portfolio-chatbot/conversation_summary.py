@@ -0,0 +1,149 @@
+"""
+Rolling conversation summaries, refreshed in the background after each answer so prompts can
+carry summary + last turn instead of an ever longer raw history
+"""
+import os
+import re
+import asyncio
+import logging
+from typing import Dict, Any, Optional, List, Callable, Awaitable, Set
+
+from conversation_store import ConversationStore
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_ENABLED = os.getenv("SUMMARY_ENABLED", "true").lower() in ("1", "true", "yes")
+# Raw messages kept out of the summary and sent as-is (2 = the last exchange)
+SUMMARY_KEEP_MESSAGES = int(os.getenv("SUMMARY_KEEP_MESSAGES", "2"))
+# Upper bound on summary length, which keeps prompt size flat however long the chat runs
+SUMMARY_MAX_CHARS = int(os.getenv("SUMMARY_MAX_CHARS", "800"))
+# Ask Groq for the summary; the extractive summary is used when this is off or Groq doesn't answer
+SUMMARY_USE_LLM = os.getenv("SUMMARY_USE_LLM", "true").lower() in ("1", "true", "yes")
+
+SUMMARY_INSTRUCTIONS = (
+    "Update the running summary of a chat between a visitor and Hunter Broughton's portfolio assistant. "
+    "Keep what the visitor asked about, their interests, and the specific projects, skills and facts about "
+    f"Hunter already discussed. Write plain sentences, at most {SUMMARY_MAX_CHARS} characters, and reply "
+    "with the summary only."
+)
+
+# complete_fn(messages) -> the LLM's text, or None if the LLM didn't answer
+CompleteFn = Callable[[List[Dict[str, str]]], Awaitable[Optional[str]]]
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def _first_sentence(text: str, max_chars: int) -> str:
+    sentence = _SENTENCE_END.split(" ".join(text.split()), 1)[0]
+    if len(sentence) > max_chars:
+        sentence = sentence[:max_chars].rsplit(" ", 1)[0] + "..."
+    return sentence
+
+
+def extractive_summary(summary: str, messages: List[Dict[str, str]], max_chars: int = SUMMARY_MAX_CHARS) -> str:
+    """
+    Fold messages into the summary without an LLM: one line per exchange (the question and the
+    first sentence of the answer), oldest lines dropped once max_chars is exceeded
+    """
+    lines = [line for line in summary.split("\n") if line]
+    for message in messages:
+        if message["role"] == "user":
+            lines.append(f"Visitor asked: {_first_sentence(message['content'], 160)}")
+        elif lines and lines[-1].startswith("Visitor asked:"):
+            lines[-1] += f" Answer: {_first_sentence(message['content'], 200)}"
+    while len(lines) > 1 and sum(len(line) + 1 for line in lines) > max_chars:
+        lines.pop(0)
+    return "\n".join(lines)[:max_chars]
+
+
+class ConversationSummarizer:
+    """
+    Folds everything but the last SUMMARY_KEEP_MESSAGES messages of a conversation into its
+    rolling summary. Refreshes run as background tasks after the answer has been sent (at most
+    one per conversation at a time); a turn that arrives first just sees a summary one exchange
+    older plus those messages raw.
+    """
+
+    def __init__(self, store: ConversationStore, complete_fn: CompleteFn,
+                 keep_messages: int = SUMMARY_KEEP_MESSAGES, max_chars: int = SUMMARY_MAX_CHARS,
+                 use_llm: bool = SUMMARY_USE_LLM):
+        self.store = store
+        self.complete_fn = complete_fn
+        self.keep_messages = keep_messages
+        self.max_chars = max_chars
+        self.use_llm = use_llm
+
+        # Strong references, so pending tasks aren't garbage collected
+        self._tasks: Set[asyncio.Task] = set()
+        self._running: Set[str] = set()
+        self.refreshes = {"llm": 0, "extractive": 0, "failed": 0}
+
+    def schedule(self, conversation_id: str):
+        """Refresh the summary in the background (inline and extractive when no event loop is running)"""
+        if not SUMMARY_ENABLED:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._refresh_extractive(conversation_id)
+            return
+        if conversation_id in self._running:
+            return  # the running refresh picks up the new messages when it's done
+        self._running.add(conversation_id)
+        task = loop.create_task(self.refresh(conversation_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def refresh(self, conversation_id: str):
+        """Fold pending messages into the summary until nothing is left to fold"""
+        try:
+            while True:
+                pending = self.store.pending_summary(conversation_id, self.keep_messages)
+                if pending is None:
+                    return
+                summary, messages, covers = pending
+                new_summary = await self._llm_summary(summary, messages) if self.use_llm else None
+                if new_summary is None:
+                    new_summary = extractive_summary(summary, messages, self.max_chars)
+                    self.refreshes["extractive"] += 1
+                else:
+                    self.refreshes["llm"] += 1
+                if not self.store.set_summary(conversation_id, new_summary, covers):
+                    return  # evicted, or another worker got there first
+        except Exception as e:
+            self.refreshes["failed"] += 1
+            logger.warning(f"Summary refresh failed for {conversation_id}: {e}")
+        finally:
+            self._running.discard(conversation_id)
+
+    async def _llm_summary(self, summary: str, messages: List[Dict[str, str]]) -> Optional[str]:
+        transcript = "\n".join(f"{message['role'].capitalize()}: {message['content']}" for message in messages)
+        prompt = f"{SUMMARY_INSTRUCTIONS}\n\nCurrent summary:\n{summary or '(none yet)'}\n\nNew messages:\n{transcript}"
+        response = await self.complete_fn([{"role": "user", "content": prompt}])
+        if not response or not response.strip():
+            return None
+        response = " ".join(response.split())
+        if len(response) > self.max_chars:
+            response = response[:self.max_chars].rsplit(" ", 1)[0] + "..."
+        return response
+
+    def _refresh_extractive(self, conversation_id: str):
+        pending = self.store.pending_summary(conversation_id, self.keep_messages)
+        if pending is not None:
+            summary, messages, covers = pending
+            self.store.set_summary(conversation_id, extractive_summary(summary, messages, self.max_chars), covers)
+            self.refreshes["extractive"] += 1
+
+    async def aclose(self):
+        """Wait briefly for in-flight refreshes at shutdown"""
+        if self._tasks:
+            await asyncio.wait(list(self._tasks), timeout=5)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": SUMMARY_ENABLED,
+            "keep_messages": self.keep_messages,
+            "max_chars": self.max_chars,
+            "in_flight": len(self._running),
+            "refreshes": dict(self.refreshes)
+        }
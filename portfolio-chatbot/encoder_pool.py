@@ -0,0 +1,238 @@
+"""
+Encoder process pool: sentence encoding runs in separate processes (each with a fixed number
+of inference threads), so it never competes with request handling for the API process's GIL.
+Embeddings come back through per-worker shared-memory buffers rather than pickled arrays.
+"""
+import os
+import queue
+import atexit
+import logging
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Union, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Number of encoder processes (0 = encode in the API process)
+ENCODER_POOL_SIZE = int(os.getenv("ENCODER_POOL_SIZE", "0"))
+# Inference threads inside each encoder process
+ENCODER_POOL_THREADS = int(os.getenv("ENCODER_POOL_THREADS", "1"))
+# Rows a worker's shared-memory buffer holds; larger requests are split across workers
+ENCODER_POOL_MAX_BATCH = int(os.getenv("ENCODER_POOL_MAX_BATCH", "64"))
+# Upper bound on the embedding size the buffers are allocated for
+ENCODER_POOL_MAX_DIMENSION = int(os.getenv("ENCODER_POOL_MAX_DIMENSION", "1024"))
+ENCODER_POOL_START_TIMEOUT = float(os.getenv("ENCODER_POOL_START_TIMEOUT", "300"))
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """
+    Attach to a buffer the parent owns and unlinks. Before Python 3.13 attaching registers it
+    with the resource tracker, which spawned children share with the parent, so that's a no-op.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def _worker_main(connection, shm_name: str, model_name: str, backend: str, model_dir: str,
+                 threads: int, max_rows: int, max_dimension: int):
+    """Encoder process: load the model once, then encode requests into the shared buffer"""
+    for variable in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[variable] = str(threads)
+
+    from encoders import create_encoder
+    shm = _attach_shared_memory(shm_name)
+    try:
+        encoder = create_encoder(model_name, backend, model_dir, pool_size=0, threads=threads)
+        try:
+            import torch
+            torch.set_num_threads(threads)
+        except ImportError:
+            pass
+        dimension = encoder.get_sentence_embedding_dimension()
+        if dimension > max_dimension:
+            raise ValueError(f"Embedding dimension {dimension} exceeds ENCODER_POOL_MAX_DIMENSION={max_dimension}")
+        output = np.ndarray((max_rows, dimension), dtype=np.float32, buffer=shm.buf)
+        connection.send(("ready", dimension))
+    except Exception as e:
+        connection.send(("error", f"{type(e).__name__}: {e}"))
+        shm.close()
+        return
+
+    while True:
+        try:
+            request = connection.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if request is None:
+            break
+        try:
+            sentences, batch_size = request
+            output[:len(sentences)] = encoder.encode(sentences, batch_size=batch_size, show_progress_bar=False)
+            connection.send(("ok", len(sentences)))
+        except Exception as e:
+            connection.send(("error", f"{type(e).__name__}: {e}"))
+
+    del output
+    shm.close()
+
+
+class _Worker:
+    """Parent-side handle: the process, its pipe and the shared buffer it writes into"""
+
+    def __init__(self, context, index: int, pool: "EncoderPool"):
+        self.index = index
+        self.shm = shared_memory.SharedMemory(create=True, size=pool.max_rows * pool.max_dimension * 4)
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_connection, self.shm.name, pool.model_name, pool.backend, pool.model_dir,
+                  pool.threads, pool.max_rows, pool.max_dimension),
+            name=f"encoder-{index}",
+            daemon=True
+        )
+        self.process.start()
+        child_connection.close()
+        self.dimension: Optional[int] = None
+
+    def wait_ready(self, timeout: float) -> int:
+        if not self.connection.poll(timeout):
+            raise RuntimeError(f"Encoder process {self.index} did not start within {timeout:.0f}s")
+        status, value = self.connection.recv()
+        if status != "ready":
+            raise RuntimeError(f"Encoder process {self.index} failed to start: {value}")
+        self.dimension = value
+        return value
+
+    def encode(self, sentences: List[str], batch_size: int) -> np.ndarray:
+        self.connection.send((sentences, batch_size))
+        status, value = self.connection.recv()
+        if status != "ok":
+            raise RuntimeError(f"Encoder process {self.index} failed: {value}")
+        rows = np.ndarray((value, self.dimension), dtype=np.float32, buffer=self.shm.buf)
+        return rows.copy()  # the buffer is reused by the worker's next request
+
+    def close(self):
+        try:
+            self.connection.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.connection.close()
+        self.shm.close()
+        self.shm.unlink()
+
+
+class EncoderPool:
+    """
+    Drop-in for SentenceTransformer.encode backed by worker processes. Processes are started on
+    first use by the process that uses the pool (so a pool created before a gunicorn fork is
+    started per worker, never shared across forks). Each request goes to an idle worker;
+    requests larger than one buffer are split across workers and encoded in parallel.
+    """
+
+    def __init__(self, model_name: str, backend: str, model_dir: str, size: int = ENCODER_POOL_SIZE,
+                 threads: int = ENCODER_POOL_THREADS, max_rows: int = ENCODER_POOL_MAX_BATCH,
+                 max_dimension: int = ENCODER_POOL_MAX_DIMENSION):
+        if size < 1:
+            raise ValueError("EncoderPool needs at least one process")
+        self.model_name = model_name
+        self.backend = backend
+        self.model_dir = model_dir
+        self.size = size
+        self.threads = threads
+        self.max_rows = max_rows
+        self.max_dimension = max_dimension
+
+        self._start_lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._workers: List[_Worker] = []
+        self._idle: Optional["queue.Queue[_Worker]"] = None
+        self._fanout: Optional[ThreadPoolExecutor] = None
+        self._dimension: Optional[int] = None
+
+    def start(self):
+        """Spawn the encoder processes (idempotent per process)"""
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            # spawn, not fork: workers must not inherit the API process's threads or sockets
+            context = multiprocessing.get_context("spawn")
+            workers = [_Worker(context, index, self) for index in range(self.size)]
+            try:
+                dimensions = {worker.wait_ready(ENCODER_POOL_START_TIMEOUT) for worker in workers}
+            except Exception:
+                for worker in workers:
+                    worker.close()
+                raise
+
+            self._workers = workers
+            self._idle = queue.Queue()
+            for worker in workers:
+                self._idle.put(worker)
+            self._fanout = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="encoder-pool")
+            self._dimension = dimensions.pop()
+            self._pid = os.getpid()
+            atexit.register(self.close)
+            logger.info(f"Started {self.size} encoder processes ({self.backend}, {self.threads} threads each)")
+
+    def get_sentence_embedding_dimension(self) -> int:
+        self.start()
+        return self._dimension
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, show_progress_bar: bool = None,
+               **kwargs) -> np.ndarray:
+        """Same call shape as SentenceTransformer.encode (numpy output only)"""
+        self.start()
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+        if not sentences:
+            return np.empty((0, self._dimension), dtype=np.float32)
+
+        chunks = [sentences[start:start + self.max_rows] for start in range(0, len(sentences), self.max_rows)]
+        if len(chunks) == 1:
+            embeddings = self._encode_chunk(chunks[0], batch_size)
+        else:
+            embeddings = np.vstack(list(self._fanout.map(lambda chunk: self._encode_chunk(chunk, batch_size), chunks)))
+        return embeddings[0] if single else embeddings
+
+    def _encode_chunk(self, sentences: List[str], batch_size: int) -> np.ndarray:
+        worker = self._idle.get()
+        try:
+            return worker.encode(sentences, batch_size)
+        except (EOFError, OSError):
+            # The process died (e.g. killed for memory); replace it so the pool keeps its size
+            logger.error(f"Encoder process {worker.index} exited unexpectedly, restarting it")
+            worker = self._restart(worker)
+            raise RuntimeError("Encoder process exited while encoding")
+        finally:
+            self._idle.put(worker)
+
+    def _restart(self, worker: _Worker) -> _Worker:
+        worker.close()
+        replacement = _Worker(multiprocessing.get_context("spawn"), worker.index, self)
+        replacement.wait_ready(ENCODER_POOL_START_TIMEOUT)
+        self._workers[self._workers.index(worker)] = replacement
+        return replacement
+
+    def close(self):
+        """Stop the encoder processes and free their buffers"""
+        with self._start_lock:
+            if self._pid != os.getpid():
+                return
+            for worker in self._workers:
+                worker.close()
+            self._workers = []
+            if self._fanout is not None:
+                self._fanout.shutdown(wait=False)
+            self._pid = None
@@ -0,0 +1,309 @@
+"""
+Sentence encoder backends: PyTorch sentence-transformers or an exported ONNX Runtime model
+
+The ONNX backend runs without torch in the process. Export it once at build time:
+
+    python encoders.py export          # writes onnx_model/ (fp32 + int8 dynamically quantized)
+    python encoders.py check           # parity against torch + latency/memory comparison
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import subprocess
+from typing import List, Dict, Any, Union, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ENCODER_BACKENDS = ("torch", "onnx", "onnx-int8")
+ENCODER_BACKEND = os.getenv("ENCODER_BACKEND", "torch")
+ONNX_MODEL_DIR = os.getenv(
+    "ONNX_MODEL_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "onnx_model")
+)
+# ONNX Runtime intra-op threads (0 = one per core)
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))
+
+MODEL_FILE = "model.onnx"
+QUANTIZED_MODEL_FILE = "model-int8.onnx"
+CONFIG_FILE = "encoder_config.json"
+
+# Minimum cosine similarity to the torch embeddings for the parity check to pass
+PARITY_MIN_COSINE = {"onnx": 0.9999, "onnx-int8": 0.98}
+
+
+def encoder_id(model_name: str, backend: str) -> str:
+    """
+    Identity of the vectors a backend produces. The fp32 ONNX export reproduces the torch
+    embeddings, so they share an id (and cached vectors); int8 quantization does not.
+    """
+    return f"{model_name}@int8" if backend == "onnx-int8" else model_name
+
+
+def create_encoder(model_name: str, backend: str = ENCODER_BACKEND, model_dir: str = ONNX_MODEL_DIR,
+                   pool_size: Optional[int] = None, threads: Optional[int] = None):
+    """
+    Return an object with SentenceTransformer's encode() / get_sentence_embedding_dimension().
+    With a pool size (default ENCODER_POOL_SIZE) the model runs in separate encoder processes.
+    """
+    if backend not in ENCODER_BACKENDS:
+        raise ValueError(f"Unknown encoder backend: {backend}")
+    from encoder_pool import EncoderPool, ENCODER_POOL_SIZE
+    pool_size = ENCODER_POOL_SIZE if pool_size is None else pool_size
+    if pool_size > 0:
+        return EncoderPool(model_name, backend, model_dir, size=pool_size)
+    if backend == "torch":
+        # Imported here so ONNX deployments never load torch
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name)
+    return OnnxEncoder(model_dir, quantized=backend == "onnx-int8", expected_model=model_name,
+                       threads=ONNX_THREADS if threads is None else threads)
+
+
+class OnnxEncoder:
+    """
+    ONNX Runtime version of the sentence-transformers pipeline for all-MiniLM-L6-v2:
+    tokenize, run the exported transformer, mean-pool over the attention mask, L2-normalize
+    """
+
+    def __init__(self, model_dir: str = ONNX_MODEL_DIR, quantized: bool = False, expected_model: str = None,
+                 threads: int = ONNX_THREADS):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        config_path = os.path.join(model_dir, CONFIG_FILE)
+        if not os.path.exists(config_path):
+            raise FileNotFoundError(f"No exported ONNX encoder in {model_dir}; run `python encoders.py export`")
+        with open(config_path, 'r', encoding='utf-8') as f:
+            self.config = json.load(f)
+        if expected_model and self.config["model_name"] != expected_model:
+            raise ValueError(f"ONNX encoder in {model_dir} was exported from {self.config['model_name']}, not {expected_model}")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        model_path = os.path.join(model_dir, QUANTIZED_MODEL_FILE if quantized else MODEL_FILE)
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.config["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=self.config["pad_token_id"], pad_token=self.config["pad_token"])
+        logger.info(f"Loaded {'int8 ' if quantized else ''}ONNX encoder for {self.config['model_name']}")
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.config["dimension"]
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, show_progress_bar: bool = None,
+               **kwargs) -> np.ndarray:
+        """Same call shape as SentenceTransformer.encode (numpy output only)"""
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+
+        batches = [self._encode_batch(sentences[start:start + batch_size]) for start in range(0, len(sentences), batch_size)]
+        embeddings = np.vstack(batches) if batches else np.empty((0, self.config["dimension"]), dtype=np.float32)
+        return embeddings[0] if single else embeddings
+
+    def _encode_batch(self, sentences: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(sentences)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        feeds = {
+            "input_ids": np.array([encoding.ids for encoding in encodings], dtype=np.int64),
+            "attention_mask": attention_mask
+        }
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.array([encoding.type_ids for encoding in encodings], dtype=np.int64)
+
+        token_embeddings = self.session.run(None, feeds)[0]
+        return mean_pool(token_embeddings, attention_mask, normalize=self.config.get("normalize", True))
+
+
+def mean_pool(token_embeddings: np.ndarray, attention_mask: np.ndarray, normalize: bool = True) -> np.ndarray:
+    """Average the token embeddings of real (non-padding) tokens, optionally L2-normalized"""
+    mask = attention_mask[..., None].astype(np.float32)
+    pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+    if normalize:
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+    return pooled.astype(np.float32)
+
+
+def export_onnx(model_name: str, output_dir: str = ONNX_MODEL_DIR, quantize: bool = True, opset: int = 14) -> Dict[str, Any]:
+    """Export the sentence-transformers model to ONNX (plus an int8 dynamically quantized copy). Needs torch."""
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Pooling, Normalize
+
+    model = SentenceTransformer(model_name, device="cpu")
+    pooling = next(module for module in model if isinstance(module, Pooling))
+    if not pooling.pooling_mode_mean_tokens:
+        raise ValueError(f"{model_name} doesn't use mean pooling; OnnxEncoder only implements mean pooling")
+
+    transformer = model[0].auto_model.eval()
+    tokenizer = model.tokenizer
+
+    class TokenEmbeddings(torch.nn.Module):
+        def __init__(self, auto_model):
+            super().__init__()
+            self.auto_model = auto_model
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.auto_model(input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids)[0]
+
+    os.makedirs(output_dir, exist_ok=True)
+    model_path = os.path.join(output_dir, MODEL_FILE)
+    dummy = tokenizer(["An example sentence to trace the graph"], return_tensors="pt")
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names + ["token_embeddings"]}
+    with torch.no_grad():
+        torch.onnx.export(
+            TokenEmbeddings(transformer),
+            tuple(dummy[name] for name in input_names),
+            model_path,
+            input_names=input_names,
+            output_names=["token_embeddings"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            do_constant_folding=True
+        )
+    tokenizer.save_pretrained(output_dir)  # writes tokenizer.json for the tokenizers library
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantize_dynamic(model_path, os.path.join(output_dir, QUANTIZED_MODEL_FILE), weight_type=QuantType.QInt8)
+
+    config = {
+        "model_name": model_name,
+        "dimension": model.get_sentence_embedding_dimension(),
+        "max_seq_length": model.max_seq_length,
+        "pad_token": tokenizer.pad_token,
+        "pad_token_id": tokenizer.pad_token_id,
+        "pooling": "mean",
+        "normalize": any(isinstance(module, Normalize) for module in model),
+        "quantized": quantize
+    }
+    with open(os.path.join(output_dir, CONFIG_FILE), 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=2)
+    logger.info(f"Exported {model_name} to {output_dir}")
+    return config
+
+
+def _parity_sentences() -> List[str]:
+    from knowledge_base import iter_hunter_knowledge_items
+    queries = [
+        "What projects has Hunter worked on?",
+        "Does Hunter know Kubernetes?",
+        "How can I contact Hunter?",
+        "EECS 491",
+        "Tell me about his internship at Microsoft"
+    ]
+    return queries + [item.content for item in iter_hunter_knowledge_items()]
+
+
+def check_parity(model_name: str, backends: List[str], model_dir: str = ONNX_MODEL_DIR) -> Dict[str, Dict[str, float]]:
+    """Cosine similarity of each ONNX backend's embeddings to the torch embeddings"""
+    sentences = _parity_sentences()
+    reference = create_encoder(model_name, "torch").encode(sentences, show_progress_bar=False)
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+
+    report = {}
+    for backend in backends:
+        embeddings = create_encoder(model_name, backend, model_dir).encode(sentences)
+        cosines = np.sum(reference * embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True), axis=1)
+        report[backend] = {
+            "min_cosine": float(cosines.min()),
+            "mean_cosine": float(cosines.mean()),
+            "passed": bool(cosines.min() >= PARITY_MIN_COSINE[backend])
+        }
+    return report
+
+
+def _probe(model_name: str, backend: str, model_dir: str, queries: int) -> Dict[str, Any]:
+    """Load one backend in this (fresh) process and measure it"""
+    import resource
+
+    started = time.perf_counter()
+    encoder = create_encoder(model_name, backend, model_dir)
+    load_seconds = time.perf_counter() - started
+
+    sentences = _parity_sentences()
+    encoder.encode(sentences[:2])  # warm-up
+    latencies = []
+    for index in range(queries):
+        started = time.perf_counter()
+        encoder.encode([sentences[index % len(sentences)]])
+        latencies.append((time.perf_counter() - started) * 1000.0)
+
+    started = time.perf_counter()
+    encoder.encode(sentences, batch_size=32)
+    batch_seconds = time.perf_counter() - started
+
+    return {
+        "backend": backend,
+        "load_s": round(load_seconds, 2),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+        "batch_sentences_per_s": round(len(sentences) / batch_seconds, 1),
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "torch_loaded": "torch" in sys.modules
+    }
+
+
+def compare_backends(model_name: str, backends: List[str], model_dir: str = ONNX_MODEL_DIR, queries: int = 200) -> List[Dict[str, Any]]:
+    """Latency/memory of each backend, each measured in its own process so memory numbers don't mix"""
+    rows = []
+    for backend in backends:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "_probe", "--model", model_name,
+             "--backend", backend, "--model-dir", model_dir, "--queries", str(queries)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        rows.append(json.loads(output.strip().splitlines()[-1]))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["export", "check", "_probe"])
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--model-dir", default=ONNX_MODEL_DIR)
+    parser.add_argument("--no-quantize", action="store_true", help="export: skip the int8 model")
+    parser.add_argument("--backends", default="onnx,onnx-int8", help="check: ONNX backends to compare with torch")
+    parser.add_argument("--backend", default="torch", help=argparse.SUPPRESS)
+    parser.add_argument("--queries", type=int, default=200, help="check: single-sentence encodes to time")
+    args = parser.parse_args()
+
+    if args.command == "_probe":
+        print(json.dumps(_probe(args.model, args.backend, args.model_dir, args.queries)))
+        return
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "export":
+        print(json.dumps(export_onnx(args.model, args.model_dir, quantize=not args.no_quantize), indent=2))
+        return
+
+    backends = [backend.strip() for backend in args.backends.split(",") if backend.strip()]
+    parity = check_parity(args.model, backends, args.model_dir)
+    print("Parity with torch embeddings:")
+    for backend, result in parity.items():
+        status = "ok" if result["passed"] else f"FAILED (< {PARITY_MIN_COSINE[backend]})"
+        print(f"  {backend:<10} min cosine {result['min_cosine']:.6f}  mean {result['mean_cosine']:.6f}  {status}")
+
+    print("\nLatency / memory (one process per backend):")
+    print(f"  {'backend':<10} {'load s':>7} {'p50 ms':>7} {'p95 ms':>7} {'batch/s':>8} {'peak RSS MB':>12} {'torch':>6}")
+    for row in compare_backends(args.model, ["torch"] + backends, args.model_dir, args.queries):
+        print(f"  {row['backend']:<10} {row['load_s']:>7} {row['p50_ms']:>7} {row['p95_ms']:>7} "
+              f"{row['batch_sentences_per_s']:>8} {row['peak_rss_mb']:>12} {str(row['torch_loaded']):>6}")
+
+    if not all(result["passed"] for result in parity.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Multi-worker serving: gunicorn -c gunicorn_conf.py main:app
+
+The app and its knowledge base (encoder weights, FAISS index, memory-mapped artifact) are loaded
+once in the master and shared copy-on-write by the forked uvicorn workers, so adding workers adds
+little RSS. Conversations go through a SQLite file shared by all workers; the query, response and
+suggested-answer caches stay per worker. /admin knowledge changes are written to the artifact
+directory and picked up by every worker.
+"""
+import gc
+import os
+import sys
+import tempfile
+
+bind = os.getenv("BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+workers = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+
+# Encoder threads per worker, so the workers together use each core once
+THREADS_PER_WORKER = max(1, (os.cpu_count() or 1) // workers)
+
+# Read when main is imported (preload_app imports it in the master, before these hooks run)
+os.environ.setdefault("CONVERSATION_DB", os.path.join(
+    "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "portfolio-chatbot-conversations.db"
+))
+# /admin changes reach every worker through the artifact directory rather than one worker's memory
+if workers > 1:
+    os.environ.setdefault("KNOWLEDGE_SYNC", "true")
+# An ONNX Runtime thread pool started in the master wouldn't survive fork; one thread runs inline
+os.environ.setdefault("ONNX_THREADS", "1")
+
+
+def when_ready(server):
+    """Runs in the master after the app is imported and before any worker is forked"""
+    import main
+    main.preload_knowledge_base()
+    # Move everything loaded so far out of the GC's reach, so collections in the workers
+    # don't write to (and un-share) those pages
+    gc.freeze()
+    server.log.info(f"Knowledge base preloaded; forking {workers} workers")
+
+
+def post_fork(server, worker):
+    if "torch" in sys.modules:
+        import torch
+        torch.set_num_threads(THREADS_PER_WORKER)
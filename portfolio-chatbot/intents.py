@@ -0,0 +1,123 @@
+"""
+Intent detection shared by the chatbot engine and the smart fallback: one compiled regex pass
+over all keyword sets, optionally backed by query-embedding similarity to intent centroids
+"""
+import os
+import re
+import logging
+from typing import Dict, List, Optional, Callable
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INTENT_MODES = ("keyword", "embedding", "hybrid")
+# keyword: regex only; embedding: nearest centroid when similar enough, keywords otherwise;
+# hybrid: keywords, then the nearest centroid for messages no keyword matched
+INTENT_MODE = os.getenv("INTENT_MODE", "hybrid")
+# Cosine similarity a query needs to its nearest intent centroid to be assigned that intent
+INTENT_MIN_SIMILARITY = float(os.getenv("INTENT_MIN_SIMILARITY", "0.45"))
+
+# In priority order: when keywords of several intents match, the earliest intent wins
+INTENT_KEYWORDS: Dict[str, List[str]] = {
+    "projects": ["project", "work", "built", "created", "developed", "thriftswipe", "greeklink"],
+    "skills": ["skill", "technology", "language", "framework", "tool", "javascript", "python", "react"],
+    "contact": ["contact", "email", "reach", "connect", "linkedin", "github"],
+    "education": ["education", "school", "university", "study", "michigan"],
+    "personal": ["about", "who", "background", "bio", "personal"],
+    "experience": ["experience", "job", "intern", "credo", "vloggi", "microsoft"],
+    "website": ["website", "portfolio", "site"]
+}
+
+# Example questions whose mean embedding is each intent's centroid
+INTENT_EXAMPLES: Dict[str, List[str]] = {
+    "projects": ["What projects has Hunter built?", "Tell me about an app Hunter made", "What is Hunter's most recent project?"],
+    "skills": ["What programming languages does Hunter know?", "What technologies is Hunter good at?", "Does Hunter have AI/ML experience?"],
+    "contact": ["How can I get in touch with Hunter?", "What's Hunter's email address?", "Where can I find Hunter online?"],
+    "education": ["Where does Hunter go to college?", "What is Hunter studying?", "What classes has Hunter taken?"],
+    "personal": ["Who is Hunter?", "What are Hunter's hobbies and interests?", "Tell me about Hunter as a person"],
+    "experience": ["Where has Hunter interned?", "What was Hunter's role at his last job?", "Tell me about Hunter's professional experience"],
+    "website": ["How was this website built?", "What features does this portfolio have?", "What powers this site?"]
+}
+
+_PRIORITY = {intent: rank for rank, intent in enumerate(INTENT_KEYWORDS)}
+_KEYWORD_INTENT = {keyword: intent for intent, keywords in INTENT_KEYWORDS.items() for keyword in keywords}
+# Keywords match at the start of a word ("projects", "studying", but not the "work" in "framework");
+# longest first so a keyword isn't shadowed by a shorter one it starts with
+_KEYWORD_PATTERN = re.compile(
+    r"\b(?:" + "|".join(re.escape(keyword) for keyword in sorted(_KEYWORD_INTENT, key=len, reverse=True)) + ")",
+    re.IGNORECASE
+)
+
+
+def classify_intent(message: str) -> str:
+    """Keyword intent in one regex pass ("general" when nothing matches)"""
+    best = None
+    for match in _KEYWORD_PATTERN.finditer(message):
+        intent = _KEYWORD_INTENT[match.group(0).lower()]
+        if best is None or _PRIORITY[intent] < _PRIORITY[best]:
+            best = intent
+            if _PRIORITY[intent] == 0:
+                break
+    return best or "general"
+
+
+class IntentClassifier:
+    """
+    Keyword classification plus, once centroids are built with the knowledge base's encoder,
+    nearest-centroid classification of the query embedding the search already computed
+    """
+
+    def __init__(self, mode: str = INTENT_MODE, min_similarity: float = INTENT_MIN_SIMILARITY):
+        if mode not in INTENT_MODES:
+            raise ValueError(f"Unknown intent mode: {mode}")
+        self.mode = mode
+        self.min_similarity = min_similarity
+        self._intents: List[str] = []
+        self._centroids: Optional[np.ndarray] = None
+        self.counts = {"keyword": 0, "embedding": 0}
+
+    def build_centroids(self, encode_fn: Callable[[List[str]], np.ndarray]):
+        """encode_fn(texts) -> (n, dim) L2-normalized embeddings, from the same encoder as the queries"""
+        if self.mode == "keyword":
+            return
+        intents = list(INTENT_EXAMPLES)
+        examples = [example for intent in intents for example in INTENT_EXAMPLES[intent]]
+        embeddings = np.asarray(encode_fn(examples), dtype=np.float32)
+        centroids, start = [], 0
+        for intent in intents:
+            end = start + len(INTENT_EXAMPLES[intent])
+            centroids.append(embeddings[start:end].mean(axis=0))
+            start = end
+        centroids = np.vstack(centroids)
+        self._centroids = centroids / np.linalg.norm(centroids, axis=1, keepdims=True)
+        self._intents = intents
+        logger.info(f"Built {len(intents)} intent centroids")
+
+    def classify(self, message: str, query_embedding: Optional[np.ndarray] = None) -> str:
+        """The message's intent; query_embedding is the normalized (1, dim) search vector, if one was computed"""
+        keyword_intent = classify_intent(message) if self.mode != "embedding" else None
+        if keyword_intent is not None and (keyword_intent != "general" or self.mode == "keyword"):
+            self.counts["keyword"] += 1
+            return keyword_intent
+
+        embedding_intent = self._nearest(query_embedding)
+        if embedding_intent is not None:
+            self.counts["embedding"] += 1
+            return embedding_intent
+        self.counts["keyword"] += 1
+        return keyword_intent or classify_intent(message)
+
+    def _nearest(self, query_embedding: Optional[np.ndarray]) -> Optional[str]:
+        if query_embedding is None or self._centroids is None or query_embedding.shape[-1] != self._centroids.shape[1]:
+            return None
+        similarities = self._centroids @ query_embedding.reshape(-1)
+        best = int(np.argmax(similarities))
+        return self._intents[best] if similarities[best] >= self.min_similarity else None
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "mode": self.mode,
+            "centroids": len(self._intents),
+            "classified_by": dict(self.counts)
+        }
@@ -1,25 +1,284 @@
+from __future__ import annotations
+
 import os
 import json
+import fcntl
+import time
+import hashlib
 import logging
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+import queue
+import threading
+from collections import OrderedDict, Counter, defaultdict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from itertools import islice
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Union, Tuple, Callable
+from dataclasses import dataclass, replace
 import numpy as np
-from sentence_transformers import SentenceTransformer
-import faiss
-from sklearn.metrics.pairwise import cosine_similarity
-import pickle
+
+from lazy_imports import lazy_import
+from encoders import create_encoder, encoder_id, ENCODER_BACKEND
+from lexical_index import BM25Index
+from vector_index import (
+    IndexSpec, choose_index_spec, build_faiss_index, search_parameters, exact_search, reconstruct,
+    INDEX_TYPE, INDEX_EXACT_FILTER_MAX, EMBEDDING_STORAGE
+)
+
+faiss = lazy_import("faiss")
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Compiled knowledge artifact (manifest + float32 embedding matrix)
+ARTIFACT_FORMAT_VERSION = 3
+MANIFEST_FILENAME = "manifest.json"
+LOCK_FILENAME = ".lock"
+# Batched encoding: items are sorted by length inside a window so each batch pads to similar lengths
+ENCODE_BATCH_SIZE = int(os.getenv("ENCODE_BATCH_SIZE", "32"))
+ENCODE_SORT_WINDOW_BATCHES = int(os.getenv("ENCODE_SORT_WINDOW_BATCHES", "8"))
+
+# Query embedding cache (normalized query text -> L2-normalized embedding)
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+QUERY_CACHE_TTL_SECONDS = float(os.getenv("QUERY_CACHE_TTL_SECONDS", "3600"))
+
+# Micro-batching of concurrent query encodings + FAISS searches
+MICRO_BATCHING_ENABLED = os.getenv("MICRO_BATCHING_ENABLED", "true").lower() in ("1", "true", "yes")
+MICRO_BATCH_MAX_SIZE = int(os.getenv("MICRO_BATCH_MAX_SIZE", "32"))
+MICRO_BATCH_MAX_WAIT_MS = float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", "2"))
+
+# Retrieval modes: dense (FAISS), lexical (BM25) or hybrid (reciprocal rank fusion of both)
+SEARCH_MODES = ("dense", "lexical", "hybrid")
+RRF_K = int(os.getenv("RRF_K", "60"))
+# In hybrid mode a BM25 hit this strong (and this far ahead of the runner-up) skips the encoder
+LEXICAL_CONFIDENT_SCORE = float(os.getenv("LEXICAL_CONFIDENT_SCORE", "5.0"))
+LEXICAL_CONFIDENT_RATIO = float(os.getenv("LEXICAL_CONFIDENT_RATIO", "1.5"))
+
+DEFAULT_ARTIFACT_DIR = os.getenv(
+    "KNOWLEDGE_ARTIFACT_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "knowledge_artifact")
+)
+
 @dataclass
 class KnowledgeItem:
     """Represents a piece of knowledge about Hunter's portfolio"""
     content: str
     category: str  # e.g., "projects", "skills", "experience", "education", "personal"
     metadata: Dict[str, Any]
-    embedding: Optional[np.ndarray] = None
+    embedding: Optional[np.ndarray] = None  # only until indexed; the index snapshot then holds the vector
+    item_id: Optional[int] = None  # stable id assigned by the knowledge base; also the FAISS id
+
+ItemLike = Union[KnowledgeItem, Tuple, Dict[str, Any]]
+
+@dataclass
+class CategoryPartition:
+    """Item ids of one category plus the FAISS ID selector restricting a search to them"""
+    ids: np.ndarray  # sorted int64 item ids
+    id_set: frozenset
+    selector: Any  # faiss.IDSelectorBatch
+    matrix: Optional[np.ndarray] = None  # rows for ids, kept only when the backend is approximate
+
+@dataclass(eq=False)
+class IndexSnapshot:
+    """
+    Everything a search reads, built once and never mutated afterwards. Index changes
+    build a new snapshot and swap it in with a single assignment, so in-flight searches
+    finish on the snapshot they started with and never see a half-built index.
+    """
+    version: int
+    items: Dict[int, KnowledgeItem]  # item id -> item, in knowledge base order
+    faiss_index: Any  # FAISS index keyed by item id
+    index_spec: IndexSpec
+    search_params: Any  # backend search parameters for unfiltered searches (None for Flat)
+    lexical_index: BM25Index
+    category_partitions: Dict[str, CategoryPartition]
+    # Full-precision rows aligned with items, kept only when the index stores vectors lossily
+    # (memory-mapped from the artifact once it has been saved or loaded)
+    vectors: Optional[np.ndarray] = None
+
+def _to_knowledge_item(item: ItemLike) -> KnowledgeItem:
+    """Accept a KnowledgeItem, a (content, category[, metadata]) tuple or a dict"""
+    if isinstance(item, KnowledgeItem):
+        return item
+    if isinstance(item, dict):
+        return KnowledgeItem(
+            content=item["content"],
+            category=item["category"],
+            metadata=item.get("metadata") or {}
+        )
+    content, category, *rest = item
+    return KnowledgeItem(content=content, category=category, metadata=(rest[0] if rest else None) or {})
+
+def _chunked(iterable: Iterable, size: int) -> Iterator[List]:
+    """Yield lists of up to `size` elements without materializing the iterable"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def normalize_query(query: str) -> str:
+    """Canonical form of a query for caching (the MiniLM tokenizer is uncased anyway)"""
+    return " ".join(query.lower().split())
+
+def _manifest_stamp(directory: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(os.path.join(directory, MANIFEST_FILENAME))
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+@contextmanager
+def _artifact_lock(directory: str, shared: bool = False):
+    """File lock on an artifact directory across processes: exclusive for writers, shared for readers"""
+    with open(os.path.join(directory, LOCK_FILENAME), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+class QueryEmbeddingCache:
+    """Thread-safe LRU cache of query embeddings with a TTL and hit/miss counters"""
+    
+    def __init__(self, max_size: int = QUERY_CACHE_SIZE, ttl_seconds: float = QUERY_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def __contains__(self, key: str) -> bool:
+        """Membership check that doesn't count as a hit or miss"""
+        entry = self._entries.get(key)
+        return entry is not None and time.monotonic() - entry[0] <= self.ttl_seconds
+    
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, key: str, embedding: np.ndarray):
+        if self.max_size <= 0:
+            return
+        embedding.setflags(write=False)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
+
+class QueryMicroBatcher:
+    """
+    Collects concurrent searches for up to max_wait_ms (or max_batch_size queries), encodes
+    them in a single forward pass and runs one FAISS search per category filter over the
+    query matrix. Callers block on their own future and get back only their row.
+    """
+    
+    def __init__(self, kb: "PortfolioKnowledgeBase", max_batch_size: int = MICRO_BATCH_MAX_SIZE,
+                 max_wait_ms: float = MICRO_BATCH_MAX_WAIT_MS):
+        self.kb = kb
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.batch_sizes: Counter = Counter()
+        self._start_lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+    
+    def submit(self, key: str, k: int, category: Optional[str] = None,
+               snapshot: Optional["IndexSnapshot"] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return (embedding, scores, item ids) for one normalized query, each with a leading batch dim of 1"""
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((key, k, category, snapshot or self.kb.snapshot, future))
+        return future.result()
+    
+    def _ensure_started(self):
+        # Threads don't survive fork, so a worker process starts its own
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._thread = None
+                self._pid = os.getpid()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="kb-micro-batcher", daemon=True)
+                self._thread.start()
+    
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._process(batch)
+    
+    def _process(self, batch: List[Tuple[str, int, Optional[str], "IndexSnapshot", Future]]):
+        self.batch_sizes[len(batch)] += 1
+        try:
+            embeddings = self.kb.encode_queries([key for key, _, _, _, _ in batch])
+            # Queries pinned to different snapshots (an index swap mid-batch) are searched separately
+            rows_by_target = defaultdict(list)
+            for row, (_, _, category, snapshot, _) in enumerate(batch):
+                rows_by_target[(category, snapshot)].append(row)
+            
+            results = {}
+            for (category, snapshot), rows in rows_by_target.items():
+                k = max(batch[row][1] for row in rows)
+                scores, ids = self.kb.faiss_search(embeddings[rows], k, category, snapshot)
+                for position, row in enumerate(rows):
+                    results[row] = (scores[position:position + 1], ids[position:position + 1])
+        except Exception as e:
+            for *_, future in batch:
+                future.set_exception(e)
+            return
+        
+        for row, (_, k, _, _, future) in enumerate(batch):
+            scores, ids = results[row]
+            future.set_result((embeddings[row:row + 1], scores[:, :k], ids[:, :k]))
+    
+    def stats(self) -> Dict[str, Any]:
+        batches = sum(self.batch_sizes.values())
+        queries = sum(size * count for size, count in self.batch_sizes.items())
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "batches": batches,
+            "queries": queries,
+            "mean_batch_size": round(queries / batches, 2) if batches else 0.0,
+            "batch_size_histogram": dict(sorted(self.batch_sizes.items()))
+        }
 
 class PortfolioKnowledgeBase:
     """
@@ -27,90 +286,501 @@ class PortfolioKnowledgeBase:
     Uses sentence transformers for semantic search and similarity matching
     """
     
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", encoder_backend: str = ENCODER_BACKEND):
         self.model_name = model_name
-        self.encoder = SentenceTransformer(model_name)
+        self.encoder_backend = encoder_backend
+        self.encoder = create_encoder(model_name, encoder_backend)
+        self.encoder_id = encoder_id(model_name, encoder_backend)
         self.knowledge_items: List[KnowledgeItem] = []
-        self.embeddings: Optional[np.ndarray] = None
-        self.faiss_index: Optional[faiss.Index] = None
+        self.query_cache = QueryEmbeddingCache()
+        self.micro_batcher = QueryMicroBatcher(self) if MICRO_BATCHING_ENABLED else None
         self.is_trained = False
         
+        self._snapshot: Optional[IndexSnapshot] = None
+        self._write_lock = threading.RLock()  # serializes index writers; readers never take it
+        self._next_item_id = 0
+        self._version_counter = 0
+        self._artifact_stamp: Optional[Tuple[int, int]] = None  # manifest (mtime_ns, size) last loaded or saved
+    
+    @property
+    def snapshot(self) -> Optional[IndexSnapshot]:
+        """The index currently served to searches"""
+        return self._snapshot
+    
+    @property
+    def index_version(self) -> int:
+        """Bumped on every index change so dependent caches can invalidate"""
+        return self._snapshot.version if self._snapshot is not None else 0
+    
+    @property
+    def faiss_index(self) -> Optional[faiss.Index]:
+        return self._snapshot.faiss_index if self._snapshot is not None else None
+    
+    def _assign_id(self, item: KnowledgeItem) -> KnowledgeItem:
+        if item.item_id is None:
+            item.item_id = self._next_item_id
+        self._next_item_id = max(self._next_item_id, item.item_id + 1)
+        return item
+        
     def add_knowledge_item(self, content: str, category: str, metadata: Dict[str, Any] = None):
-        """Add a new knowledge item to the database"""
+        """Add a new knowledge item to the database (encoded lazily by build_index)"""
         if metadata is None:
             metadata = {}
-            
-        # Generate embedding for the content
-        embedding = self.encoder.encode([content])[0]
         
         item = KnowledgeItem(
             content=content,
             category=category,
-            metadata=metadata,
-            embedding=embedding
+            metadata=metadata
         )
         
-        self.knowledge_items.append(item)
-        logger.info(f"Added knowledge item: {category} - {content[:50]}...")
+        with self._write_lock:
+            self.knowledge_items.append(self._assign_id(item))
+            self.is_trained = False
+        logger.debug(f"Added knowledge item: {category} - {content[:50]}...")
+    
+    def add_knowledge_items(self, items: Iterable[ItemLike], encode: bool = False,
+                            batch_size: int = ENCODE_BATCH_SIZE) -> int:
+        """
+        Bulk-add knowledge items from any iterable (generators are consumed lazily).
+        With encode=True items are encoded in batches as they stream in; otherwise
+        encoding is deferred to build_index. Returns the number of items added.
+        """
+        items = (_to_knowledge_item(item) for item in items)
+        if encode:
+            items = self.encode_items(items, batch_size=batch_size)
+        
+        added = 0
+        with self._write_lock:
+            for item in items:
+                self.knowledge_items.append(self._assign_id(item))
+                added += 1
+            
+            if added:
+                self.is_trained = False
+        logger.info(f"Added {added} knowledge items")
+        return added
+    
+    def encode_items(self, items: Iterable[KnowledgeItem], batch_size: int = ENCODE_BATCH_SIZE) -> Iterator[KnowledgeItem]:
+        """
+        Stream items back with embeddings filled in. Items are pulled in windows of
+        several batches, sorted by length and encoded one batch per forward pass;
+        each window is yielded in its original order.
+        """
+        window_size = batch_size * ENCODE_SORT_WINDOW_BATCHES
+        for window in _chunked(items, window_size):
+            pending = sorted(
+                (item for item in window if item.embedding is None),
+                key=lambda item: len(item.content),
+                reverse=True
+            )
+            for batch in _chunked(pending, batch_size):
+                embeddings = self.encoder.encode(
+                    [item.content for item in batch],
+                    batch_size=len(batch),
+                    show_progress_bar=False
+                )
+                for item, embedding in zip(batch, embeddings):
+                    item.embedding = embedding
+            yield from window
+    
+    def _needs_encoding(self, item: KnowledgeItem) -> bool:
+        """True if the item has no embedding of its own and isn't in the live index either"""
+        if item.embedding is not None:
+            return False
+        return self._snapshot is None or self._snapshot.items.get(item.item_id) is not item
+    
+    def _encode_pending(self):
+        """Encode every knowledge item that doesn't have an embedding yet"""
+        pending = [item for item in self.knowledge_items if self._needs_encoding(item)]
+        if not pending:
+            return
+        
+        for _ in self.encode_items(pending):
+            pass
+        batches = -(-len(pending) // ENCODE_BATCH_SIZE)
+        logger.info(f"Encoded {len(pending)} knowledge items in {batches} batches")
         
     def build_index(self):
         """Build FAISS index for fast similarity search"""
-        if not self.knowledge_items:
-            logger.warning("No knowledge items to index")
-            return
+        with self._write_lock:
+            if not self.knowledge_items:
+                logger.warning("No knowledge items to index")
+                return
             
-        # Extract all embeddings
-        embeddings = np.array([item.embedding for item in self.knowledge_items])
-        self.embeddings = embeddings
+            self._encode_pending()
+            
+            # Extract all embeddings
+            embeddings = self._item_vectors(self.knowledge_items)
+            
+            # Normalize embeddings for cosine similarity
+            faiss.normalize_L2(embeddings)
+            self._set_index(embeddings)
+        logger.info(f"Built FAISS index with {len(self.knowledge_items)} items")
+    
+    def _set_index(self, embeddings: np.ndarray):
+        """Index knowledge_items with their (already L2-normalized) float32 embedding matrix and swap it in"""
+        self._swap_snapshot(self._build_snapshot(self.knowledge_items, embeddings))
+    
+    def _build_snapshot(self, items: List[KnowledgeItem], embeddings: np.ndarray,
+                        spec: Optional[IndexSpec] = None, faiss_index: Optional[faiss.Index] = None) -> IndexSnapshot:
+        """Index items (embeddings row-aligned with them); the backend is chosen from the corpus size unless given"""
+        if spec is None:
+            spec = choose_index_spec(len(items), embeddings.shape[1])
+        if faiss_index is None:
+            # Inner product on normalized vectors = cosine similarity, keyed by stable item ids
+            started = time.perf_counter()
+            faiss_index = build_faiss_index(spec, embeddings, np.array([item.item_id for item in items], dtype=np.int64))
+            logger.info(f"Built {spec.kind} index over {len(items)} items in {time.perf_counter() - started:.2f}s")
+        return self._make_snapshot(items, faiss_index, spec, embeddings)
+    
+    def _make_snapshot(self, items: List[KnowledgeItem], faiss_index: faiss.Index, spec: IndexSpec,
+                       vectors: Optional[np.ndarray] = None) -> IndexSnapshot:
+        self._version_counter += 1
+        return IndexSnapshot(
+            version=self._version_counter,
+            items={item.item_id: item for item in items},
+            faiss_index=faiss_index,
+            index_spec=spec,
+            search_params=search_parameters(spec),
+            # BM25 index over the same items, for exact tokens like course codes and product names
+            lexical_index=BM25Index((item.content for item in items), doc_ids=[item.item_id for item in items]),
+            category_partitions=self._build_category_partitions(items, spec, faiss_index),
+            vectors=None if spec.lossless else vectors
+        )
+    
+    def _swap_snapshot(self, snapshot: IndexSnapshot):
+        self._snapshot = snapshot
+        self.is_trained = True
+        # The snapshot now holds each vector: in the index, plus full-precision rows if the index is lossy
+        for item in snapshot.items.values():
+            item.embedding = None
+    
+    def _item_vectors(self, items: List[KnowledgeItem], snapshot: Optional[IndexSnapshot] = None) -> np.ndarray:
+        """
+        Full-precision float32 matrix of the items' vectors: their own embedding if set, otherwise
+        the snapshot's stored row, or the vector decoded from the index when that is lossless
+        """
+        snapshot = snapshot or self._snapshot
+        indexed = [row for row, item in enumerate(items) if item.embedding is None]
+        dimension = snapshot.faiss_index.d if snapshot is not None else len(items[0].embedding)
         
-        # Build FAISS index
-        dimension = embeddings.shape[1]
-        self.faiss_index = faiss.IndexFlatIP(dimension)  # Inner product (cosine similarity)
+        vectors = np.empty((len(items), dimension), dtype=np.float32)
+        for row, item in enumerate(items):
+            if item.embedding is not None:
+                vectors[row] = item.embedding
+        if indexed and snapshot.vectors is not None:
+            rows = {item_id: row for row, item_id in enumerate(snapshot.items)}
+            vectors[indexed] = snapshot.vectors[[rows[items[row].item_id] for row in indexed]]
+        elif indexed:
+            vectors[indexed] = reconstruct(snapshot.faiss_index, [items[row].item_id for row in indexed])
+        return vectors
+    
+    def add_items(self, items: Iterable[ItemLike]) -> List[int]:
+        """Encode and index new items without rebuilding the index; returns their ids"""
+        with self._write_lock:
+            new_items = [self._assign_id(_to_knowledge_item(item)) for item in items]
+            self._apply_changes(upserts=new_items)
+        return [item.item_id for item in new_items]
+    
+    def update_item(self, item_id: int, content: str = None, category: str = None,
+                    metadata: Dict[str, Any] = None) -> KnowledgeItem:
+        """Replace fields of one item, re-encoding it only if its content changed"""
+        with self._write_lock:
+            current = self._find_item(item_id)
+            updated = KnowledgeItem(
+                content=current.content if content is None else content,
+                category=current.category if category is None else category,
+                metadata=current.metadata if metadata is None else metadata,
+                embedding=self._item_vectors([current])[0] if content is None or content == current.content else None,
+                item_id=item_id
+            )
+            self._apply_changes(upserts=[updated])
+        return updated
+    
+    def delete_items(self, item_ids: Iterable[int]) -> int:
+        """Remove items by id; returns how many existed"""
+        with self._write_lock:
+            existing = {item.item_id for item in self.knowledge_items}
+            deleted = {item_id for item_id in item_ids if item_id in existing}
+            if deleted:
+                self._apply_changes(deletes=deleted)
+        return len(deleted)
+    
+    def _find_item(self, item_id: int) -> KnowledgeItem:
+        for item in self.knowledge_items:
+            if item.item_id == item_id:
+                return item
+        raise KeyError(item_id)
+    
+    def _apply_changes(self, upserts: List[KnowledgeItem] = (), deletes: Iterable[int] = ()):
+        """
+        Copy-on-write index update: encode only the upserted items, apply the changes to a
+        clone of the live FAISS index and swap in a new snapshot. Items in the live
+        snapshot are never modified, so concurrent searches are unaffected.
+        """
+        upserts_by_id = {item.item_id: item for item in upserts}
+        removed = set(deletes) | set(upserts_by_id)
+        
+        items = []
+        for item in self.knowledge_items:
+            if item.item_id in upserts_by_id:
+                items.append(upserts_by_id.pop(item.item_id))  # updates keep their position
+            elif item.item_id not in removed:
+                items.append(item)
+        items.extend(upserts_by_id.values())
+        
+        if self._snapshot is None or not self.is_trained:
+            # Nothing to patch yet (or staged items pending): index everything
+            self.knowledge_items = items
+            self.build_index()
+            return
         
-        # Normalize embeddings for cosine similarity
-        faiss.normalize_L2(embeddings)
-        self.faiss_index.add(embeddings)
+        pending = [item for item in upserts if item.embedding is None]
+        for _ in self.encode_items(pending):
+            pass
         
-        self.is_trained = True
-        logger.info(f"Built FAISS index with {len(self.knowledge_items)} items")
+        if upserts:
+            embeddings = self._item_vectors(upserts)
+            faiss.normalize_L2(embeddings)
+            for item, embedding in zip(upserts, embeddings):
+                item.embedding = embedding
+        
+        spec = self._snapshot.index_spec
+        if spec.supports_removal:
+            faiss_index = faiss.clone_index(self._snapshot.faiss_index)
+            if removed:
+                faiss_index.remove_ids(np.array(sorted(removed), dtype=np.int64))
+            if upserts:
+                faiss_index.add_with_ids(embeddings, np.array([item.item_id for item in upserts], dtype=np.int64))
+            snapshot = self._make_snapshot(items, faiss_index, spec, None if spec.lossless else self._item_vectors(items))
+        else:
+            # The backend can't delete vectors: rebuild it from the stored embeddings (no re-encoding)
+            snapshot = self._build_snapshot(items, self._item_vectors(items), spec)
+        
+        self.knowledge_items = items
+        self._swap_snapshot(snapshot)
+        logger.info(f"Updated FAISS index: {len(upserts)} upserted ({len(pending)} encoded), "
+                    f"{len(set(deletes))} deleted, {len(items)} items")
+    
+    def _build_category_partitions(self, items: List[KnowledgeItem], spec: IndexSpec,
+                                   faiss_index: faiss.Index) -> Dict[str, CategoryPartition]:
+        """Group item ids by category so filtered searches only scan that category's vectors"""
+        members = defaultdict(list)
+        for item in items:
+            members[item.category].append(item)
+        
+        partitions = {}
+        for category, category_items in members.items():
+            ids = np.sort(np.array([item.item_id for item in category_items], dtype=np.int64))
+            selector = faiss.IDSelectorBatch(ids)
+            # An approximate index can miss matches inside a small filtered subset, so those are scanned exactly
+            matrix = None
+            if not spec.exact and len(ids) <= INDEX_EXACT_FILTER_MAX:
+                matrix = reconstruct(faiss_index, ids)
+            partitions[category] = CategoryPartition(
+                ids=ids,
+                id_set=frozenset(ids.tolist()),
+                selector=selector,
+                matrix=matrix
+            )
+        return partitions
+    
+    def faiss_search(self, query_embeddings: np.ndarray, k: int, category: Optional[str] = None,
+                     snapshot: Optional[IndexSnapshot] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """FAISS search over all items, or only over one category's items; returns (scores, item ids)"""
+        snapshot = snapshot or self._snapshot
+        if category is None:
+            return snapshot.faiss_index.search(query_embeddings, k, params=snapshot.search_params)
+        partition = snapshot.category_partitions[category]
+        if partition.matrix is not None:
+            return exact_search(query_embeddings, partition.matrix, partition.ids, k)
+        # Fresh parameters per search: IndexIDMap temporarily swaps params.sel while searching,
+        # so one SearchParameters object shared by concurrent searches corrupts memory
+        params = search_parameters(snapshot.index_spec, partition.selector)
+        return snapshot.faiss_index.search(query_embeddings, k, params=params)
+    
+    def search(self, query: str, top_k: int = 5, category_filter: str = None, mode: str = "dense") -> List[Dict[str, Any]]:
+        """Search for relevant knowledge items (mode: "dense", "lexical" or "hybrid")"""
+        return self.retrieve(query, top_k=top_k, category_filter=category_filter, mode=mode)[0]
+    
+    def retrieve(self, query: str, top_k: int = 5, category_filter: str = None,
+                 mode: str = "dense") -> Tuple[List[Dict[str, Any]], Optional[np.ndarray]]:
+        """
+        Like search, but also returns the (1, dim) normalized query embedding it used
+        (None when a lexical match answered the query without running the encoder)
+        """
+        snapshot = self._pin_snapshot(mode)
+        if top_k <= 0:
+            return [], None
+        
+        lexical_hits = self._lexical_stage(snapshot, query, top_k, category_filter, mode)
+        if mode == "lexical" or self._lexical_is_confident(lexical_hits):
+            return self._lexical_results(snapshot, lexical_hits, top_k), None
+        
+        dense_hits, query_embedding = self._dense_search(snapshot, query, top_k, category_filter)
+        return self._merge_results(snapshot, mode, top_k, dense_hits, lexical_hits, query_embedding), query_embedding
+    
+    def retrieve_batch(self, queries: List[str], top_k: int = 5, category_filter: str = None,
+                       mode: str = "dense") -> List[Tuple[List[Dict[str, Any]], Optional[np.ndarray]]]:
+        """
+        retrieve() for many queries at once: the queries that need the encoder are encoded as
+        one matrix and searched with a single FAISS call
+        """
+        snapshot = self._pin_snapshot(mode)
+        if top_k <= 0:
+            return [([], None) for _ in queries]
         
-    def search(self, query: str, top_k: int = 5, category_filter: str = None) -> List[Dict[str, Any]]:
-        """Search for relevant knowledge items using semantic similarity"""
+        retrieved: List[Optional[Tuple[List[Dict[str, Any]], Optional[np.ndarray]]]] = [None] * len(queries)
+        lexical = {}
+        dense_rows = []
+        for row, query in enumerate(queries):
+            lexical_hits = self._lexical_stage(snapshot, query, top_k, category_filter, mode)
+            if mode == "lexical" or self._lexical_is_confident(lexical_hits):
+                retrieved[row] = (self._lexical_results(snapshot, lexical_hits, top_k), None)
+            else:
+                lexical[row] = lexical_hits
+                dense_rows.append(row)
+        
+        if dense_rows:
+            query_embeddings = self.encode_queries([queries[row] for row in dense_rows])
+            k = self._dense_k(snapshot, top_k, category_filter)
+            if k <= 0:
+                scores = ids = None
+            else:
+                scores, ids = self.faiss_search(query_embeddings, k, category_filter or None, snapshot)
+            for position, row in enumerate(dense_rows):
+                dense_hits = [] if k <= 0 else [
+                    (int(item_id), float(score)) for score, item_id in zip(scores[position], ids[position]) if item_id >= 0
+                ]
+                query_embedding = query_embeddings[position:position + 1]
+                retrieved[row] = (
+                    self._merge_results(snapshot, mode, top_k, dense_hits, lexical[row], query_embedding),
+                    query_embedding
+                )
+        return retrieved
+    
+    def _pin_snapshot(self, mode: str) -> IndexSnapshot:
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
         if not self.is_trained:
             logger.warning("Knowledge base not trained. Building index...")
             self.build_index()
-            
-        # Encode the query
-        query_embedding = self.encoder.encode([query])
-        faiss.normalize_L2(query_embedding)
         
-        # Search using FAISS
-        scores, indices = self.faiss_index.search(query_embedding, min(top_k * 2, len(self.knowledge_items)))
+        # Pin one snapshot for the whole search so a concurrent swap can't mix indexes
+        return self._snapshot
+    
+    def _lexical_stage(self, snapshot: IndexSnapshot, query: str, top_k: int, category_filter: Optional[str],
+                       mode: str) -> List[Tuple[int, float]]:
+        if mode == "dense":
+            return []
+        allowed_ids = None
+        if category_filter:
+            partition = snapshot.category_partitions.get(category_filter)
+            allowed_ids = partition.id_set if partition is not None else frozenset()
+        return snapshot.lexical_index.search(query, top_k=top_k * 2, allowed_ids=allowed_ids)
+    
+    def _lexical_results(self, snapshot: IndexSnapshot, lexical_hits: List[Tuple[int, float]], top_k: int) -> List[Dict[str, Any]]:
+        return [
+            self._format_result(snapshot, item_id, self._lexical_similarity(score), lexical_score=score)
+            for item_id, score in lexical_hits[:top_k]
+        ]
+    
+    def _merge_results(self, snapshot: IndexSnapshot, mode: str, top_k: int, dense_hits: List[Tuple[int, float]],
+                       lexical_hits: List[Tuple[int, float]], query_embedding: np.ndarray) -> List[Dict[str, Any]]:
+        if mode == "dense":
+            return [self._format_result(snapshot, item_id, score) for item_id, score in dense_hits]
+        
+        # Reciprocal rank fusion of the dense and lexical rankings
+        fused = defaultdict(float)
+        for hits in (dense_hits, lexical_hits):
+            for rank, (item_id, _) in enumerate(hits):
+                fused[item_id] += 1.0 / (RRF_K + rank + 1)
         
+        dense_scores = dict(dense_hits)
+        lexical_scores = dict(lexical_hits)
         results = []
-        for score, idx in zip(scores[0], indices[0]):
-            if idx >= len(self.knowledge_items):
-                continue
-                
-            item = self.knowledge_items[idx]
-            
-            # Apply category filter if specified
-            if category_filter and item.category != category_filter:
-                continue
-                
-            results.append({
-                "content": item.content,
-                "category": item.category,
-                "metadata": item.metadata,
-                "similarity_score": float(score),
-                "relevance": "high" if score > 0.7 else "medium" if score > 0.5 else "low"
-            })
-            
-            if len(results) >= top_k:
-                break
-                
+        for item_id in sorted(fused, key=fused.get, reverse=True)[:top_k]:
+            similarity = dense_scores.get(item_id)
+            if similarity is None:
+                similarity = float(reconstruct(snapshot.faiss_index, [item_id])[0] @ query_embedding[0])
+            results.append(self._format_result(snapshot, item_id, similarity, lexical_score=lexical_scores.get(item_id, 0.0)))
         return results
     
+    def _dense_k(self, snapshot: IndexSnapshot, top_k: int, category_filter: str = None) -> int:
+        if category_filter:
+            partition = snapshot.category_partitions.get(category_filter)
+            return min(top_k, len(partition.ids)) if partition is not None else 0
+        return min(top_k, len(snapshot.items))
+    
+    def _dense_search(self, snapshot: IndexSnapshot, query: str, top_k: int,
+                      category_filter: str = None) -> Tuple[List[Tuple[int, float]], np.ndarray]:
+        """FAISS search returning up to top_k (item id, cosine similarity) pairs"""
+        k = self._dense_k(snapshot, top_k, category_filter)
+        key = normalize_query(query)
+        
+        if k <= 0:
+            return [], self.encode_query(query)
+        
+        if self.micro_batcher is not None and key not in self.query_cache:
+            # Uncached queries are encoded and searched together with concurrent ones
+            query_embedding, scores, ids = self.micro_batcher.submit(key, k, category_filter or None, snapshot)
+        else:
+            query_embedding = self.encode_query(query)
+            scores, ids = self.faiss_search(query_embedding, k, category_filter or None, snapshot)
+        
+        hits = [(int(item_id), float(score)) for score, item_id in zip(scores[0], ids[0]) if item_id >= 0]
+        return hits, query_embedding
+    
+    def _lexical_is_confident(self, lexical_hits: List[Tuple[int, float]]) -> bool:
+        if not lexical_hits or lexical_hits[0][1] < LEXICAL_CONFIDENT_SCORE:
+            return False
+        return len(lexical_hits) == 1 or lexical_hits[0][1] >= LEXICAL_CONFIDENT_RATIO * lexical_hits[1][1]
+    
+    def _lexical_similarity(self, score: float) -> float:
+        """Map an unbounded BM25 score into [0, 1) so it can stand in for cosine similarity"""
+        return score / (score + LEXICAL_CONFIDENT_SCORE)
+    
+    def _format_result(self, snapshot: IndexSnapshot, item_id: int, score: float,
+                       lexical_score: Optional[float] = None) -> Dict[str, Any]:
+        item = snapshot.items[item_id]
+        result = {
+            "id": item_id,
+            "content": item.content,
+            "category": item.category,
+            "metadata": item.metadata,
+            "similarity_score": score,
+            "relevance": "high" if score > 0.7 else "medium" if score > 0.5 else "low"
+        }
+        if lexical_score is not None:
+            result["lexical_score"] = lexical_score
+        return result
+    
+    def encode_query(self, query: str) -> np.ndarray:
+        """Return the (1, dim) L2-normalized query embedding, served from the cache when possible"""
+        key = normalize_query(query)
+        query_embedding = self.query_cache.get(key)
+        if query_embedding is None:
+            query_embedding = np.asarray(self.encoder.encode([key]), dtype=np.float32)
+            faiss.normalize_L2(query_embedding)
+            self.query_cache.put(key, query_embedding)
+        return query_embedding
+    
+    def encode_queries(self, queries: List[str]) -> np.ndarray:
+        """Return an (n, dim) matrix of normalized query embeddings, encoding all cache misses in one pass"""
+        keys = [normalize_query(query) for query in queries]
+        cached = {key: self.query_cache.get(key) for key in dict.fromkeys(keys)}
+        missing = [key for key, embedding in cached.items() if embedding is None]
+        
+        if missing:
+            encoded = np.asarray(self.encoder.encode(missing, batch_size=len(missing), show_progress_bar=False), dtype=np.float32)
+            faiss.normalize_L2(encoded)
+            for key, embedding in zip(missing, encoded):
+                embedding = embedding.reshape(1, -1)
+                cached[key] = embedding
+                self.query_cache.put(key, embedding)
+        
+        return np.vstack([cached[key] for key in keys])
+    
     def get_category_stats(self) -> Dict[str, int]:
         """Get statistics about knowledge base categories"""
         stats = {}
@@ -120,16 +790,22 @@ class PortfolioKnowledgeBase:
     
     def save(self, filepath: str):
         """Save the knowledge base to disk"""
+        with self._write_lock:
+            if not self.is_trained:
+                self.build_index()
+            vectors = self._item_vectors(self.knowledge_items)
+        
         data = {
             "model_name": self.model_name,
             "knowledge_items": [
                 {
+                    "id": item.item_id,
                     "content": item.content,
                     "category": item.category,
                     "metadata": item.metadata,
-                    "embedding": item.embedding.tolist() if item.embedding is not None else None
+                    "embedding": vector.tolist()
                 }
-                for item in self.knowledge_items
+                for item, vector in zip(self.knowledge_items, vectors)
             ]
         }
         
@@ -138,325 +814,622 @@ class PortfolioKnowledgeBase:
             
         logger.info(f"Saved knowledge base to {filepath}")
     
+    def content_hash(self) -> str:
+        """Hash of the encoder and every item's content/category/metadata"""
+        payload = {
+            "model_name": self.encoder_id,
+            "knowledge_items": [
+                {"content": item.content, "category": item.category, "metadata": item.metadata}
+                for item in self.knowledge_items
+            ]
+        }
+        encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+    
+    def item_hash(self, item: KnowledgeItem) -> str:
+        """Hash of the text that gets embedded plus the encoder that embeds it"""
+        return hashlib.sha256(f"{self.encoder_id}\0{item.content}".encode("utf-8")).hexdigest()
+    
+    def save_artifact(self, directory: str = DEFAULT_ARTIFACT_DIR) -> str:
+        """
+        Write the compiled artifact: a manifest plus a float32 .npy matrix of the full-precision
+        vectors (never decoded from a float16/int8/PQ index). The matrix file is named after the content hash so stale files never get mixed up.
+        """
+        with self._write_lock:
+            if not self.is_trained:
+                self.build_index()
+            items = list(self.knowledge_items)
+            snapshot = self._snapshot
+            content_hash = self.content_hash()
+        
+        os.makedirs(directory, exist_ok=True)
+        embeddings = self._item_vectors(items, snapshot)
+        embeddings_file = f"embeddings-{content_hash[:16]}.npy"
+        np.save(os.path.join(directory, embeddings_file), embeddings)
+        
+        if snapshot.vectors is not None and not isinstance(snapshot.vectors, np.memmap):
+            # Serve the full-precision rows from the file just written instead of keeping them in RAM
+            with self._write_lock:
+                if self._snapshot is snapshot:
+                    self._snapshot = replace(snapshot, vectors=np.load(os.path.join(directory, embeddings_file), mmap_mode="r"))
+        
+        # Approximate indexes are expensive to train/build, so the built index is saved as well
+        index_file = None
+        if not snapshot.index_spec.exact:
+            index_file = f"index-{content_hash[:16]}.faiss"
+            faiss.write_index(snapshot.faiss_index, os.path.join(directory, index_file))
+        
+        manifest = {
+            "format_version": ARTIFACT_FORMAT_VERSION,
+            "content_hash": content_hash,
+            "model_name": self.model_name,
+            "encoder": self.encoder_id,
+            "dimension": int(embeddings.shape[1]),
+            "count": int(embeddings.shape[0]),
+            "dtype": "float32",
+            "normalized": True,
+            "embeddings_file": embeddings_file,
+            "index": snapshot.index_spec.to_dict(),
+            "index_file": index_file,
+            "knowledge_items": [
+                {
+                    "id": item.item_id,
+                    "content": item.content,
+                    "category": item.category,
+                    "metadata": item.metadata,
+                    "embedding_hash": self.item_hash(item)
+                }
+                for item in items
+            ]
+        }
+        
+        # Write the manifest last (and atomically) so readers never see a half-written artifact
+        manifest_path = os.path.join(directory, MANIFEST_FILENAME)
+        tmp_path = f"{manifest_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(tmp_path, manifest_path)
+        self._artifact_stamp = _manifest_stamp(directory)
+        
+        # Drop embedding matrices and indexes left behind by previous builds
+        for filename in os.listdir(directory):
+            stale_embeddings = filename.startswith("embeddings-") and filename.endswith(".npy") and filename != embeddings_file
+            stale_index = filename.startswith("index-") and filename.endswith(".faiss") and filename != index_file
+            if stale_embeddings or stale_index:
+                os.remove(os.path.join(directory, filename))
+        
+        logger.info(f"Saved knowledge artifact {content_hash[:16]} to {directory}")
+        return content_hash
+    
+    def _read_artifact(self, directory: str, expected_hash: str = None) -> Optional[Tuple[Dict[str, Any], np.ndarray]]:
+        """Return (manifest, memory-mapped embeddings) of a usable artifact, or None"""
+        manifest_path = os.path.join(directory, MANIFEST_FILENAME)
+        if not os.path.exists(manifest_path):
+            return None
+        
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            
+            if manifest.get("format_version") != ARTIFACT_FORMAT_VERSION:
+                logger.info("Knowledge artifact format changed, ignoring it")
+                return None
+            built_with = manifest.get("encoder", manifest["model_name"])
+            if built_with != self.encoder_id:
+                logger.info(f"Knowledge artifact was built with {built_with}, ignoring it")
+                return None
+            if expected_hash and manifest["content_hash"] != expected_hash:
+                logger.info("Knowledge artifact is stale, ignoring it")
+                return None
+            
+            embeddings = np.load(os.path.join(directory, manifest["embeddings_file"]), mmap_mode="r")
+            expected_shape = (manifest["count"], manifest["dimension"])
+            if embeddings.dtype != np.float32 or embeddings.shape != expected_shape or len(manifest["knowledge_items"]) != expected_shape[0]:
+                logger.warning("Knowledge artifact embeddings don't match the manifest, ignoring it")
+                return None
+        except (OSError, ValueError, KeyError, TypeError, AttributeError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable knowledge artifact in {directory}: {e!r}")
+            return None
+        return manifest, embeddings
+    
+    def _items_from_manifest(self, manifest: Dict[str, Any]) -> List[KnowledgeItem]:
+        return [
+            KnowledgeItem(
+                content=item_data["content"],
+                category=item_data["category"],
+                metadata=item_data["metadata"],
+                item_id=item_data.get("id", row)
+            )
+            for row, item_data in enumerate(manifest["knowledge_items"])
+        ]
+    
+    def load_artifact(self, directory: str = DEFAULT_ARTIFACT_DIR, expected_hash: str = None) -> bool:
+        """
+        Build the FAISS index from a compiled artifact without running the encoder. The embedding
+        matrix is memory-mapped and its rows copied into the index (a saved approximate index is
+        read as is). If knowledge items are already defined their content hash must match the
+        artifact's; otherwise the items are restored from the manifest. Returns False if the
+        artifact is missing or stale.
+        """
+        stamp = _manifest_stamp(directory)
+        artifact = self._read_artifact(directory, expected_hash)
+        if artifact is None:
+            return False
+        manifest, embeddings = artifact
+        
+        with self._write_lock:
+            if not self.knowledge_items:
+                self.knowledge_items = [self._assign_id(item) for item in self._items_from_manifest(manifest)]
+            elif self.content_hash() != manifest["content_hash"]:
+                logger.info("Knowledge artifact doesn't match the current items, ignoring it")
+                return False
+            
+            self._swap_snapshot(self._snapshot_from_artifact(directory, manifest, self.knowledge_items, embeddings))
+            self._artifact_stamp = stamp
+        logger.info(f"Loaded knowledge artifact {manifest['content_hash'][:16]} ({manifest['count']} items) from {directory}")
+        return True
+    
+    def _snapshot_from_artifact(self, directory: str, manifest: Dict[str, Any], items: List[KnowledgeItem],
+                                embeddings: np.ndarray) -> IndexSnapshot:
+        """Reuse the artifact's index parameters (and saved index, if any) unless INDEX_TYPE asks for another backend"""
+        spec = None
+        if manifest.get("index"):
+            spec = IndexSpec.from_dict(manifest["index"])
+            if INDEX_TYPE != "auto" and spec.kind != INDEX_TYPE:
+                logger.info(f"Knowledge artifact uses a {spec.kind} index but INDEX_TYPE={INDEX_TYPE}, rebuilding it")
+                spec = None
+            elif spec.kind != "ivfpq" and spec.storage != EMBEDDING_STORAGE:
+                logger.info(f"Knowledge artifact stores {spec.storage} vectors but EMBEDDING_STORAGE={EMBEDDING_STORAGE}, rebuilding it")
+                spec = None
+        
+        faiss_index = None
+        if spec is not None and manifest.get("index_file"):
+            try:
+                faiss_index = faiss.read_index(os.path.join(directory, manifest["index_file"]))
+            except RuntimeError as e:
+                logger.warning(f"Could not read saved {spec.kind} index, rebuilding it: {e}")
+            else:
+                if faiss_index.ntotal != len(items):
+                    logger.warning("Saved index doesn't match the manifest, rebuilding it")
+                    faiss_index = None
+        
+        return self._build_snapshot(items, embeddings, spec, faiss_index)
+    
+    def reload_artifact(self, directory: str = DEFAULT_ARTIFACT_DIR) -> bool:
+        """
+        Replace every item with the contents of a freshly compiled artifact. The new index is
+        built off to the side and swapped in atomically; searches keep running meanwhile.
+        """
+        stamp = _manifest_stamp(directory)
+        artifact = self._read_artifact(directory)
+        if artifact is None:
+            return False
+        manifest, embeddings = artifact
+        
+        items = self._items_from_manifest(manifest)
+        with self._write_lock:
+            snapshot = self._snapshot_from_artifact(directory, manifest, items, embeddings)
+            self.knowledge_items = items
+            self._next_item_id = max((item.item_id + 1 for item in items), default=0)
+            self._swap_snapshot(snapshot)
+            self._artifact_stamp = stamp
+        logger.info(f"Reloaded knowledge artifact {manifest['content_hash'][:16]} ({manifest['count']} items) from {directory}")
+        return True
+    
+    def artifact_changed(self, directory: str = DEFAULT_ARTIFACT_DIR) -> bool:
+        """True if the artifact's manifest was rewritten (e.g. by another process) since this knowledge base last loaded or saved it"""
+        stamp = _manifest_stamp(directory)
+        return stamp is not None and stamp != self._artifact_stamp
+    
+    def sync_artifact(self, directory: str = DEFAULT_ARTIFACT_DIR) -> bool:
+        """Reload the artifact if another process rewrote it; returns True if it was reloaded"""
+        if not self.artifact_changed(directory):
+            return False
+        with _artifact_lock(directory, shared=True):
+            return self.artifact_changed(directory) and self.reload_artifact(directory)
+    
+    def shared_update(self, change: Callable[[], Any], directory: str = DEFAULT_ARTIFACT_DIR) -> Any:
+        """
+        Apply an item change on top of the newest artifact and write the result back, holding a
+        file lock so that changes made by several processes sharing the directory are serialized
+        and none is lost. Other processes pick the change up with artifact_changed/reload_artifact.
+        """
+        os.makedirs(directory, exist_ok=True)
+        with _artifact_lock(directory), self._write_lock:
+            if self.artifact_changed(directory):
+                self.reload_artifact(directory)
+            version = self.index_version
+            result = change()
+            if self.index_version != version:
+                self.save_artifact(directory)
+        return result
+    
+    def _reuse_cached_embeddings(self, directory: str) -> int:
+        """
+        Fill in embeddings for items whose content is unchanged since the previous artifact.
+        Vectors are only reused when the artifact was produced by the same model.
+        """
+        manifest_path = os.path.join(directory, MANIFEST_FILENAME)
+        if not os.path.exists(manifest_path):
+            return 0
+        
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get("format_version") != ARTIFACT_FORMAT_VERSION:
+                return 0
+            if manifest.get("encoder", manifest["model_name"]) != self.encoder_id:
+                return 0
+            cached = np.load(os.path.join(directory, manifest["embeddings_file"]))
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable knowledge artifact in {directory}: {e}")
+            return 0
+        
+        rows = {
+            item_data["embedding_hash"]: row
+            for row, item_data in enumerate(manifest["knowledge_items"])
+        }
+        
+        reused = 0
+        for item in self.knowledge_items:
+            row = rows.get(self.item_hash(item))
+            if self._needs_encoding(item) and row is not None:
+                item.embedding = cached[row]
+                reused += 1
+        return reused
+    
+    def compile_artifact(self, directory: str = DEFAULT_ARTIFACT_DIR) -> Dict[str, int]:
+        """
+        Rebuild the artifact, re-encoding only items that are new or whose content changed.
+        Returns how many vectors were reused from the previous artifact and how many were encoded.
+        """
+        reused = self._reuse_cached_embeddings(directory)
+        encoded = sum(1 for item in self.knowledge_items if self._needs_encoding(item))
+        
+        self.build_index()
+        try:
+            self.save_artifact(directory)
+        except OSError as e:
+            logger.warning(f"Could not write knowledge artifact to {directory}: {e}")
+        
+        stats = {"total": len(self.knowledge_items), "reused": reused, "encoded": encoded}
+        logger.info(f"Compiled knowledge artifact: {reused} embeddings reused, {encoded} encoded")
+        return stats
+    
+    def load_or_build_artifact(self, directory: str = DEFAULT_ARTIFACT_DIR) -> Dict[str, int]:
+        """Load the compiled artifact if it matches the current items, otherwise compile it incrementally"""
+        if self.load_artifact(directory, expected_hash=self.content_hash()):
+            count = len(self.knowledge_items)
+            return {"total": count, "reused": count, "encoded": 0}
+        
+        return self.compile_artifact(directory)
+    
     def load(self, filepath: str):
         """Load the knowledge base from disk"""
         with open(filepath, 'r', encoding='utf-8') as f:
             data = json.load(f)
             
         self.model_name = data["model_name"]
-        self.encoder = SentenceTransformer(self.model_name)
+        self.encoder = create_encoder(self.model_name, self.encoder_backend)
+        self.encoder_id = encoder_id(self.model_name, self.encoder_backend)
+        self.query_cache.clear()
         
-        self.knowledge_items = []
-        for item_data in data["knowledge_items"]:
-            embedding = np.array(item_data["embedding"]) if item_data["embedding"] else None
-            item = KnowledgeItem(
-                content=item_data["content"],
-                category=item_data["category"],
-                metadata=item_data["metadata"],
-                embedding=embedding
-            )
-            self.knowledge_items.append(item)
+        with self._write_lock:
+            self.knowledge_items = []
+            self._next_item_id = 0
+            for item_data in data["knowledge_items"]:
+                embedding = np.array(item_data["embedding"], dtype=np.float32) if item_data["embedding"] else None
+                item = KnowledgeItem(
+                    content=item_data["content"],
+                    category=item_data["category"],
+                    metadata=item_data["metadata"],
+                    embedding=embedding,
+                    item_id=item_data.get("id")
+                )
+                self.knowledge_items.append(self._assign_id(item))
             
-        self.build_index()
+            self.build_index()
         logger.info(f"Loaded knowledge base from {filepath}")
 
-def create_hunter_knowledge_base() -> PortfolioKnowledgeBase:
-    """Create and populate the knowledge base with Hunter's portfolio information"""
-    kb = PortfolioKnowledgeBase()
-    
+def iter_hunter_knowledge_items() -> Iterator[KnowledgeItem]:
+    """Yield the knowledge items describing Hunter's portfolio information"""
     # Personal Information & Bio
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Hunter Broughton is a Computer Science and Economics student at the University of Michigan, studying from August 2023 to December 2026. What he cares about most is AI infrastructure and the cloud that powers it: the distributed systems, cluster orchestration, and deployment pipelines that let machine learning actually run reliably at scale. He's drawn to that layer because the models getting all the attention only work because of the infrastructure underneath them.",
         "personal",
         {"type": "bio", "importance": "high", "school": "University of Michigan", "focus": ["AI infrastructure", "cloud", "distributed systems", "AI/ML"]}
     )
 
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "While Hunter's focus is AI infrastructure and cloud-native systems, his love for software engineering is broad. He got into engineering because building things is fun, and that curiosity has taken him across full-stack development, machine learning, and even firmware. He likes working close to the hard parts of a system and writing code that is clean and fast. When he's not building, you can find him backpacking in Washington, playing the guitar, or trying to fix his golf swing.",
         "personal",
         {"type": "interests", "hobbies": ["backpacking", "guitar", "golf"], "breadth": ["full-stack", "machine learning", "firmware"]}
     )
 
     # Education Details
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Hunter Broughton is pursuing a Bachelor of Science in Computer Science and Economics at the University of Michigan from August 2023 to December 2026. His Computer Science coursework includes Intro to AI (EECS 492), Distributed Systems (EECS 491), Operating Systems (EECS 482), Software Engineering (EECS 481), Conversational AI (EECS 449), Intro to Machine Learning (EECS 445), Theory of Computation (EECS 376), Computer Organization (EECS 370), Mathematics of Machine Learning (EECS 298), Data Structures and Algorithms (EECS 281), and Discrete Math (EECS 203), along with Calculus 3 (MATH 215) and Intro to Data Science (STATS 206).",
         "education",
         {"school": "University of Michigan", "degree": "BS Computer Science and Economics", "status": "current", "graduation": "December 2026"}
     )
 
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Hunter's Economics coursework at University of Michigan includes Economic Development (ECON 461), Intermediate Macroeconomics (ECON 402), Intermediate Microeconomics (ECON 401), Game Theory (ECON 398), Business Cycle Theory (ECON 396), Macroeconomic Theory (ECON 102), and Microeconomic Theory (ECON 101).",
         "education",
         {"type": "coursework", "field": "Economics"}
     )
 
     # Academic Highlights / Project Coursework
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "For EECS 491 (Distributed Systems), Hunter built a Paxos-Based Fault-Tolerant Distributed Key/Value Service. The service uses the Paxos consensus protocol to tolerate node failures while guaranteeing linearizable reads and writes across a replicated state machine cluster. This is a core example of his interest in distributed systems and infrastructure.",
         "education",
         {"type": "academic_highlight", "course": "EECS 491", "name": "Paxos-Based Fault-Tolerant Key/Value Service", "topic": "distributed systems"}
     )
 
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "For EECS 445 (Intro to Machine Learning), Hunter designed and trained a Vision Transformer (ViT) in Python to classify dog breeds from images. He applied patch embedding, multi-head self-attention, and fine-tuning techniques to maximize classification accuracy across a multi-class dataset.",
         "education",
         {"type": "academic_highlight", "course": "EECS 445", "name": "Vision Transformer Dog Breed Classifier", "topic": "machine learning"}
     )
 
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "For EECS 370 (Computer Organization), Hunter developed an ISA simulator for the LC2K architecture in C, implementing a simulator, assembler, pipeline, and cache to optimize performance. For EECS 492 (Intro to AI), he built a Convolutional Neural Network from scratch in Python that classifies images from the CIFAR-10 dataset, using a hyperparameter grid search to optimize performance. For EECS 481 (Software Engineering), he contributed to the open-source HTTPie project, improving its authentication, error handling, and test suite.",
         "education",
         {"type": "academic_highlight", "courses": ["EECS 370", "EECS 492", "EECS 481"], "names": ["LC2K ISA", "CNN", "HTTPie Contribution"]}
     )
 
     # Work Experience
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Hunter is a Software Engineering Intern at Microsoft in Redmond, WA (May 2026 to August 2026), working on Azure Arc Enabled Kubernetes. He engineers Cluster Extensions for Kubernetes across AKS, hybrid, and edge clusters, improving state reconciliation for hybrid and GPU workloads. His work spans automating workload identity and federated credentials to eliminate long-lived secret storage, integrating Azure Monitor with Flux-configured clusters to optimize telemetry pipelines, and abstracting GitOps, security, and observability into a unified Cluster Extension experience for multi-cluster environments. This is his most recent and current role.",
         "experience",
         {"company": "Microsoft", "position": "Software Engineering Intern", "team": "Azure Arc Enabled Kubernetes", "location": "Redmond, WA", "duration": "May 2026 - August 2026", "current": True, "technologies": ["Kubernetes", "AKS", "Azure", "GitOps", "Flux", "Go"]}
     )
 
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Hunter worked as a System and Software Engineering Intern at Credo Semiconductor in San Jose, CA from May 2025 to August 2025. He developed features for the new PCIe software called Pilot using Vue, Vite, JavaScript, Python, C, and FastAPI. He implemented efficient algorithms for the PCIe-SDK with Python, PyTest, Regex, and multithreading, boosting throughput speed by 30%. He programmed S-parameter analysis automation and Proportional-Integral-Derivative Controllers to streamline optical testing, and won best implementation at the company hackathon for an EV-Charger management system.",
         "experience",
         {"company": "Credo Semiconductor", "position": "System and Software Engineering Intern", "location": "San Jose, CA", "duration": "May 2025 - August 2025"}
     )
 
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "At Credo Semiconductor, Hunter gained hands-on experience with Thermoelectric Temperature Controllers (TC-720), a Vector Network Analyzer, and Grafana. He worked on PCIe software development and optical systems automation, combining both software and hardware engineering skills.",
         "experience",
         {"company": "Credo Semiconductor", "type": "hardware_software", "technologies": ["TC-720", "Vector Network Analyzer", "PCIe", "Grafana"]}
     )
 
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Hunter worked as a Software Developer Intern at Vloggi in Sydney, Australia from June 2024 to August 2024. He engineered full-stack features for Vloggi, a platform that offers MP4 data collection and management for companies. He developed and optimized web interfaces using React, Tailwind CSS, and TypeScript, integrated configurable CSS components for diverse client needs, and connected the front-end with a MySQL backend using Node.js, deploying it using AWS and Docker.",
         "experience",
         {"company": "Vloggi", "position": "Software Developer Intern", "location": "Sydney, Australia", "duration": "June 2024 - August 2024"}
     )
 
     # Projects - Detailed Information
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Anywear is an AI-powered online marketplace for clothing that Hunter is currently developing (formerly called ThriftSwipe). The algorithm matches users with clothing based on their preferences and style, making fashion discovery effortless. It's built with Express, PostgreSQL, React, Tailwind, Python, and AI/ML technologies. The project is scaling with University of Michigan students and represents Hunter's work combining AI/ML with practical applications.",
         "projects",
         {"name": "Anywear", "aka": "ThriftSwipe", "status": "in-progress", "year": 2024, "featured": True, "impact": "scaling with UMich students", "domain": "AI/ML + E-commerce"}
     )
 
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Hunter built an Algorithmic Trading System in Python that analyzes market data and executes trades based on predefined strategies, backtesting them against historical data. It's built with Python, Matplotlib, Pandas, NumPy, Scikit-learn, and machine learning. The project reflects his interest in applying ML and his Economics background to financial markets.",
         "projects",
         {"name": "Algorithmic Trading System", "status": "completed", "year": 2025, "featured": True, "domain": "ML + Finance", "tech": ["Python", "Pandas", "NumPy", "Scikit-learn"]}
     )
 
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Inspired by Silicon Valley and Pied Piper, Hunter implemented various compression algorithms in Rust including Huffman coding, LZ77, and RLE, tested and managed through a CLI. It's built with Rust, WebAssembly, Leptos, Cargo, and Flask. The project demonstrates his systems programming skills and interest in low-level performance.",
         "projects",
         {"name": "Rust Compression Algorithms", "status": "completed", "year": 2025, "featured": True, "tech": ["Rust", "WebAssembly", "Leptos"]}
     )
 
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "At the 2025 Credo company hackathon, Hunter built a Credo EV Charger Management and Queue System with real-time monitoring, queue management, and user-friendly interfaces to optimize charger usage. It's built with Next.js, Tailwind CSS, TypeScript, SQLite, and Node.js, and won best implementation and technical achievement.",
         "projects",
         {"name": "Credo EV Charger Management + Queue System", "status": "completed", "year": 2025, "featured": True, "achievement": "best implementation and technical achievement"}
     )
 
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "GreekLink is an anonymous social media platform connecting Greek life communities nationwide that Hunter completed in 2023. He led both front-end and back-end development for this community-focused platform. It's built with Next.js, React, TypeScript, Tailwind, Firebase, and Firestore. The platform successfully connects students nationwide and is live at greeklink.xyz.",
         "projects",
         {"name": "GreekLink", "status": "completed", "year": 2023, "featured": True, "url": "https://www.greeklink.xyz/", "impact": "connecting students nationwide"}
     )
     
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Chrome Dino Time Travel is a level-based parody of Chrome's Dino game featuring different time periods that Hunter completed in 2023. This was a collaborative game development project with immersive time-travel mechanics built using PyGame and Python. The game showcases Hunter's ability to work on creative, entertainment-focused projects while collaborating with other developers.",
         "projects",
         {"name": "Chrome Dino Time Travel", "status": "completed", "year": 2023, "featured": True, "type": "game", "collaboration": True}
     )
     
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Hunter's current portfolio website (the one you're viewing) is built with Next.js, Tailwind CSS, TypeScript, React, and Framer Motion. It features cyberpunk aesthetics, interactive components, responsive design, and showcases his technical skills through its implementation. The website includes a categorized skills list, project showcase, dynamic GitHub commit integration, and this AI chatbot.",
         "projects",
         {"name": "Portfolio Website", "status": "completed", "year": 2025, "featured": True, "url": "https://hunterbroughton.com", "features": ["cyberpunk design", "AI chatbot", "skills list", "GitHub integration"]}
     )
     
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "As VP of Communications for the Hill Street Run Club at University of Michigan, Hunter is developing a website to promote the club and its events. The website features interest forms, event calendar, and membership database, built with Next.js, Tailwind CSS, SQLite, Node.js, and TypeScript. This project demonstrates his leadership role and community involvement.",
         "projects",
         {"name": "Hill Street Run Club Website", "status": "in-progress", "year": 2024, "role": "VP of Communications", "organization": "University of Michigan"}
     )
     
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Hunter developed a Python program to automate S-parameter analysis using a TC-720 temperature controller and VNA (Vector Network Analyzer). The project includes an interactive GUI for data visualization and user-friendly analysis interface, built with Python, PyVisa, Tkinter, NumPy, and Matplotlib. This demonstrates his ability to bridge software and hardware engineering.",
         "projects",
         {"name": "S-Parameter Analysis Automation", "status": "completed", "year": 2023, "type": "automation", "hardware_integration": True}
     )
     
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Hunter contributed to HTTPie, a popular command-line HTTP client, by adding a new authentication method. He implemented username/password authentication with proper parsing functionality using Python, PyTest, JavaScript, and React. This open-source contribution is available at httpie.io and demonstrates his ability to contribute to established projects.",
         "projects",
         {"name": "HTTPie Authentication Contributions", "status": "completed", "year": 2023, "url": "https://httpie.io/", "type": "open_source", "achievement": "academic_highlight"}
     )
     
     # Technical Skills - Programming Languages
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Hunter is highly proficient in JavaScript and has used it extensively in projects like GreekLink, Anywear, his portfolio website, and HTTPie contributions. He has experience with modern ES6+ features, async/await, functional programming, and both frontend and backend JavaScript development.",
         "skills",
         {"name": "JavaScript", "category": "language", "projects": ["GreekLink", "Anywear", "Portfolio", "HTTPie"], "proficiency": "high"}
     )
 
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Hunter has strong Python skills and has used Python for Anywear's AI/ML components, his Algorithmic Trading System, machine learning coursework (EECS 445, EECS 492), S-Parameter Analysis automation, HTTPie contributions, and backend development. He's experienced with libraries like NumPy, Pandas, PyTorch, TensorFlow, FastAPI, PyTest, Scikit-learn, and PyVisa for both data science and software engineering applications.",
         "skills",
         {"name": "Python", "category": "language", "libraries": ["NumPy", "Pandas", "PyTorch", "TensorFlow", "FastAPI", "PyTest", "Scikit-learn", "PyVisa"], "proficiency": "high"}
     )
 
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Hunter is proficient in Go (Golang), which he uses in his work at Microsoft on Azure Arc Enabled Kubernetes. Go is central to cloud-native and Kubernetes development, and Hunter works with it on distributed infrastructure and Cluster Extensions.",
         "skills",
         {"name": "Go", "category": "language", "company": "Microsoft", "domain": "cloud-native / Kubernetes"}
     )
     
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Hunter is proficient in TypeScript and has used it extensively in GreekLink, his portfolio website, Hill Street Run Club website, and Vloggi projects. He leverages TypeScript for type-safe development, better code maintainability, and enhanced developer experience in React and Next.js applications.",
         "skills",
         {"name": "TypeScript", "category": "language", "projects": ["GreekLink", "Portfolio", "Hill Street Run Club", "Vloggi"], "proficiency": "high"}
     )
     
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Hunter has solid C++ skills with experience in object-oriented programming, memory management, and performance optimization. He has used C++ in academic coursework and understands systems programming concepts, making him capable of working on performance-critical applications.",
         "skills",
         {"name": "C++", "category": "language", "concepts": ["OOP", "memory management", "performance optimization"], "proficiency": "solid"}
     )
     
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Hunter has foundational Java skills and has used Java for academic projects at University of Michigan. He understands object-oriented programming principles, data structures, and algorithms implementation in Java through his coursework.",
         "skills",
         {"name": "Java", "category": "language", "context": "academic", "proficiency": "foundational"}
     )
     
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Hunter has experience with Vue.js and Vuetify from his work at Credo Semiconductor, where he developed features for PCIe software called Pilot. This demonstrates his adaptability to different frontend frameworks beyond React.",
         "skills",
         {"name": "Vue.js", "category": "framework", "company": "Credo Semiconductor", "project": "Pilot PCIe software"}
     )
     
     # Frameworks & Libraries
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Hunter is highly skilled in React and has used it extensively in GreekLink, Anywear, his portfolio website, Vloggi projects, and HTTPie contributions. He's experienced with hooks, state management, component architecture, and modern React patterns for building scalable user interfaces.",
         "skills",
         {"name": "React", "category": "framework", "concepts": ["hooks", "state management", "component architecture"], "proficiency": "high"}
     )
     
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Hunter is proficient in Next.js and has used it for GreekLink, his portfolio website, and Hill Street Run Club website. He leverages Next.js features like server-side rendering, API routes, static site generation, and modern web development patterns for performance and SEO optimization.",
         "skills",
         {"name": "Next.js", "category": "framework", "features": ["SSR", "API routes", "SSG"], "proficiency": "high"}
     )
     
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Hunter has strong Tailwind CSS skills and has used it for styling in GreekLink, Anywear, his portfolio website, Hill Street Run Club website, and Vloggi projects. He creates responsive, modern designs using utility-first CSS methodology.",
         "skills",
         {"name": "Tailwind CSS", "category": "framework", "approach": "utility-first", "proficiency": "strong"}
     )
     
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Hunter has experience with Node.js and Express for backend development, particularly in Anywear and Vloggi projects. He builds RESTful APIs, handles server-side logic, and integrates with databases using these technologies.",
         "skills",
         {"name": "Node.js/Express", "category": "framework", "type": "backend", "projects": ["Anywear", "Vloggi"]}
     )
 
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Hunter has experience with PyTorch and TensorFlow for machine learning, used across his ML coursework (EECS 445, EECS 492) and projects like Anywear. He has built neural networks from scratch, including a Convolutional Neural Network for image classification and a Vision Transformer for dog breed classification, working with patch embeddings, self-attention, and model fine-tuning.",
         "skills",
         {"name": "PyTorch / TensorFlow", "category": "framework", "type": "ML", "courses": ["EECS 445", "EECS 492"], "concepts": ["CNNs", "Vision Transformers", "fine-tuning"]}
     )
 
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Hunter works with Transformers and modern deep learning architectures, including Vision Transformers (ViT) for image classification and the attention-based models studied in EECS 449 (Conversational AI). This ties into his broader interest in AI and the infrastructure that supports it.",
         "skills",
         {"name": "Transformers", "category": "framework", "type": "ML", "courses": ["EECS 449", "EECS 445"]}
     )
     
     # Tools & Technologies
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Hunter is proficient with Git version control and uses it for all his projects. He's experienced with branching, merging, collaborative development workflows, and maintains active repositories on GitHub showcasing his work.",
         "skills",
         {"name": "Git", "category": "tool", "concepts": ["branching", "merging", "collaboration"], "proficiency": "proficient"}
     )
     
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Hunter works with databases including PostgreSQL (used in Anywear), MongoDB, MySQL (at Vloggi), SQLite, and Azure CosmosDB. He designs schemas, handles data operations, and integrates databases with Node.js and Python backends for scalable data storage.",
         "skills",
         {"name": "Databases", "category": "tool", "type": "database", "systems": ["PostgreSQL", "MongoDB", "MySQL", "SQLite", "CosmosDB", "DynamoDB"]}
     )
 
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Hunter has strong experience with Kubernetes, the core of his work at Microsoft on Azure Arc Enabled Kubernetes. He builds Cluster Extensions that manage state across AKS, hybrid, and edge clusters, including GPU workloads. He works with cluster orchestration, multi-cluster environments, and the operational concerns of running containerized workloads at scale.",
         "skills",
         {"name": "Kubernetes", "category": "tool", "company": "Microsoft", "concepts": ["AKS", "Cluster Extensions", "edge clusters", "GPU workloads"]}
     )
 
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Hunter works extensively with Microsoft Azure, particularly Azure Arc, Azure Kubernetes Service (AKS), Azure Monitor, and Azure CosmosDB through his role at Microsoft. He focuses on cloud-native infrastructure and the systems that run AI and distributed workloads at scale.",
         "skills",
         {"name": "Azure", "category": "tool", "company": "Microsoft", "services": ["Azure Arc", "AKS", "Azure Monitor", "CosmosDB"]}
     )
 
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Hunter practices DevOps, GitOps, and CI/CD as core parts of his work on cloud infrastructure at Microsoft. He works with Flux for GitOps-driven cluster configuration, builds deployment pipelines, and integrates observability and security into unified workflows for multi-cluster environments. He also uses Docker for containerization (experience dating back to Vloggi).",
         "skills",
         {"name": "DevOps / GitOps / CI/CD", "category": "concept", "company": "Microsoft", "tools": ["Flux", "Docker", "GitOps", "CI/CD pipelines"]}
     )
 
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Hunter has hands-on experience with distributed systems and distributed state management, both academically (EECS 491, where he built a Paxos-based fault-tolerant key/value store) and professionally (state reconciliation across Kubernetes clusters at Microsoft). This is a central focus of his interest in AI infrastructure.",
         "skills",
         {"name": "Distributed Systems", "category": "concept", "context": ["EECS 491", "Microsoft"], "topics": ["Paxos", "consensus", "state reconciliation"]}
     )
 
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Hunter has experience with AWS and Docker from his work at Vloggi, where he deployed applications using cloud services and containerization technologies for scalable and reliable deployments.",
         "skills",
         {"name": "AWS/Docker", "category": "tool", "type": "deployment", "company": "Vloggi"}
     )
 
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Hunter has experience with hardware integration and test equipment, including Thermoelectric Temperature Controllers (TC-720) and Vector Network Analyzers from his work at Credo Semiconductor. He bridges software and hardware engineering through automation and control systems.",
         "skills",
         {"name": "Hardware Integration", "category": "tool", "equipment": ["TC-720", "VNA"], "company": "Credo Semiconductor"}
     )
     
     # Contact & Social Information
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "You can contact Hunter Broughton through his website's contact page at hunterbroughton.com/socials, via email, or through his social media profiles including LinkedIn, GitHub, and Strava. He's open to hiring opportunities, collaboration, and general inquiries.",
         "contact",
         {"website": "hunterbroughton.com/socials", "platforms": ["LinkedIn", "GitHub", "Strava"], "open_to": ["hiring", "collaboration", "inquiries"]}
     )
     
     # Website & Portfolio Features
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Hunter's portfolio website features a cyberpunk theme with interactive components including a categorized skills list, project showcase, dynamic GitHub commit integration, responsive design, and an AI-powered chatbot. It uses Next.js, TypeScript, Tailwind CSS, Framer Motion for animations, and includes features like particle systems, geometric backgrounds, and terminal-style interfaces.",
         "website",
         {"theme": "cyberpunk", "features": ["skills list", "AI chatbot", "GitHub integration", "particle systems"], "technologies": ["Next.js", "TypeScript", "Tailwind", "Framer Motion"]}
     )
 
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "The portfolio website includes several interactive sections: a hero section with terminal-style typewriter effects, an about section with personal photos slideshow, a categorized skills list (organized by languages, frameworks, tools, and concepts), an experience timeline, education details with coursework tabs, and a comprehensive projects showcase. The site also features a newsletter signup and social links page.",
         "website",
         {"sections": ["hero", "about", "skills", "experience", "education", "projects"], "interactive_features": ["typewriter effects", "photo slideshow", "categorized skills"]}
     )
 
     # Leadership & Activities
-    kb.add_knowledge_item(
+    yield KnowledgeItem(
         "Hunter serves as VP of Communications for the Hill Street Run Club at University of Michigan, where he leads communication efforts and is developing the club's website.",
         "activities",
         {"role": "VP of Communications", "organization": "Hill Street Run Club", "school": "University of Michigan"}
     )
-    
+
+def create_hunter_knowledge_base() -> PortfolioKnowledgeBase:
+    """Create and populate the knowledge base with Hunter's portfolio information"""
+    kb = PortfolioKnowledgeBase()
+    kb.add_knowledge_items(iter_hunter_knowledge_items())
     return kb
 
 if __name__ == "__main__":
-    # Create and save the knowledge base
+    # Create the knowledge base and compile its artifact
     kb = create_hunter_knowledge_base()
-    kb.build_index()
+    build_stats = kb.load_or_build_artifact(DEFAULT_ARTIFACT_DIR)
     
     # Test the knowledge base
     test_queries = [
@@ -477,7 +1450,6 @@ if __name__ == "__main__":
         for i, result in enumerate(results, 1):
             print(f"{i}. [{result['category']}] {result['content'][:100]}... (Score: {result['similarity_score']:.3f})")
     
-    # Save the knowledge base
-    kb.save("hunter_knowledge_base.json")
-    print(f"\nKnowledge base saved with {len(kb.knowledge_items)} items")
+    print(f"\nKnowledge artifact compiled to {DEFAULT_ARTIFACT_DIR} with {len(kb.knowledge_items)} items")
+    print(f"Embeddings reused: {build_stats['reused']}, encoded: {build_stats['encoded']}")
     print("Category stats:", kb.get_category_stats())
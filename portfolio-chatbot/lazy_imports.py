@@ -0,0 +1,25 @@
+"""
+Deferred imports for heavy dependencies, so importing the service stays cheap
+"""
+import sys
+import importlib.util
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Return a module object that is only actually imported on first attribute access.
+    Later `import name` statements get the same (lazy) module from sys.modules.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -0,0 +1,63 @@
+"""
+In-memory BM25 inverted index used alongside the FAISS index for exact-token matches
+"""
+import re
+import math
+from collections import Counter, defaultdict
+from typing import List, Dict, Tuple, Optional, Iterable, Sequence, Set
+
+# Keeps tokens like "c++", "c#", "next.js" and "node.js" intact
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+
+STOPWORDS = frozenset("""
+a an and are as at be but by can could did do does for from had has have he her his how i in
+into is it its me my of on or s so tell than that the their them there these they this to was
+we were what when where which who whom why will with would you your about hunter hunter's
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word tokens with stopwords removed"""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of documents (document id = position in the list, or doc_ids[position])"""
+
+    def __init__(self, documents: Iterable[str], k1: float = 1.2, b: float = 0.75,
+                 doc_ids: Optional[Sequence[int]] = None):
+        self.k1 = k1
+        self.b = b
+        self.doc_ids = list(doc_ids) if doc_ids is not None else None
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.doc_lengths: List[int] = []
+
+        for doc_id, document in enumerate(documents):
+            term_counts = Counter(tokenize(document))
+            self.doc_lengths.append(sum(term_counts.values()))
+            for term, count in term_counts.items():
+                self.postings[term].append((doc_id, count))
+
+        self.num_docs = len(self.doc_lengths)
+        self.avg_doc_length = (sum(self.doc_lengths) / self.num_docs) if self.num_docs else 0.0
+        self.idf = {
+            term: math.log(1 + (self.num_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    def search(self, query: str, top_k: int = 5, allowed_ids: Optional[Set[int]] = None) -> List[Tuple[int, float]]:
+        """Return up to top_k (doc_id, score) pairs with a positive score, best first"""
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for position, tf in self.postings[term]:
+                doc_id = self.doc_ids[position] if self.doc_ids is not None else position
+                if allowed_ids is not None and doc_id not in allowed_ids:
+                    continue
+                length_norm = 1 - self.b + self.b * self.doc_lengths[position] / self.avg_doc_length
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + self.k1 * length_norm)
+
+        ranked = sorted(scores.items(), key=lambda pair: pair[1], reverse=True)
+        return ranked[:top_k]
@@ -2,76 +2,355 @@
 Groq LLM integration with intelligent fallback system
 """
 import requests
+import urllib3
+import httpx
 import json
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator
 import os
 import re
+import time
+import asyncio
+import threading
+from collections import deque
+
+from intents import classify_intent
 
 logger = logging.getLogger(__name__)
 
+# Connection pool settings for the long-lived async Groq client
+GROQ_API_BASE = os.getenv("GROQ_API_BASE", "https://api.groq.com/openai/v1")
+GROQ_TIMEOUT = float(os.getenv("GROQ_TIMEOUT", "30"))
+GROQ_HTTP2 = os.getenv("GROQ_HTTP2", "false").lower() in ("1", "true", "yes")
+GROQ_MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", "20"))
+GROQ_MAX_KEEPALIVE = int(os.getenv("GROQ_MAX_KEEPALIVE", "10"))
+GROQ_KEEPALIVE_EXPIRY = float(os.getenv("GROQ_KEEPALIVE_EXPIRY", "60"))
+GROQ_MAX_CONCURRENCY = int(os.getenv("GROQ_MAX_CONCURRENCY", "16"))
+
+# Per-request budget for Groq (the whole answer, or the first token when streaming);
+# past it the request is answered by the smart fallback instead
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "8"))
+
+# Circuit breaker: after this many consecutive failures (errors, timeouts, or calls slower
+# than LLM_SLOW_CALL_SECONDS) Groq is skipped for LLM_CIRCUIT_OPEN_SECONDS, then one probe
+# request decides whether to close the circuit again
+LLM_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "5"))
+LLM_SLOW_CALL_SECONDS = float(os.getenv("LLM_SLOW_CALL_SECONDS", "5"))
+LLM_CIRCUIT_OPEN_SECONDS = float(os.getenv("LLM_CIRCUIT_OPEN_SECONDS", "30"))
+
+# Hedging: if the first request hasn't answered (or streamed a token) within this percentile
+# of recent latencies, a second identical request races it and the first to respond wins
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() in ("1", "true", "yes")
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+LLM_HEDGE_MIN_DELAY_MS = float(os.getenv("LLM_HEDGE_MIN_DELAY_MS", "250"))
+# Latencies needed before the percentile is trusted; until then the budget's midpoint is used
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+
+
+# Appended to the system prompt sent to Groq
+RESPONSE_GUIDELINES = """IMPORTANT RESPONSE GUIDELINES:
+- Always be conversational and friendly, like you're Hunter's personal assistant
+- Use the provided context to give specific, concise answers
+- If the context mentions specific projects, technologies, or experiences, reference them by name
+- Keep responses engaging and invite follow-up questions
+- Never say "based on the provided context" - just naturally incorporate the information
+- Write as if you know Hunter personally and are excited to share information about him
+- again, important, be concise! but also detailed
+
+RESPONSE STYLE:
+- Use a warm, professional tone
+- Be enthusiastic about Hunter's work and achievements
+- Ask engaging follow-up questions when appropriate
+- Make the conversation feel natural and flowing"""
+
+
+def enhance_system_prompt(original_prompt: str) -> str:
+    """The system prompt as sent to Groq (callers that pre-enhance it, e.g. to count its tokens, aren't enhanced twice)"""
+    return f"{original_prompt}\n\n{RESPONSE_GUIDELINES}"
+
+
+class CircuitBreaker:
+    """Closed -> open after consecutive failures -> half-open (single probe) -> closed or open again"""
+    
+    def __init__(self, failure_threshold: int = LLM_CIRCUIT_FAILURE_THRESHOLD,
+                 open_seconds: float = LLM_CIRCUIT_OPEN_SECONDS,
+                 slow_call_seconds: float = LLM_SLOW_CALL_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.slow_call_seconds = slow_call_seconds
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_count = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+    
+    def allow_request(self) -> bool:
+        """Whether a call may go to Groq now (in half-open state, only one probe at a time)"""
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.open_seconds:
+                self.state = "half_open"
+                self._probe_in_flight = False
+            if self.state == "closed":
+                return True
+            if self.state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+    
+    def record_success(self, latency: float):
+        if latency > self.slow_call_seconds:
+            self.record_failure()
+            return
+        with self._lock:
+            if self.state != "closed":
+                logger.info("Groq circuit closed")
+            self.state = "closed"
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+    
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == "half_open" or (self.state == "closed" and self.consecutive_failures >= self.failure_threshold):
+                logger.warning(f"Groq circuit opened for {self.open_seconds:g}s after {self.consecutive_failures} failures")
+                self.state = "open"
+                self.opened_count += 1
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+    
+    @property
+    def closed(self) -> bool:
+        """Groq is currently healthy (unlike allow_request, this never takes the half-open probe)"""
+        return self.state == "closed"
+    
+    def release_probe(self):
+        """The probe was abandoned (e.g. the client went away) without telling us anything"""
+        with self._lock:
+            self._probe_in_flight = False
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.opened_count,
+            "rejected_calls": self.rejected
+        }
+
+
+class LatencyTracker:
+    """Sliding window of recent latencies (seconds) for percentile-based hedge delays"""
+    
+    def __init__(self, window: int = 200):
+        self._samples: deque = deque(maxlen=window)
+    
+    def record(self, latency: float):
+        self._samples.append(latency)
+    
+    def percentile(self, percentile: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        samples = sorted(self._samples)
+        return samples[min(len(samples) - 1, int(len(samples) * percentile / 100.0))]
+    
+    def hedge_delay(self, budget: float) -> float:
+        """How long to wait on the first request before hedging it"""
+        if len(self._samples) < LLM_HEDGE_MIN_SAMPLES:
+            return budget / 2
+        return max(LLM_HEDGE_MIN_DELAY_MS / 1000.0, self.percentile(LLM_HEDGE_PERCENTILE))
+    
+    def stats(self) -> Dict[str, Any]:
+        p50, p95, p99 = (self.percentile(p) for p in (50, 95, 99))
+        return {
+            "samples": len(self._samples),
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "p99_ms": round(p99 * 1000, 1) if p99 is not None else None
+        }
+
 
 class GroqClient:
     """Free client for Groq API - extremely fast and reliable"""
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, api_base: str = None):
         self.api_key = api_key or os.getenv("GROQ_API_KEY")
-        self.base_url = "https://api.groq.com/openai/v1/chat/completions"
-        self.model = "llama-3.1-8b-instant"  
+        self.base_url = f"{(api_base or GROQ_API_BASE).rstrip('/')}/chat/completions"
+        self.model = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
         self.available = bool(self.api_key)
         
+        # Pooled clients, reused across requests so we only pay for TCP+TLS once per connection
+        self._session = requests.Session()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore = asyncio.Semaphore(GROQ_MAX_CONCURRENCY)
+        
         if self.available:
             logger.info(f"Groq client initialized with model: {self.model}")
         else:
             logger.warning("Groq API key not found in environment variables")
     
-    def chat_completion(self, messages: List[Dict[str, str]], max_tokens: int = 300, temperature: float = 0.7) -> str:
-        """Generate chat completion using Groq"""
+    async def open(self):
+        """Create the pooled async HTTP client (called from the FastAPI lifespan)"""
+        if self._client is not None:
+            return
+        
+        http2 = GROQ_HTTP2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("GROQ_HTTP2 is set but the h2 package isn't installed - using HTTP/1.1")
+                http2 = False
+        
+        self._client = httpx.AsyncClient(
+            headers=self._headers(),
+            timeout=GROQ_TIMEOUT,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=GROQ_MAX_CONNECTIONS,
+                max_keepalive_connections=GROQ_MAX_KEEPALIVE,
+                keepalive_expiry=GROQ_KEEPALIVE_EXPIRY
+            )
+        )
+        logger.info(f"Groq connection pool opened (http2={http2}, max_connections={GROQ_MAX_CONNECTIONS}, max_concurrency={GROQ_MAX_CONCURRENCY})")
+    
+    async def aclose(self):
+        """Close the pooled async HTTP client"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+    
+    def _build_payload(self, messages: List[Dict[str, str]], max_tokens: int, temperature: float, stream: bool = False) -> Dict[str, Any]:
+        # Optimize the system message for better responses
+        optimized_messages = self._optimize_messages(messages)
+        logger.debug(f"Sending request to Groq with {len(optimized_messages)} messages")
+        
+        return {
+            "model": self.model,
+            "messages": optimized_messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "top_p": 0.9,
+            "stream": stream,
+            "stop": None
+        }
+    
+    def _parse_response(self, status_code: int, text: str, result_json) -> str:
+        if status_code == 200:
+            result = result_json()
+            content = result["choices"][0]["message"]["content"].strip()
+            logger.debug(f"Groq response length: {len(content)} characters")
+            return content
+        
+        raise self._api_error(status_code, text)
+    
+    def _api_error(self, status_code: int, text: str) -> Exception:
+        error_msg = f"Groq API error: {status_code}"
+        if text:
+            error_msg += f" - {text}"
+        return Exception(error_msg)
+    
+    def chat_completion(self, messages: List[Dict[str, str]], max_tokens: int = 300, temperature: float = 0.7,
+                        timeout: float = GROQ_TIMEOUT) -> str:
+        """Generate chat completion using Groq; the whole call, not just each socket read, must finish within timeout"""
         if not self.available:
             raise Exception("Groq API key not provided")
         
+        deadline = time.monotonic() + timeout
         try:
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            # Optimize the system message for better responses
-            optimized_messages = self._optimize_messages(messages)
-            
-            payload = {
-                "model": self.model,
-                "messages": optimized_messages,
-                "max_tokens": max_tokens,
-                "temperature": temperature,
-                "top_p": 0.9,
-                "stream": False,
-                "stop": None
-            }
-            
-            logger.debug(f"Sending request to Groq with {len(optimized_messages)} messages")
-            response = requests.post(self.base_url, json=payload, headers=headers, timeout=30)
-            
-            if response.status_code == 200:
-                result = response.json()
-                content = result["choices"][0]["message"]["content"].strip()
-                logger.debug(f"Groq response length: {len(content)} characters")
-                return content
-            else:
-                error_msg = f"Groq API error: {response.status_code}"
-                if response.text:
-                    error_msg += f" - {response.text}"
-                raise Exception(error_msg)
+            payload = self._build_payload(messages, max_tokens, temperature)
+            with self._session.post(self.base_url, json=payload, headers=self._headers(), timeout=timeout, stream=True) as response:
+                text = self._read_before(response, deadline).decode("utf-8", errors="replace")
+            return self._parse_response(response.status_code, text, lambda: json.loads(text))
                 
         except requests.exceptions.RequestException as e:
             raise Exception(f"Failed to connect to Groq: {e}")
     
+    def _read_before(self, response: requests.Response, deadline: float) -> bytes:
+        """
+        Read a streamed response body by a time.monotonic() deadline. requests' timeout restarts on
+        every socket read, so a server trickling bytes could otherwise hold the call far past it.
+        """
+        sock = getattr(getattr(response.raw, "connection", None), "sock", None)
+        body = bytearray()
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise requests.exceptions.Timeout("Groq response not complete within the deadline")
+            if sock is not None:
+                sock.settimeout(remaining)  # each read1 waits on one socket read at most
+            try:
+                chunk = response.raw.read1(8192, decode_content=True)
+            except urllib3.exceptions.ReadTimeoutError as e:
+                raise requests.exceptions.Timeout(e)
+            except urllib3.exceptions.HTTPError as e:
+                raise requests.exceptions.ConnectionError(e)
+            if not chunk:
+                return bytes(body)
+            body += chunk
+    
+    async def achat_completion(self, messages: List[Dict[str, str]], max_tokens: int = 300, temperature: float = 0.7) -> str:
+        """Generate chat completion using Groq without blocking the event loop"""
+        if not self.available:
+            raise Exception("Groq API key not provided")
+        
+        try:
+            if self._client is None:
+                await self.open()
+            
+            payload = self._build_payload(messages, max_tokens, temperature)
+            async with self._semaphore:
+                response = await self._client.post(self.base_url, json=payload)
+            return self._parse_response(response.status_code, response.text, response.json)
+        
+        except httpx.HTTPError as e:
+            raise Exception(f"Failed to connect to Groq: {e}")
+    
+    async def astream_chat_completion(self, messages: List[Dict[str, str]], max_tokens: int = 300, temperature: float = 0.7) -> AsyncIterator[str]:
+        """Stream completion deltas from Groq as they arrive (OpenAI-style server-sent events)"""
+        if not self.available:
+            raise Exception("Groq API key not provided")
+        
+        try:
+            if self._client is None:
+                await self.open()
+            
+            payload = self._build_payload(messages, max_tokens, temperature, stream=True)
+            async with self._semaphore:
+                async with self._client.stream("POST", self.base_url, json=payload) as response:
+                    if response.status_code != 200:
+                        body = (await response.aread()).decode("utf-8", errors="replace")
+                        raise self._api_error(response.status_code, body)
+                    
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[len("data:"):].strip()
+                        if data == "[DONE]":
+                            break
+                        
+                        chunk = json.loads(data)
+                        choices = chunk.get("choices") or []
+                        delta = choices[0].get("delta", {}).get("content") if choices else None
+                        if delta:
+                            yield delta
+        
+        except httpx.HTTPError as e:
+            raise Exception(f"Failed to connect to Groq: {e}")
+    
     def _optimize_messages(self, messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
         """Optimize messages for better conversational responses"""
         optimized = []
         
         for message in messages:
-            if message["role"] == "system":
+            if message["role"] == "system" and not message["content"].endswith(RESPONSE_GUIDELINES):
                 enhanced_content = self._enhance_system_prompt(message["content"])
                 optimized.append({"role": "system", "content": enhanced_content})
             else:
@@ -81,23 +360,7 @@ class GroqClient:
     
     def _enhance_system_prompt(self, original_prompt: str) -> str:
         """Enhance the system prompt for more conversational responses"""
-
-        return f"""{original_prompt}
-
-IMPORTANT RESPONSE GUIDELINES:
-- Always be conversational and friendly, like you're Hunter's personal assistant
-- Use the provided context to give specific, concise answers
-- If the context mentions specific projects, technologies, or experiences, reference them by name
-- Keep responses engaging and invite follow-up questions
-- Never say "based on the provided context" - just naturally incorporate the information
-- Write as if you know Hunter personally and are excited to share information about him
-- again, important, be concise! but also detailed
-
-RESPONSE STYLE:
-- Use a warm, professional tone
-- Be enthusiastic about Hunter's work and achievements
-- Ask engaging follow-up questions when appropriate
-- Make the conversation feel natural and flowing"""
+        return enhance_system_prompt(original_prompt)
 
 class SmartFallbackManager:
     """Smart fallback system """
@@ -105,31 +368,243 @@ class SmartFallbackManager:
     def __init__(self):
         self.groq_client = GroqClient()
         self.available = self.groq_client.available
+        self.circuit = CircuitBreaker()
+        self.completion_latency = LatencyTracker()
+        self.first_token_latency = LatencyTracker()
+        self.counters = {"hedges": 0, "hedge_wins": 0, "deadline_exceeded": 0, "fallbacks": 0}
+        self.background_counters = {"calls": 0, "failures": 0, "skipped": 0}
         
         if self.available:
             logger.info("Groq client ready for conversational responses")
         else:
             logger.warning("Groq not available - will use smart fallback responses")
     
-    def chat_completion(self, messages: List[Dict[str, str]], max_tokens: int = 300, temperature: float = 0.7) -> str:
-        """Try Groq first, then fall back to intelligent context-based responses"""
-        
-        
+    async def open(self):
+        """Open the pooled Groq connections"""
         if self.available:
+            await self.groq_client.open()
+    
+    async def aclose(self):
+        """Close the pooled Groq connections"""
+        await self.groq_client.aclose()
+    
+    def chat_completion(self, messages: List[Dict[str, str]], max_tokens: int = 300, temperature: float = 0.7,
+                        intent: Optional[str] = None) -> str:
+        """
+        Try Groq first (within the deadline budget), then fall back to intelligent context-based responses
+        (for the caller's already-detected intent, if given)
+        """
+        if self.available and self.circuit.allow_request():
+            started = time.monotonic()
             try:
                 logger.info("Trying Groq for completion")
-                response = self.groq_client.chat_completion(messages, max_tokens, temperature)
+                response = self.groq_client.chat_completion(messages, max_tokens, temperature,
+                                                            timeout=min(GROQ_TIMEOUT, LLM_DEADLINE_SECONDS))
+            except Exception as e:
+                self.circuit.record_failure()
+                logger.warning(f"Groq failed: {e}")
+            else:
+                self._record_success(self.completion_latency, started)
                 if response and response.strip():
                     logger.info("Successfully got response from Groq")
                     return response
+        
+        # Fall back to intelligent context-based response
+        logger.info("Using smart fallback response system")
+        self.counters["fallbacks"] += 1
+        return self._generate_smart_fallback(messages, intent)
+    
+    async def achat_completion(self, messages: List[Dict[str, str]], max_tokens: int = 300, temperature: float = 0.7,
+                               meta: Optional[Dict[str, Any]] = None, deadline: Optional[float] = None,
+                               intent: Optional[str] = None) -> str:
+        """
+        Async variant of chat_completion for use on the event loop. Groq must answer before
+        deadline (a time.monotonic() timestamp, default LLM_DEADLINE_SECONDS from now).
+        If a meta dict is passed, meta["source"] is set to "groq" or "fallback".
+        """
+        meta = meta if meta is not None else {}
+        budget = self._budget(deadline)
+        if self.available and budget > 0 and self.circuit.allow_request():
+            started = time.monotonic()
+            try:
+                logger.info("Trying Groq for completion")
+                response = await self._hedged_completion(messages, max_tokens, temperature, budget)
+            except asyncio.CancelledError:
+                self.circuit.release_probe()
+                raise
             except Exception as e:
+                self.circuit.record_failure()
                 logger.warning(f"Groq failed: {e}")
+            else:
+                self._record_success(self.completion_latency, started)
+                if response and response.strip():
+                    logger.info("Successfully got response from Groq")
+                    meta["source"] = "groq"
+                    return response
+        
+        logger.info("Using smart fallback response system")
+        self.counters["fallbacks"] += 1
+        meta["source"] = "fallback"
+        return self._generate_smart_fallback(messages, intent)
+    
+    async def abackground_completion(self, messages: List[Dict[str, str]], max_tokens: int = 300, temperature: float = 0.7,
+                                     timeout: float = LLM_DEADLINE_SECONDS) -> Optional[str]:
+        """
+        Groq completion for background work such as conversation summaries. These calls stay out
+        of the user-facing circuit breaker, latency percentiles and fallback counters, and are
+        skipped while the circuit isn't closed. Returns None instead of a fallback answer.
+        """
+        if not self.available or not self.circuit.closed:
+            self.background_counters["skipped"] += 1
+            return None
+        self.background_counters["calls"] += 1
+        try:
+            response = await asyncio.wait_for(self.groq_client.achat_completion(messages, max_tokens, temperature), timeout)
+        except Exception as e:
+            self.background_counters["failures"] += 1
+            logger.info(f"Background Groq call failed: {e!r}")
+            return None
+        return response if response and response.strip() else None
+    
+    async def astream_chat_completion(self, messages: List[Dict[str, str]], max_tokens: int = 300, temperature: float = 0.7,
+                                      meta: Optional[Dict[str, Any]] = None, deadline: Optional[float] = None,
+                                      intent: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Stream a completion from Groq. If Groq fails or sends no token before the deadline
+        (see achat_completion) the smart fallback is sent as a single chunk; a failure
+        mid-stream just ends the stream.
+        meta["source"] is set like in achat_completion ("partial" if the stream broke off).
+        """
+        meta = meta if meta is not None else {}
+        budget = self._budget(deadline)
+        if self.available and budget > 0 and self.circuit.allow_request():
+            started = time.monotonic()
+            stream, first_delta = None, None
+            try:
+                logger.info("Trying Groq for streaming completion")
+                stream, first_delta = await self._hedged_stream(messages, max_tokens, temperature, budget)
+            except asyncio.CancelledError:
+                self.circuit.release_probe()
+                raise
+            except Exception as e:
+                self.circuit.record_failure()
+                logger.warning(f"Groq stream failed: {e}")
+            else:
+                self._record_success(self.first_token_latency, started)
+            
+            if first_delta is not None:
+                try:
+                    yield first_delta
+                    async for delta in stream:
+                        yield delta
+                    meta["source"] = "groq"
+                except Exception as e:
+                    logger.warning(f"Groq stream failed: {e}")
+                    meta["source"] = "partial"
+                finally:
+                    await stream.aclose()
+                return
         
-        # Fall back to intelligent context-based response
         logger.info("Using smart fallback response system")
-        return self._generate_smart_fallback(messages)
+        self.counters["fallbacks"] += 1
+        meta["source"] = "fallback"
+        yield self._generate_smart_fallback(messages, intent)
     
-    def _generate_smart_fallback(self, messages: List[Dict[str, str]]) -> str:
+    def _budget(self, deadline: Optional[float]) -> float:
+        return LLM_DEADLINE_SECONDS if deadline is None else deadline - time.monotonic()
+    
+    def _record_success(self, tracker: LatencyTracker, started: float):
+        latency = time.monotonic() - started
+        tracker.record(latency)
+        self.circuit.record_success(latency)
+    
+    async def _race(self, start_attempt, tracker: LatencyTracker, budget: float):
+        """
+        Run start_attempt() (which returns a task) and, if hedging is on and it hasn't finished
+        within the tracker's hedge delay, a second one. Returns the first successful task;
+        the others are cancelled. Raises the last error, or TimeoutError past the budget.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + budget
+        hedge_at = loop.time() + tracker.hedge_delay(budget) if LLM_HEDGE_ENABLED else None
+        first = start_attempt()
+        pending = {first}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                wake_at = min(deadline, hedge_at) if hedge_at is not None else deadline
+                timeout = wake_at - loop.time()
+                done, pending = await asyncio.wait(pending, timeout=max(0.0, timeout), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.counters["hedge_wins"] += 1
+                        return task
+                    error = task.exception()
+                if loop.time() >= deadline:
+                    break
+                if hedge_at is not None and loop.time() >= hedge_at and pending:
+                    hedge_at = None
+                    self.counters["hedges"] += 1
+                    logger.info("Groq is slow, sending a hedged request")
+                    pending.add(start_attempt())
+        finally:
+            for task in pending:
+                task.cancel()
+        
+        if pending or error is None:
+            self.counters["deadline_exceeded"] += 1
+            raise TimeoutError(f"Groq did not respond within the {budget:.1f}s budget")
+        raise error
+    
+    async def _hedged_completion(self, messages: List[Dict[str, str]], max_tokens: int, temperature: float,
+                                 budget: float) -> str:
+        def start_attempt():
+            return asyncio.ensure_future(self.groq_client.achat_completion(messages, max_tokens, temperature))
+        
+        return (await self._race(start_attempt, self.completion_latency, budget)).result()
+    
+    async def _hedged_stream(self, messages: List[Dict[str, str]], max_tokens: int, temperature: float,
+                             budget: float):
+        """Open Groq streams until one yields its first token; returns (stream, first delta or None if empty)"""
+        streams = {}
+        
+        async def first_delta(stream):
+            try:
+                return await stream.__anext__()
+            except StopAsyncIteration:
+                return None
+        
+        def start_attempt():
+            stream = self.groq_client.astream_chat_completion(messages, max_tokens, temperature)
+            task = asyncio.ensure_future(first_delta(stream))
+            streams[task] = stream
+            return task
+        
+        winner = None
+        try:
+            winner = await self._race(start_attempt, self.first_token_latency, budget)
+        finally:
+            # Losing (or timed-out) streams: wait for the cancellation to land, then release their connections
+            for task, stream in streams.items():
+                if task is winner:
+                    continue
+                await asyncio.gather(task, return_exceptions=True)
+                await stream.aclose()
+        return streams[winner], winner.result()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "deadline_seconds": LLM_DEADLINE_SECONDS,
+            "circuit": self.circuit.stats(),
+            "completion_latency": self.completion_latency.stats(),
+            "first_token_latency": self.first_token_latency.stats(),
+            "hedging_enabled": LLM_HEDGE_ENABLED,
+            **self.counters,
+            "background": dict(self.background_counters)
+        }
+    
+    def _generate_smart_fallback(self, messages: List[Dict[str, str]], intent: Optional[str] = None) -> str:
         """Generate intelligent fallback responses using context from messages"""
         user_message = ""
         context = ""
@@ -142,7 +617,7 @@ class SmartFallbackManager:
                 context = message["content"]
         
         
-        intent = self._detect_intent(user_message)
+        intent = intent or self._detect_intent(user_message)
         
         # Generate response based on intent and available context
         if context and "Hunter" in context:
@@ -152,22 +627,7 @@ class SmartFallbackManager:
     
     def _detect_intent(self, message: str) -> str:
         """Detect user intent from the message"""
-        message_lower = message.lower()
-        
-        if any(word in message_lower for word in ["project", "work", "built", "created", "developed", "thriftswipe", "greeklink"]):
-            return "projects"
-        elif any(word in message_lower for word in ["skill", "technology", "language", "framework", "tool", "javascript", "python", "react"]):
-            return "skills"
-        elif any(word in message_lower for word in ["contact", "email", "reach", "connect", "linkedin", "github"]):
-            return "contact"
-        elif any(word in message_lower for word in ["education", "school", "university", "study", "michigan"]):
-            return "education"
-        elif any(word in message_lower for word in ["about", "who", "background", "bio", "personal"]):
-            return "personal"
-        elif any(word in message_lower for word in ["experience", "job", "work", "intern", "credo", "vloggi"]):
-            return "experience"
-        else:
-            return "general"
+        return classify_intent(message)
     
     def _generate_contextual_response(self, user_message: str, context: str, intent: str) -> str:
         """Generate a response using available context about Hunter"""
@@ -1,60 +1,213 @@
 import os
+import sys
 import logging
-from typing import List, Dict, Any, Optional
+import json
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple, Literal
 from datetime import datetime
 import asyncio
+import functools
+import secrets
+import uuid
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, Depends
+import numpy as np
+from fastapi import FastAPI, HTTPException, Depends, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel, Field
-import uvicorn
 from dotenv import load_dotenv
 
-from knowledge_base import PortfolioKnowledgeBase, create_hunter_knowledge_base
-from local_llm import FreeLLMManager
+# Cheap to import: faiss and the encoder are only loaded when the knowledge base is built
+from knowledge_base import PortfolioKnowledgeBase, create_hunter_knowledge_base, DEFAULT_ARTIFACT_DIR
+from conversation_store import create_conversation_store
+from conversation_summary import ConversationSummarizer
+from intents import IntentClassifier
+from encoder_pool import EncoderPool
+from response_cache import SemanticResponseCache
+from answer_warmer import SuggestedAnswerCache, WARMUP_ENABLED
+from prompt_builder import PromptBuilder, TokenCounter
 
 # Load environment variables
 load_dotenv()
 
-# Initialize LLM Manager (no API keys needed!)
-llm_manager = FreeLLMManager()
-
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Log LLM system status on startup
-groq_status = "Available" if llm_manager.groq_client.available else "Not Available"
-logger.info(f"Groq LLM: {groq_status}")
-logger.info(f"Smart fallback system: Active")
-if not llm_manager.groq_client.available:
-    logger.warning("Groq not available - will use intelligent fallback responses")
+_llm_manager = None
+
+def get_llm_manager():
+    """The LLM manager (no API keys needed!), created on first use"""
+    global _llm_manager
+    if _llm_manager is None:
+        from local_llm import FreeLLMManager
+        _llm_manager = FreeLLMManager()
+        
+        # Log LLM system status
+        groq_status = "Available" if _llm_manager.groq_client.available else "Not Available"
+        logger.info(f"Groq LLM: {groq_status}")
+        logger.info(f"Smart fallback system: Active")
+        if not _llm_manager.groq_client.available:
+            logger.warning("Groq not available - will use intelligent fallback responses")
+    return _llm_manager
+
+# Bounded pool for CPU-bound work (query encoding, FAISS search) so it never runs on the event loop.
+# Threads mostly wait on the encoder micro-batcher, so this also bounds how large a batch can get.
+CHAT_EXECUTOR_WORKERS = int(os.getenv("CHAT_EXECUTOR_WORKERS", "16"))
+
+# Retrieval mode used by the chat pipeline ("dense", "lexical" or "hybrid"). Confidence, the
+# source score threshold and the response cache are tuned on dense cosine scores; hybrid is opt-in
+SEARCH_MODE = os.getenv("SEARCH_MODE", "dense")
+
+# Batch endpoints: items per request, and LLM calls a /chat/batch request keeps in flight
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "100"))
+CHAT_BATCH_CONCURRENCY = int(os.getenv("CHAT_BATCH_CONCURRENCY", "4"))
+# Largest top_k the search endpoints accept
+SEARCH_MAX_TOP_K = int(os.getenv("SEARCH_MAX_TOP_K", "50"))
+
+# Token required by the /admin endpoints (they are disabled when unset)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# Several processes serving one knowledge base (set by gunicorn_conf.py when workers > 1): /admin
+# changes are written to the artifact directory, and every worker reloads it when it changes
+KNOWLEDGE_SYNC = os.getenv("KNOWLEDGE_SYNC", "false").lower() in ("1", "true", "yes")
+# Seconds between checks of the artifact manifest
+KNOWLEDGE_SYNC_INTERVAL = float(os.getenv("KNOWLEDGE_SYNC_INTERVAL", "1"))
+
+# Bind immediately and load the knowledge base in the background; until it's ready the
+# health check reports "warming" and knowledge endpoints answer 503
+FAST_START = os.getenv("FAST_START", "false").lower() in ("1", "true", "yes")
 
 # Global variables
 knowledge_base: Optional[PortfolioKnowledgeBase] = None
+chatbot: Optional["ChatbotEngine"] = None  # created in lifespan once the knowledge base is ready
+search_executor: Optional[ThreadPoolExecutor] = None
+startup_task: Optional[asyncio.Task] = None
+warmup_task: Optional[asyncio.Task] = None
+knowledge_sync_task: Optional[asyncio.Task] = None
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Application lifespan management"""
-    global knowledge_base
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking call on the bounded search executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(search_executor, functools.partial(func, *args, **kwargs))
+
+# Loaded in the gunicorn master before workers fork (see gunicorn_conf.py)
+_preloaded_knowledge_base: Optional[PortfolioKnowledgeBase] = None
+
+def preload_knowledge_base():
+    """
+    Load the encoder and index before gunicorn forks its workers, so they share those pages
+    copy-on-write. A stale artifact is compiled in a child process: running the encoder here
+    would start thread pools that don't survive fork.
+    """
+    global _preloaded_knowledge_base
+    kb = create_hunter_knowledge_base()
+    if not kb.load_artifact(DEFAULT_ARTIFACT_DIR, expected_hash=kb.content_hash()):
+        logger.info("Knowledge artifact is missing or stale, compiling it in a child process")
+        subprocess.run(
+            [sys.executable, "-c", "import knowledge_base as kb; kb.create_hunter_knowledge_base().compile_artifact(kb.DEFAULT_ARTIFACT_DIR)"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            check=True
+        )
+        if not kb.load_artifact(DEFAULT_ARTIFACT_DIR, expected_hash=kb.content_hash()):
+            raise RuntimeError(f"Could not compile the knowledge artifact in {DEFAULT_ARTIFACT_DIR}")
+    _preloaded_knowledge_base = kb
+    logger.info(f"Preloaded knowledge base ({len(kb.knowledge_items)} items) for forked workers")
+
+def _load_knowledge_base() -> PortfolioKnowledgeBase:
+    """Initialize the knowledge base from the compiled artifact (encodes only if it's missing or stale)"""
+    if _preloaded_knowledge_base is not None:
+        return _preloaded_knowledge_base
+    kb = create_hunter_knowledge_base()
+    kb.load_or_build_artifact(DEFAULT_ARTIFACT_DIR)
+    return kb
+
+async def initialize_services():
+    """Load the knowledge base off the event loop, then start the chatbot engine and answer warm-up"""
+    global knowledge_base, chatbot, warmup_task
     
-    # Startup
-    logger.info("Starting up Portfolio Chatbot API...")
     try:
-        # Initialize knowledge base
-        knowledge_base = create_hunter_knowledge_base()
-        knowledge_base.build_index()
+        kb = await run_blocking(_load_knowledge_base)
+        if isinstance(kb.encoder, EncoderPool):
+            await run_blocking(kb.encoder.start)  # rather than on the first query
         logger.info("Knowledge base initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize knowledge base: {e}")
         raise
     
+    token_counter = await run_blocking(TokenCounter)  # loads (or first downloads) the tiktoken encoding
+    chatbot = ChatbotEngine(kb, token_counter)
+    try:
+        await run_blocking(chatbot.intents.build_centroids, kb.encode_queries)
+    except Exception as e:
+        logger.warning(f"Intent centroids unavailable, classifying by keywords only: {e}")
+    knowledge_base = kb  # published last, so requests never see a knowledge base without an engine
+    logger.info("Chatbot engine initialized")
+    
+    # Pre-compute answers for the suggested questions in the background
+    if WARMUP_ENABLED and get_llm_manager().available:
+        warmup_task = asyncio.create_task(chatbot.suggested_answers.run())
+
+async def _initialize_in_background():
+    try:
+        await initialize_services()
+    except Exception:
+        pass  # already logged; the health check reports "unavailable"
+
+async def _sync_knowledge_loop():
+    """Reload the artifact whenever another worker rewrote it; searches use the current index meanwhile"""
+    while True:
+        await asyncio.sleep(KNOWLEDGE_SYNC_INTERVAL)
+        kb = knowledge_base
+        if kb is None or not kb.artifact_changed(DEFAULT_ARTIFACT_DIR):
+            continue
+        try:
+            if await run_blocking(kb.sync_artifact, DEFAULT_ARTIFACT_DIR):
+                logger.info(f"Picked up knowledge changes from another worker (index version {kb.index_version})")
+        except Exception as e:
+            logger.error(f"Failed to reload the shared knowledge artifact: {e}")
+
+def service_status() -> str:
+    if knowledge_base is not None:
+        return "healthy"
+    if startup_task is not None and not startup_task.done():
+        return "warming"
+    return "unavailable"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application lifespan management"""
+    global search_executor, startup_task, knowledge_sync_task
+    
+    # Startup
+    logger.info("Starting up Portfolio Chatbot API...")
+    search_executor = ThreadPoolExecutor(max_workers=CHAT_EXECUTOR_WORKERS, thread_name_prefix="kb-search")
+    await get_llm_manager().open()
+    if FAST_START:
+        logger.info("Fast start: serving while the knowledge base warms up")
+        startup_task = asyncio.create_task(_initialize_in_background())
+    else:
+        await initialize_services()
+    if KNOWLEDGE_SYNC:
+        knowledge_sync_task = asyncio.create_task(_sync_knowledge_loop())
+    
     yield
     
     # Shutdown
     logger.info("Shutting down Portfolio Chatbot API...")
+    if startup_task:
+        startup_task.cancel()
+    if warmup_task:
+        warmup_task.cancel()
+    if knowledge_sync_task:
+        knowledge_sync_task.cancel()
+    if chatbot:
+        await chatbot.summarizer.aclose()
+    await get_llm_manager().aclose()
+    search_executor.shutdown(wait=False)
 
 # Create FastAPI app
 app = FastAPI(
@@ -94,26 +247,145 @@ class ChatResponse(BaseModel):
     confidence: float
     suggested_questions: List[str]
 
+class ChatBatchRequest(BaseModel):
+    messages: List[ChatMessage] = Field(..., min_length=1, max_length=BATCH_MAX_ITEMS)
+
+class ChatBatchItem(BaseModel):
+    index: int
+    result: Optional[ChatResponse] = None
+    error: Optional[str] = None
+
+class ChatBatchResponse(BaseModel):
+    results: List[ChatBatchItem]
+    total: int
+    errors: int
+
+class SearchBatchRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1, max_length=BATCH_MAX_ITEMS)
+    category: Optional[str] = None
+    top_k: int = Field(5, ge=1, le=SEARCH_MAX_TOP_K)
+    mode: Literal["dense", "lexical", "hybrid"] = SEARCH_MODE
+
 class HealthResponse(BaseModel):
     status: str
     timestamp: datetime
     knowledge_base_stats: Dict[str, Any]
 
+class KnowledgeItemRequest(BaseModel):
+    content: str = Field(..., min_length=1, description="Text that gets embedded and searched")
+    category: str = Field(..., min_length=1)
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+
+class KnowledgeItemUpdate(BaseModel):
+    content: Optional[str] = Field(None, min_length=1)
+    category: Optional[str] = Field(None, min_length=1)
+    metadata: Optional[Dict[str, Any]] = None
+
 # Dependency to get knowledge base
 def get_knowledge_base() -> PortfolioKnowledgeBase:
     if knowledge_base is None:
+        if service_status() == "warming":
+            raise HTTPException(status_code=503, detail="Knowledge base is warming up", headers={"Retry-After": "5"})
         raise HTTPException(status_code=500, detail="Knowledge base not initialized")
     return knowledge_base
 
+def get_chatbot(kb: PortfolioKnowledgeBase = Depends(get_knowledge_base)) -> "ChatbotEngine":
+    # The engine is created before the knowledge base is published, so this only guards against misuse
+    if chatbot is None:
+        raise HTTPException(status_code=503, detail="Chatbot is warming up", headers={"Retry-After": "5"})
+    return chatbot
+
+async def apply_knowledge_change(kb: PortfolioKnowledgeBase, func, *args, **kwargs):
+    """Run an /admin item change; with KNOWLEDGE_SYNC it is also written to the shared artifact"""
+    if KNOWLEDGE_SYNC:
+        return await run_blocking(kb.shared_update, functools.partial(func, *args, **kwargs), DEFAULT_ARTIFACT_DIR)
+    return await run_blocking(func, *args, **kwargs)
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
 class ChatbotEngine:
     """
     Enhanced conversational chatbot that combines semantic search with OpenAI GPT
     for natural, engaging responses about Hunter's portfolio
     """
     
-    def __init__(self, knowledge_base: PortfolioKnowledgeBase):
+    # Follow-up questions offered after each answer, by intent
+    SUGGESTED_QUESTIONS = {
+        "projects": [
+            "Tell me more about Anywear",
+            "What technologies does Hunter use?",
+            "What's Hunter's most recent project?"
+        ],
+        "skills": [
+            "What programming languages does Hunter know?",
+            "What frameworks has Hunter worked with?",
+            "Does Hunter have AI/ML experience?"
+        ],
+        "contact": [
+            "How can I connect with Hunter on LinkedIn?",
+            "Does Hunter have a GitHub profile?",
+            "What's the best way to reach Hunter?"
+        ],
+        "education": [
+            "What is Hunter studying?",
+            "What activities is Hunter involved in?",
+            "Tell me about Hunter's academic background"
+        ],
+        "personal": [
+            "What are Hunter's interests?",
+            "What projects is Hunter working on?",
+            "Tell me about Hunter's experience"
+        ],
+        "experience": [
+            "Tell me about Hunter's internship at Microsoft",
+            "What did Hunter do at Credo Semiconductor?",
+            "What has Hunter done in past roles?"
+        ],
+        "website": [
+            "What technologies power this website?",
+            "What features does this portfolio have?",
+            "How was this website built?"
+        ],
+        "general": [
+            "What projects has Hunter worked on?",
+            "What are Hunter's technical skills?",
+            "How can I contact Hunter?"
+        ]
+    }
+    
+    # Chips shown in the chatbot's welcome message (PortfolioChatbot.tsx) and after errors
+    STARTER_QUESTIONS = [
+        "What projects has Hunter worked on?",
+        "What are Hunter's technical skills?",
+        "How can I contact Hunter?",
+        "Tell me about Hunter's education",
+        "What are Hunter's skills?"
+    ]
+    
+    def __init__(self, knowledge_base: PortfolioKnowledgeBase, token_counter: Optional[TokenCounter] = None):
         self.kb = knowledge_base
-        self.conversation_history = {}
+        self.conversations = create_conversation_store()
+        self.summarizer = ConversationSummarizer(self.conversations, self._complete_for_summary)
+        self.intents = IntentClassifier()
+        self.response_cache = SemanticResponseCache()
+        self.suggested_answers = SuggestedAnswerCache(
+            questions=self.STARTER_QUESTIONS + [q for questions in self.SUGGESTED_QUESTIONS.values() for q in questions],
+            answer_fn=self._answer_for_warmup,
+            version_fn=lambda: self.kb.index_version
+        )
+        # Groq receives the enhanced system prompt, so that's the one counted against the budget
+        from local_llm import enhance_system_prompt
+        self.prompt_builder = PromptBuilder(
+            system_prompt=enhance_system_prompt(self._create_system_prompt()),
+            context_template="Here's what I know about Hunter that's relevant to this question:\n\n{context}\n\nUser's question: {message}\n\nPlease give a conversational, enthusiastic response using this information about Hunter.",
+            no_context_template="The user is asking: {message}\n\nI don't have specific information about this topic, but I can provide a helpful response directing them to what I do know about Hunter.",
+            counter=token_counter,
+            format_source=lambda result: result['content'].strip()
+        )
         
     def _get_context_from_search(self, search_results: List[Dict[str, Any]], max_context: int = 3) -> str:
         """Extract relevant context from search results for GPT"""
@@ -129,6 +401,10 @@ class ChatbotEngine:
         
         return "\n".join(context_parts) if context_parts else "Limited information available."
     
+    def _source_signature(self, search_results: List[Dict[str, Any]]) -> Tuple[int, ...]:
+        """IDs of the knowledge items the prompt builder offers to the LLM as context"""
+        return tuple(sorted(result['id'] for result in self.prompt_builder.select_sources(search_results)))
+    
     def _create_system_prompt(self) -> str:
         """Create the system prompt for the LLM to act as Hunter's portfolio assistant"""
         return """You are Hunter Broughton's enthusiastic AI assistant! You're here to help visitors learn about Hunter's impressive background, projects, and skills in a warm, conversational way.
@@ -160,33 +436,24 @@ RESPONSE FORMAT:
 
 Remember: You're not just providing information - you're having a friendly conversation about someone you admire and want to showcase!"""
 
-    def _generate_conversational_response(self, message: str, context: str, conversation_history: List[Dict] = None) -> str:
+    def _build_llm_messages(self, message: str, search_results: List[Dict[str, Any]], conversation_history: List[Dict] = None,
+                            summary: str = "") -> List[Dict[str, str]]:
+        """Build the message list sent to the LLM, packed into the prompt-token budget"""
+        messages, _ = self.prompt_builder.build(message, search_results, conversation_history, summary)
+        return messages
+
+    def _generate_conversational_response(self, message: str, search_results: List[Dict[str, Any]], conversation_history: List[Dict] = None,
+                                          summary: str = "", intent: Optional[str] = None) -> str:
         """Use Free LLM to generate a conversational response"""
         try:
-            # Build messages for the conversation
-            messages = [
-                {"role": "system", "content": self._create_system_prompt()}
-            ]
-            
-            # Add recent conversation history if available
-            if conversation_history:
-                messages.extend(conversation_history[-4:])  # Keep last 4 messages for context
-            
-            # Create a more natural context message
-            if context and context != "No specific information found." and context != "Limited information available.":
-                # Clean up the context to be more natural
-                clean_context = self._clean_context_for_conversation(context)
-                context_message = f"Here's what I know about Hunter that's relevant to this question:\n\n{clean_context}\n\nUser's question: {message}\n\nPlease give a conversational, enthusiastic response using this information about Hunter."
-            else:
-                context_message = f"The user is asking: {message}\n\nI don't have specific information about this topic, but I can provide a helpful response directing them to what I do know about Hunter."
-            
-            messages.append({"role": "user", "content": context_message})
+            messages = self._build_llm_messages(message, search_results, conversation_history, summary)
             
             # Get response from free LLM manager
-            response = llm_manager.chat_completion(
+            response = get_llm_manager().chat_completion(
                 messages=messages,
                 max_tokens=400,  # Increased for more detailed responses
-                temperature=0.8  # Slightly higher for more conversational tone
+                temperature=0.8,  # Slightly higher for more conversational tone
+                intent=intent
             )
             
             return response
@@ -194,7 +461,29 @@ Remember: You're not just providing information - you're having a friendly conve
         except Exception as e:
             logger.error(f"Free LLM API error: {e}")
             # Use smart fallback that actually uses the context
-            return self._generate_smart_fallback_response(message, context)
+            return self._generate_smart_fallback_response(message, self._get_context_from_search(search_results), intent)
+
+    async def _agenerate_conversational_response(self, message: str, search_results: List[Dict[str, Any]], conversation_history: List[Dict] = None,
+                                                 meta: Optional[Dict[str, Any]] = None, summary: str = "",
+                                                 intent: Optional[str] = None) -> str:
+        """Async variant of _generate_conversational_response"""
+        try:
+            messages = self._build_llm_messages(message, search_results, conversation_history, summary)
+            return await get_llm_manager().achat_completion(
+                messages=messages,
+                max_tokens=400,
+                temperature=0.8,
+                meta=meta,
+                intent=intent
+            )
+            
+        except Exception as e:
+            logger.error(f"Free LLM API error: {e}")
+            return self._generate_smart_fallback_response(message, self._get_context_from_search(search_results), intent)
+    
+    async def _complete_for_summary(self, messages: List[Dict[str, str]]) -> Optional[str]:
+        """LLM call for the rolling conversation summary (kept off the user-facing circuit breaker); None unless Groq answered"""
+        return await get_llm_manager().abackground_completion(messages=messages, max_tokens=250, temperature=0.2)
     
     def _clean_context_for_conversation(self, context: str) -> str:
         """Clean up the context to make it more natural for conversation"""
@@ -221,9 +510,9 @@ Remember: You're not just providing information - you're having a friendly conve
         # Simple template-based response as fallback
         return f"Based on what I know about Hunter:\n\n{context}\n\nWould you like to know more about any particular aspect?"
         
-    def _generate_smart_fallback_response(self, message: str, context: str) -> str:
+    def _generate_smart_fallback_response(self, message: str, context: str, intent: Optional[str] = None) -> str:
         """Generate a smart fallback response using the context from knowledge base"""
-        intent = self._detect_intent(message)
+        intent = intent or self._detect_intent(message)
         
         # If we have good context from the knowledge base, use it conversationally
         if context and context != "No specific information found." and context != "Limited information available.":
@@ -246,24 +535,9 @@ Remember: You're not just providing information - you're having a friendly conve
             # Fall back to the intent-based responses, but make them more conversational
             return self._get_conversational_fallback_response(intent)
 
-    def _detect_intent(self, message: str) -> str:
-        """Detect user intent from the message"""
-        message_lower = message.lower()
-        
-        if any(word in message_lower for word in ["project", "work", "built", "created", "developed"]):
-            return "projects"
-        elif any(word in message_lower for word in ["skill", "technology", "language", "framework", "tool"]):
-            return "skills"
-        elif any(word in message_lower for word in ["contact", "email", "reach", "connect"]):
-            return "contact"
-        elif any(word in message_lower for word in ["education", "school", "university", "study"]):
-            return "education"
-        elif any(word in message_lower for word in ["about", "who", "background", "bio"]):
-            return "personal"
-        elif any(word in message_lower for word in ["website", "portfolio", "site"]):
-            return "website"
-        else:
-            return "general"
+    def _detect_intent(self, message: str, query_embedding: Optional[np.ndarray] = None) -> str:
+        """Detect user intent from the message (and the search's query embedding, when there is one)"""
+        return self.intents.classify(message, query_embedding)
     
     def _generate_response(self, message: str, search_results: List[Dict[str, Any]], intent: str) -> str:
         """Generate a natural response based on search results and intent"""
@@ -347,140 +621,227 @@ Remember: You're not just providing information - you're having a friendly conve
 
     def _get_suggested_questions(self, intent: str) -> List[str]:
         """Generate suggested follow-up questions based on intent"""
-        suggestions = {
-            "projects": [
-                "Tell me more about Anywear",
-                "What technologies does Hunter use?",
-                "What's Hunter's most recent project?"
-            ],
-            "skills": [
-                "What programming languages does Hunter know?",
-                "What frameworks has Hunter worked with?",
-                "Does Hunter have AI/ML experience?"
-            ],
-            "contact": [
-                "How can I connect with Hunter on LinkedIn?",
-                "Does Hunter have a GitHub profile?",
-                "What's the best way to reach Hunter?"
-            ],
-            "education": [
-                "What is Hunter studying?",
-                "What activities is Hunter involved in?",
-                "Tell me about Hunter's academic background"
-            ],
-            "personal": [
-                "What are Hunter's interests?",
-                "What projects is Hunter working on?",
-                "Tell me about Hunter's experience"
-            ],
-            "website": [
-                "What technologies power this website?",
-                "What features does this portfolio have?",
-                "How was this website built?"
-            ],
-            "general": [
-                "What projects has Hunter worked on?",
-                "What are Hunter's technical skills?",
-                "How can I contact Hunter?"
-            ]
-        }
+        return self.SUGGESTED_QUESTIONS.get(intent, self.SUGGESTED_QUESTIONS["general"])
+
+    async def _answer_for_warmup(self, question: str) -> Optional[Tuple[List[Dict[str, Any]], str]]:
+        """Run retrieval + generation for a suggested question; None unless the LLM answered"""
+        search_results, query_embedding = await run_blocking(self.kb.retrieve, question, top_k=5, mode=SEARCH_MODE)
+        meta = {}
+        response = await self._agenerate_conversational_response(question, search_results, None, meta,
+                                                                 intent=self._detect_intent(question, query_embedding))
+        if meta.get("source") != "groq":
+            return None
+        return search_results, response
+
+    def _new_conversation_id(self) -> str:
+        # Timestamp prefix for readability, random suffix so concurrent visitors never share history
+        return f"conv_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+    def _complete_turn(self, message: str, conversation_id: str, search_results: List[Dict[str, Any]], response: str,
+                       intent: str) -> Dict[str, Any]:
+        """Score the answer, pick suggestions and store the exchange in the conversation history"""
+        # Calculate confidence based on search results
+        confidence = 0.9 if search_results and search_results[0]['similarity_score'] > 0.7 else 0.7 if search_results else 0.5
+        
+        suggested_questions = self._get_suggested_questions(intent)
         
-        return suggestions.get(intent, suggestions["general"])
+        # Store conversation history (the store trims and evicts to keep memory bounded)
+        self.conversations.append(conversation_id, [
+            {"role": "user", "content": message},
+            {"role": "assistant", "content": response}
+        ])
+        # Fold the previous exchange into the rolling summary once this answer is on its way
+        self.summarizer.schedule(conversation_id)
+        
+        return {
+            "response": response,
+            "sources": search_results,
+            "conversation_id": conversation_id,
+            "timestamp": datetime.now(),
+            "confidence": confidence,
+            "suggested_questions": suggested_questions,
+            "intent": intent
+        }
+    
+    def _error_result(self, conversation_id: Optional[str]) -> Dict[str, Any]:
+        return {
+            "response": "I'm sorry, I encountered an error while processing your question. Please try again or rephrase your question.",
+            "sources": [],
+            "conversation_id": conversation_id or "error",
+            "timestamp": datetime.now(),
+            "confidence": 0.0,
+            "suggested_questions": ["What projects has Hunter worked on?", "What are Hunter's skills?", "How can I contact Hunter?"],
+            "intent": "error"
+        }
 
     def chat(self, message: str, conversation_id: str = None) -> Dict[str, Any]:
         """Main chat function with conversational AI"""
         try:
             # Generate conversation ID if not provided
             if not conversation_id:
-                conversation_id = f"conv_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                conversation_id = self._new_conversation_id()
             
             # Search knowledge base for relevant information
-            search_results = self.kb.search(message, top_k=5)
+            search_results, query_embedding = self.kb.retrieve(message, top_k=5, mode=SEARCH_MODE)
+            intent = self._detect_intent(message, query_embedding)
             
-            # Get conversation history for this conversation
-            conversation_history = self.conversation_history.get(conversation_id, [])
-            
-            # Extract context from search results
-            context = self._get_context_from_search(search_results)
+            # Get the conversation summary and the messages it doesn't cover yet
+            summary, conversation_history = self.conversations.get_with_summary(conversation_id)
             
             # Generate conversational response using OpenAI
-            response = self._generate_conversational_response(message, context, conversation_history)
+            response = self._generate_conversational_response(message, search_results, conversation_history, summary, intent)
+            
+            return self._complete_turn(message, conversation_id, search_results, response, intent)
             
-            # Calculate confidence based on search results
-            confidence = 0.9 if search_results and search_results[0]['similarity_score'] > 0.7 else 0.7 if search_results else 0.5
+        except Exception as e:
+            logger.error(f"Error in chat function: {e}")
+            return self._error_result(conversation_id)
+
+    async def achat(self, message: str, conversation_id: str = None) -> Dict[str, Any]:
+        """
+        Async chat pipeline: encoding and FAISS search run on the search executor and
+        the LLM call is awaited, so the event loop keeps serving other requests
+        """
+        try:
+            if not conversation_id:
+                conversation_id = self._new_conversation_id()
+            return await self._achat_turn(message, conversation_id)
             
-            # Detect intent for suggested questions
-            intent = self._detect_intent(message)
-            suggested_questions = self._get_suggested_questions(intent)
+        except Exception as e:
+            logger.error(f"Error in chat function: {e}")
+            return self._error_result(conversation_id)
+
+    async def achat_batch(self, requests: List[Tuple[str, Optional[str]]],
+                          concurrency: int = CHAT_BATCH_CONCURRENCY) -> List[Dict[str, Any]]:
+        """
+        Answer many (message, conversation_id) pairs: retrieval for all of them runs as one
+        encoder pass and FAISS search, then up to `concurrency` LLM calls run at a time.
+        Returns one {"index", "result"} or {"index", "error"} per request, in order.
+        """
+        retrieved = await run_blocking(self.kb.retrieve_batch, [message for message, _ in requests], top_k=5, mode=SEARCH_MODE)
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def answer(index: int, message: str, conversation_id: Optional[str]) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    result = await self._achat_turn(message, conversation_id or self._new_conversation_id(), retrieved[index])
+                    return {"index": index, "result": result}
+                except Exception as e:
+                    logger.error(f"Error in batch chat item {index}: {e}")
+                    return {"index": index, "error": "Failed to answer this message"}
+        
+        return await asyncio.gather(*(answer(index, message, conversation_id)
+                                      for index, (message, conversation_id) in enumerate(requests)))
+
+    async def _achat_turn(self, message: str, conversation_id: str,
+                          retrieved: Optional[Tuple[List[Dict[str, Any]], Optional[np.ndarray]]] = None) -> Dict[str, Any]:
+        """One chat turn; retrieved is (search results, query embedding) when retrieval already ran"""
+        async with self.conversations.lock(conversation_id):
+            summary, conversation_history = self.conversations.get_with_summary(conversation_id)
+            first_turn = not (summary or conversation_history)
             
-            # Store conversation history (keep last 10 exchanges)
-            if conversation_id not in self.conversation_history:
-                self.conversation_history[conversation_id] = []
+            # Clicked suggestion chips are served straight from the warmed answers
+            warmed = self.suggested_answers.get(message, self.kb.index_version) if first_turn else None
+            if warmed is not None:
+                return self._complete_turn(message, conversation_id, warmed["sources"], warmed["response"],
+                                           self._detect_intent(message))
             
-            self.conversation_history[conversation_id].extend([
-                {"role": "user", "content": message},
-                {"role": "assistant", "content": response}
-            ])
+            if retrieved is None:
+                retrieved = await run_blocking(self.kb.retrieve, message, top_k=5, mode=SEARCH_MODE)
+            search_results, query_embedding = retrieved
+            intent = self._detect_intent(message, query_embedding)
+                
+            # Near-duplicate first questions are answered from the semantic cache
+            cacheable = first_turn and query_embedding is not None
+            source_ids = self._source_signature(search_results)
+            version = self.kb.index_version
+            response = self.response_cache.lookup(query_embedding, source_ids, version) if cacheable else None
             
-            # Keep only last 10 messages to prevent memory bloat
-            if len(self.conversation_history[conversation_id]) > 10:
-                self.conversation_history[conversation_id] = self.conversation_history[conversation_id][-10:]
+            if response is None:
+                meta = {}
+                response = await self._agenerate_conversational_response(message, search_results, conversation_history, meta, summary, intent)
+                if cacheable and meta.get("source") == "groq":
+                    self.response_cache.store(message, query_embedding, source_ids, version, response)
             
-            return {
-                "response": response,
-                "sources": search_results,
-                "conversation_id": conversation_id,
-                "timestamp": datetime.now(),
-                "confidence": confidence,
-                "suggested_questions": suggested_questions,
-                "intent": intent
-            }
+            return self._complete_turn(message, conversation_id, search_results, response, intent)
+
+    async def astream_chat(self, message: str, conversation_id: str = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming chat pipeline. Yields a "start" frame, one "token" frame per LLM delta and a
+        "final" frame carrying sources and suggested questions. The exchange is only written to
+        the conversation history once the stream completes.
+        """
+        if not conversation_id:
+            conversation_id = self._new_conversation_id()
+        
+        yield {"type": "start", "conversation_id": conversation_id}
+        
+        try:
+            async with self.conversations.lock(conversation_id):
+                summary, conversation_history = self.conversations.get_with_summary(conversation_id)
+                first_turn = not (summary or conversation_history)
+                warmed = self.suggested_answers.get(message, self.kb.index_version) if first_turn else None
+                
+                if warmed is not None:
+                    search_results, query_embedding = warmed["sources"], None
+                else:
+                    search_results, query_embedding = await run_blocking(self.kb.retrieve, message, top_k=5, mode=SEARCH_MODE)
+                intent = self._detect_intent(message, query_embedding)
+                
+                cacheable = first_turn and query_embedding is not None
+                source_ids = self._source_signature(search_results)
+                version = self.kb.index_version
+                response = warmed["response"] if warmed is not None else None
+                if response is None and cacheable:
+                    response = self.response_cache.lookup(query_embedding, source_ids, version)
+                
+                if response is not None:
+                    yield {"type": "token", "content": response}
+                else:
+                    messages = self._build_llm_messages(message, search_results, conversation_history, summary)
+                    meta = {}
+                    parts = []
+                    async for delta in get_llm_manager().astream_chat_completion(messages=messages, max_tokens=400, temperature=0.8,
+                                                                                 meta=meta, intent=intent):
+                        parts.append(delta)
+                        yield {"type": "token", "content": delta}
+                    
+                    response = "".join(parts).strip()
+                    if cacheable and meta.get("source") == "groq":
+                        self.response_cache.store(message, query_embedding, source_ids, version, response)
+                
+                result = self._complete_turn(message, conversation_id, search_results, response, intent)
             
         except Exception as e:
-            logger.error(f"Error in chat function: {e}")
-            return {
-                "response": "I'm sorry, I encountered an error while processing your question. Please try again or rephrase your question.",
-                "sources": [],
-                "conversation_id": conversation_id or "error",
-                "timestamp": datetime.now(),
-                "confidence": 0.0,
-                "suggested_questions": ["What projects has Hunter worked on?", "What are Hunter's skills?", "How can I contact Hunter?"],
-                "intent": "error"
-            }
-
-# Initialize chatbot engine
-chatbot: Optional[ChatbotEngine] = None
-
-@app.on_event("startup")
-async def startup_event():
-    global chatbot
-    if knowledge_base:
-        chatbot = ChatbotEngine(knowledge_base)
-        logger.info("Chatbot engine initialized")
+            logger.error(f"Error in streaming chat: {e}")
+            result = self._error_result(conversation_id)
+            yield {"type": "token", "content": result["response"]}
+        
+        yield {"type": "final", **result}
+
 
 # API Routes
 @app.get("/", response_model=HealthResponse)
-async def health_check(kb: PortfolioKnowledgeBase = Depends(get_knowledge_base)):
-    """Health check endpoint"""
-    return HealthResponse(
-        status="healthy",
+async def health_check():
+    """Health check endpoint ("warming" with a 503 until the knowledge base is ready)"""
+    status = service_status()
+    response = HealthResponse(
+        status=status,
         timestamp=datetime.now(),
-        knowledge_base_stats=kb.get_category_stats()
+        knowledge_base_stats=knowledge_base.get_category_stats() if knowledge_base else {}
     )
+    if status != "healthy":
+        return JSONResponse(status_code=503, content=jsonable_encoder(response))
+    return response
 
 @app.post("/chat", response_model=ChatResponse)
 async def chat_endpoint(
     request: ChatMessage,
-    kb: PortfolioKnowledgeBase = Depends(get_knowledge_base)
+    engine: ChatbotEngine = Depends(get_chatbot)
 ):
     """Main chat endpoint"""
-    global chatbot
-    
-    if not chatbot:
-        chatbot = ChatbotEngine(kb)
-    
     try:
-        result = chatbot.chat(request.message, request.conversation_id)
+        result = await engine.achat(request.message, request.conversation_id)
         
         return ChatResponse(
             response=result["response"],
@@ -495,6 +856,54 @@ async def chat_endpoint(
         logger.error(f"Chat endpoint error: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@app.post("/chat/batch", response_model=ChatBatchResponse)
+async def chat_batch_endpoint(
+    request: ChatBatchRequest,
+    engine: ChatbotEngine = Depends(get_chatbot)
+):
+    """Answer many messages in one request (offline evaluation, prefetching); errors are reported per item"""
+    try:
+        items = await engine.achat_batch([(item.message, item.conversation_id) for item in request.messages])
+    except Exception as e:
+        logger.error(f"Batch chat endpoint error: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+    
+    results = [
+        ChatBatchItem(index=item["index"], result=ChatResponse(**item["result"])) if "result" in item
+        else ChatBatchItem(index=item["index"], error=item["error"])
+        for item in items
+    ]
+    return ChatBatchResponse(results=results, total=len(results), errors=sum(item.error is not None for item in results))
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(
+    request: ChatMessage,
+    engine: ChatbotEngine = Depends(get_chatbot)
+):
+    """Streaming chat endpoint - newline-delimited JSON frames (start, token..., final)"""
+    async def frames():
+        async for frame in engine.astream_chat(request.message, request.conversation_id):
+            yield json.dumps(jsonable_encoder(frame)) + "\n"
+    
+    return StreamingResponse(
+        frames(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/stats")
+async def get_runtime_stats():
+    """Runtime statistics (live conversations, evictions, response cache, prompt tokens, summaries)"""
+    return {
+        "conversations": chatbot.conversations.stats() if chatbot else None,
+        "response_cache": chatbot.response_cache.stats() if chatbot else None,
+        "suggested_answers": chatbot.suggested_answers.stats() if chatbot else None,
+        "prompt": chatbot.prompt_builder.stats.stats() if chatbot else None,
+        "summaries": chatbot.summarizer.stats() if chatbot else None,
+        "intents": chatbot.intents.stats() if chatbot else None,
+        "llm": get_llm_manager().stats()
+    }
+
 @app.get("/knowledge/stats")
 async def get_knowledge_stats(kb: PortfolioKnowledgeBase = Depends(get_knowledge_base)):
     """Get knowledge base statistics"""
@@ -502,21 +911,27 @@ async def get_knowledge_stats(kb: PortfolioKnowledgeBase = Depends(get_knowledge
         "total_items": len(kb.knowledge_items),
         "categories": kb.get_category_stats(),
         "model_name": kb.model_name,
-        "is_trained": kb.is_trained
+        "encoder_backend": kb.encoder_backend,
+        "is_trained": kb.is_trained,
+        "index_version": kb.index_version,
+        "query_cache": kb.query_cache.stats(),
+        "micro_batching": kb.micro_batcher.stats() if kb.micro_batcher else None
     }
 
 @app.get("/knowledge/search")
 async def search_knowledge(
     query: str,
     category: Optional[str] = None,
-    top_k: int = 5,
+    top_k: int = Query(5, ge=1, le=SEARCH_MAX_TOP_K),
+    mode: Literal["dense", "lexical", "hybrid"] = SEARCH_MODE,
     kb: PortfolioKnowledgeBase = Depends(get_knowledge_base)
 ):
     """Direct knowledge base search endpoint"""
     try:
-        results = kb.search(query, top_k=top_k, category_filter=category)
+        results = await run_blocking(kb.search, query, top_k=top_k, category_filter=category, mode=mode)
         return {
             "query": query,
+            "mode": mode,
             "results": results,
             "total_results": len(results)
         }
@@ -524,7 +939,62 @@ async def search_knowledge(
         logger.error(f"Search endpoint error: {e}")
         raise HTTPException(status_code=500, detail="Search failed")
 
+@app.post("/knowledge/search/batch")
+async def search_knowledge_batch(
+    request: SearchBatchRequest,
+    kb: PortfolioKnowledgeBase = Depends(get_knowledge_base)
+):
+    """Search for many queries at once: one encoder pass and one FAISS search for the whole batch"""
+    try:
+        retrieved = await run_blocking(kb.retrieve_batch, request.queries, top_k=request.top_k,
+                                       category_filter=request.category, mode=request.mode)
+        return {
+            "mode": request.mode,
+            "results": [
+                {"query": query, "results": results, "total_results": len(results)}
+                for query, (results, _) in zip(request.queries, retrieved)
+            ],
+            "total_queries": len(request.queries)
+        }
+    except Exception as e:
+        logger.error(f"Batch search endpoint error: {e}")
+        raise HTTPException(status_code=500, detail="Search failed")
+
+# Admin routes: index changes are built off to the side and swapped in atomically,
+# so searches keep being served from the previous index until the new one is ready
+@app.post("/admin/reload", dependencies=[Depends(require_admin)])
+async def reload_knowledge(kb: PortfolioKnowledgeBase = Depends(get_knowledge_base)):
+    """Swap in the most recently compiled knowledge artifact without restarting"""
+    reloaded = await run_blocking(kb.reload_artifact, DEFAULT_ARTIFACT_DIR)
+    if not reloaded:
+        raise HTTPException(status_code=409, detail="No usable knowledge artifact to reload")
+    return {"reloaded": True, "index_version": kb.index_version, "total_items": len(kb.knowledge_items)}
+
+@app.post("/admin/knowledge", dependencies=[Depends(require_admin)])
+async def add_knowledge(items: List[KnowledgeItemRequest], kb: PortfolioKnowledgeBase = Depends(get_knowledge_base)):
+    """Add knowledge items (only the new items are encoded)"""
+    ids = await apply_knowledge_change(kb, kb.add_items, [(item.content, item.category, item.metadata) for item in items])
+    return {"ids": ids, "index_version": kb.index_version}
+
+@app.put("/admin/knowledge/{item_id}", dependencies=[Depends(require_admin)])
+async def update_knowledge(item_id: int, update: KnowledgeItemUpdate, kb: PortfolioKnowledgeBase = Depends(get_knowledge_base)):
+    """Update one knowledge item (re-encoded only if its content changed)"""
+    try:
+        item = await apply_knowledge_change(kb, kb.update_item, item_id, content=update.content,
+                                            category=update.category, metadata=update.metadata)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Knowledge item not found")
+    return {"id": item.item_id, "category": item.category, "index_version": kb.index_version}
+
+@app.delete("/admin/knowledge/{item_id}", dependencies=[Depends(require_admin)])
+async def delete_knowledge(item_id: int, kb: PortfolioKnowledgeBase = Depends(get_knowledge_base)):
+    """Delete one knowledge item"""
+    if not await apply_knowledge_change(kb, kb.delete_items, [item_id]):
+        raise HTTPException(status_code=404, detail="Knowledge item not found")
+    return {"deleted": item_id, "index_version": kb.index_version}
+
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
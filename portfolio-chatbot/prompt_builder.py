@@ -0,0 +1,206 @@
+"""
+Token-budgeted prompt assembly: the system prompt, the most relevant knowledge items and the
+recent conversation are packed into a fixed prompt-token budget
+"""
+import os
+import logging
+import threading
+from collections import deque
+from typing import List, Dict, Any, Optional, Tuple, Callable
+
+logger = logging.getLogger(__name__)
+
+# Prompt tokens per request (system + history + context + question); the completion is extra
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "1500"))
+# Share of the budget left after the system prompt and question that history may claim before sources
+PROMPT_HISTORY_SHARE = float(os.getenv("PROMPT_HISTORY_SHARE", "0.35"))
+PROMPT_MAX_HISTORY_MESSAGES = int(os.getenv("PROMPT_MAX_HISTORY_MESSAGES", "4"))
+PROMPT_MAX_SOURCES = int(os.getenv("PROMPT_MAX_SOURCES", "3"))
+PROMPT_MIN_SOURCE_SCORE = float(os.getenv("PROMPT_MIN_SOURCE_SCORE", "0.3"))
+# Pieces that would be cut below this many tokens are dropped instead
+PROMPT_MIN_PIECE_TOKENS = int(os.getenv("PROMPT_MIN_PIECE_TOKENS", "24"))
+# tiktoken encoding used to count tokens (Groq's Llama tokenizer differs, so counts are estimates)
+PROMPT_TOKEN_ENCODING = os.getenv("PROMPT_TOKEN_ENCODING", "cl100k_base")
+
+# Chat-format overhead per message (role markers, separators)
+_TOKENS_PER_MESSAGE = 4
+# Used when the tiktoken encoding can't be loaded (e.g. offline and not cached)
+_CHARS_PER_TOKEN = 4
+
+
+class TokenCounter:
+    """Counts and truncates text in tokens with tiktoken, or a characters-per-token estimate without it"""
+
+    def __init__(self, encoding_name: str = PROMPT_TOKEN_ENCODING):
+        self.encoding_name = encoding_name
+        try:
+            import tiktoken
+            self._encoding = tiktoken.get_encoding(encoding_name)
+        except Exception as e:
+            logger.warning(f"tiktoken encoding {encoding_name} unavailable ({e}); estimating {_CHARS_PER_TOKEN} characters per token")
+            self._encoding = None
+
+    @property
+    def exact(self) -> bool:
+        return self._encoding is not None
+
+    def count(self, text: str) -> int:
+        if self._encoding is None:
+            return -(-len(text) // _CHARS_PER_TOKEN)
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """The longest prefix of text within max_tokens, cut back to a word boundary and marked with an ellipsis"""
+        if max_tokens <= 1:
+            return ""
+        if self._encoding is None:
+            if len(text) <= max_tokens * _CHARS_PER_TOKEN:
+                return text
+            prefix = text[:(max_tokens - 1) * _CHARS_PER_TOKEN]
+        else:
+            tokens = self._encoding.encode(text, disallowed_special=())
+            if len(tokens) <= max_tokens:
+                return text
+            prefix = self._encoding.decode(tokens[:max_tokens - 1])  # one token left for the ellipsis
+        cut = prefix.rsplit(" ", 1)[0] if " " in prefix else prefix
+        return cut.rstrip(" ,;:") + "..."
+
+
+class PromptStats:
+    """Rolling prompt-token numbers for /stats, to tune the budget against time-to-first-token"""
+
+    def __init__(self, window: int = 500):
+        self._totals: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.sources_truncated = 0
+        self.sources_dropped = 0
+        self.history_dropped = 0
+        self.over_budget = 0
+
+    def record(self, report: Dict[str, Any]):
+        with self._lock:
+            self.requests += 1
+            self._totals.append(report["prompt_tokens"])
+            self.sources_truncated += report["sources_truncated"]
+            self.sources_dropped += report["sources_dropped"]
+            self.history_dropped += report["history_dropped"]
+            self.over_budget += report["prompt_tokens"] > report["budget"]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            totals = sorted(self._totals)
+        percentile = lambda p: totals[min(len(totals) - 1, int(len(totals) * p / 100))] if totals else None
+        return {
+            "requests": self.requests,
+            "mean_prompt_tokens": round(sum(totals) / len(totals), 1) if totals else None,
+            "p50_prompt_tokens": percentile(50),
+            "p95_prompt_tokens": percentile(95),
+            "max_prompt_tokens": totals[-1] if totals else None,
+            "sources_truncated": self.sources_truncated,
+            "sources_dropped": self.sources_dropped,
+            "history_dropped": self.history_dropped,
+            "over_budget": self.over_budget
+        }
+
+
+class PromptBuilder:
+    """
+    Builds the LLM message list within a prompt-token budget. Sources are taken in relevance
+    order and history newest first; each is truncated if only part of it fits, or dropped.
+    A conversation summary, if given, always goes in ahead of the question.
+    The (final) system prompt is tokenized once.
+    """
+
+    def __init__(self, system_prompt: str, context_template: str, no_context_template: str,
+                 budget: int = PROMPT_TOKEN_BUDGET, counter: Optional[TokenCounter] = None,
+                 format_source: Callable[[Dict[str, Any]], str] = lambda result: result["content"],
+                 summary_template: str = "Summary of the conversation so far:\n{summary}\n\n"):
+        self.counter = counter or TokenCounter()
+        self.system_prompt = system_prompt
+        self.system_tokens = self.counter.count(system_prompt) + _TOKENS_PER_MESSAGE
+        self.context_template = context_template
+        self.no_context_template = no_context_template
+        self.budget = budget
+        self.format_source = format_source
+        self.summary_template = summary_template
+        self.stats = PromptStats()
+
+    @staticmethod
+    def select_sources(search_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """The retrieved results that are offered to the prompt as context, in relevance order"""
+        return [
+            result for result in search_results[:PROMPT_MAX_SOURCES]
+            if result["similarity_score"] > PROMPT_MIN_SOURCE_SCORE
+        ]
+
+    def build(self, message: str, search_results: List[Dict[str, Any]],
+              conversation_history: Optional[List[Dict[str, str]]] = None,
+              summary: str = "") -> Tuple[List[Dict[str, str]], Dict[str, Any]]:
+        """Return (messages, token report) for one request"""
+        candidates = [self.format_source(result) for result in self.select_sources(search_results)]
+        history = list(conversation_history or [])[-PROMPT_MAX_HISTORY_MESSAGES:] if PROMPT_MAX_HISTORY_MESSAGES > 0 else []
+
+        summary_text = self.summary_template.format(summary=summary) if summary else ""
+        template = self.context_template if candidates else self.no_context_template
+        frame_tokens = self.counter.count(summary_text + template.format(context="", message=message)) + _TOKENS_PER_MESSAGE
+        available = max(0, self.budget - self.system_tokens - frame_tokens)
+
+        # History may claim its share first; sources get everything else, then history the remainder
+        history_tokens = sum(self.counter.count(turn["content"]) + _TOKENS_PER_MESSAGE for turn in history)
+        history_reserve = min(history_tokens, int(available * PROMPT_HISTORY_SHARE))
+        sources, sources_tokens, truncated = self._pack_sources(candidates, available - history_reserve)
+        kept_history, kept_history_tokens = self._pack_history(history, available - sources_tokens)
+
+        if candidates and not sources:
+            template = self.no_context_template
+        user_content = summary_text + template.format(context="\n".join(sources), message=message)
+        messages = [{"role": "system", "content": self.system_prompt}, *kept_history, {"role": "user", "content": user_content}]
+
+        report = {
+            "budget": self.budget,
+            "prompt_tokens": self.system_tokens + kept_history_tokens + self.counter.count(user_content) + _TOKENS_PER_MESSAGE,
+            "system_tokens": self.system_tokens,
+            "summary_tokens": self.counter.count(summary_text),
+            "history_tokens": kept_history_tokens,
+            "context_tokens": sources_tokens,
+            "sources_used": len(sources),
+            "sources_truncated": truncated,
+            "sources_dropped": len(candidates) - len(sources),
+            "history_used": len(kept_history),
+            "history_dropped": len(history) - len(kept_history),
+            "exact": self.counter.exact
+        }
+        self.stats.record(report)
+        logger.debug(f"Prompt tokens: {report}")
+        return messages, report
+
+    def _pack_sources(self, candidates: List[str], budget: int) -> Tuple[List[str], int, int]:
+        packed, used, truncated = [], 0, 0
+        for text in candidates:
+            remaining = budget - used
+            tokens = self.counter.count(text) + 1  # newline separator
+            if tokens > remaining:
+                if remaining - 1 < PROMPT_MIN_PIECE_TOKENS:
+                    continue  # a later, shorter source may still fit
+                text = self.counter.truncate(text, remaining - 1)
+                tokens = self.counter.count(text) + 1
+                truncated += 1
+            packed.append(text)
+            used += tokens
+        return packed, used, truncated
+
+    def _pack_history(self, history: List[Dict[str, str]], budget: int) -> Tuple[List[Dict[str, str]], int]:
+        kept, used = [], 0
+        for turn in reversed(history):
+            remaining = budget - used - _TOKENS_PER_MESSAGE
+            tokens = self.counter.count(turn["content"])
+            if tokens > remaining:
+                if remaining < PROMPT_MIN_PIECE_TOKENS:
+                    break  # older turns without the newer ones would read out of context
+                turn = {**turn, "content": self.counter.truncate(turn["content"], remaining)}
+                tokens = self.counter.count(turn["content"])
+            kept.append(turn)
+            used += tokens + _TOKENS_PER_MESSAGE
+        kept.reverse()
+        return kept, used
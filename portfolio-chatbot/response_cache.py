@@ -0,0 +1,137 @@
+"""
+Semantic response cache: reuse an LLM answer for near-duplicate questions
+"""
+import os
+import time
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Tuple, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+RESPONSE_CACHE_THRESHOLD = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.92"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "86400"))
+
+
+@dataclass
+class _CachedResponse:
+    question: str
+    source_ids: Tuple[int, ...]
+    response: str
+    created: float
+    last_used: float
+
+
+class SemanticResponseCache:
+    """
+    Caches answers keyed by the question's (L2-normalized) embedding. A lookup hits when a
+    cached question is within the cosine threshold and was answered from the same set of
+    knowledge items. Every entry is tied to the knowledge base's index_version, so
+    rebuilding the index drops the whole cache.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE,
+                 threshold: float = RESPONSE_CACHE_THRESHOLD,
+                 ttl_seconds: float = RESPONSE_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None  # (max_entries, dim), one row per slot
+        self._slots: List[Optional[_CachedResponse]] = [None] * max_entries
+        self._version: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def lookup(self, embedding: np.ndarray, source_ids: Tuple[int, ...], version: int) -> Optional[str]:
+        """Return a cached answer for a near-duplicate question, or None"""
+        if self.max_entries <= 0:
+            return None
+
+        with self._lock:
+            self._check_version(version)
+            if self._matrix is None:
+                self.misses += 1
+                return None
+
+            now = time.monotonic()
+            similarities = self._matrix @ embedding.reshape(-1)
+            for slot in np.argsort(-similarities):
+                if similarities[slot] < self.threshold:
+                    break
+                entry = self._slots[slot]
+                if entry is None or now - entry.created > self.ttl_seconds:
+                    continue
+                if entry.source_ids == source_ids:
+                    entry.last_used = now
+                    self.hits += 1
+                    logger.debug(f"Response cache hit ({similarities[slot]:.3f}) for: {entry.question[:50]}")
+                    return entry.response
+
+            self.misses += 1
+            return None
+
+    def store(self, question: str, embedding: np.ndarray, source_ids: Tuple[int, ...], version: int, response: str):
+        """Cache an answer, replacing the least recently used entry when full"""
+        if self.max_entries <= 0:
+            return
+
+        with self._lock:
+            self._check_version(version)
+            vector = embedding.reshape(-1)
+            if self._matrix is None:
+                self._matrix = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+
+            now = time.monotonic()
+            slot = self._free_slot(now)
+            self._matrix[slot] = vector
+            self._slots[slot] = _CachedResponse(
+                question=question,
+                source_ids=source_ids,
+                response=response,
+                created=now,
+                last_used=now
+            )
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": sum(1 for entry in self._slots if entry is not None),
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "invalidations": self.invalidations
+        }
+
+    def _check_version(self, version: int):
+        if version != self._version:
+            if self._version is not None:
+                self.invalidations += 1
+                logger.info("Knowledge base changed, clearing response cache")
+            self._reset()
+            self._version = version
+
+    def _reset(self):
+        self._matrix = None
+        self._slots = [None] * self.max_entries
+
+    def _free_slot(self, now: float) -> int:
+        oldest_slot, oldest_used = 0, None
+        for slot, entry in enumerate(self._slots):
+            if entry is None or now - entry.created > self.ttl_seconds:
+                return slot
+            if oldest_used is None or entry.last_used < oldest_used:
+                oldest_slot, oldest_used = slot, entry.last_used
+        return oldest_slot
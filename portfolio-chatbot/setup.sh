@@ -41,6 +41,14 @@ else
     echo "ℹ.env file already exists."
 fi
 
+# Export the ONNX encoder (used when ENCODER_BACKEND=onnx or onnx-int8)
+echo "Exporting ONNX encoder..."
+python encoders.py export || echo "ONNX export failed; the torch encoder backend still works."
+
+# Cache the tokenizer used to budget prompts (otherwise it's downloaded on first start)
+echo "Caching prompt tokenizer..."
+python -c "from prompt_builder import TokenCounter; TokenCounter()"
+
 # Initialize knowledge base
 echo "Initializing knowledge base..."
 python knowledge_base.py
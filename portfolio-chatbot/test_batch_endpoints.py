@@ -0,0 +1,103 @@
+"""
+Batch retrieval and the batch endpoints: retrieve_batch must answer every query exactly as
+retrieve would, and /chat/batch must report failures per item.
+
+    python -m pytest test_batch_endpoints.py
+"""
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+QUERIES = [
+    "What projects has Hunter built?",
+    "EECS 482",
+    "Does Hunter know Python and React?",
+    "How can I contact Hunter?",
+    "something completely unrelated to anything",
+]
+
+
+def _rows(results):
+    return [(result["id"], round(result["similarity_score"], 5)) for result in results]
+
+
+@pytest.mark.parametrize("mode", ["dense", "lexical", "hybrid"])
+@pytest.mark.parametrize("category", [None, "projects", "education"])
+def test_retrieve_batch_matches_retrieve(knowledge_base, mode, category):
+    batch = knowledge_base.retrieve_batch(QUERIES, top_k=4, category_filter=category, mode=mode)
+    assert len(batch) == len(QUERIES)
+    for query, (results, embedding) in zip(QUERIES, batch):
+        expected, expected_embedding = knowledge_base.retrieve(query, top_k=4, category_filter=category, mode=mode)
+        assert _rows(results) == _rows(expected), query
+        assert (embedding is None) == (expected_embedding is None), query
+        if category:
+            assert all(result["category"] == category for result in results)
+
+
+@pytest.mark.parametrize("top_k", [0, -1])
+def test_retrieve_batch_non_positive_top_k(knowledge_base, top_k):
+    assert knowledge_base.retrieve_batch(QUERIES, top_k=top_k, mode="dense") == [([], None)] * len(QUERIES)
+    assert knowledge_base.retrieve(QUERIES[0], top_k=top_k, mode="hybrid") == ([], None)
+
+
+@pytest.fixture
+def client(knowledge_base):
+    main.app.dependency_overrides[main.get_knowledge_base] = lambda: knowledge_base
+    yield TestClient(main.app)
+    main.app.dependency_overrides.clear()
+
+
+@pytest.mark.parametrize("top_k", [-1, 0, main.SEARCH_MAX_TOP_K + 1])
+def test_search_endpoints_reject_bad_top_k(client, top_k):
+    response = client.post("/knowledge/search/batch", json={"queries": ["python"], "top_k": top_k})
+    assert response.status_code == 422
+    response = client.get("/knowledge/search", params={"query": "python", "top_k": top_k})
+    assert response.status_code == 422
+
+
+def test_search_batch_endpoint(client):
+    response = client.post("/knowledge/search/batch", json={"queries": QUERIES[:3], "top_k": 2, "mode": "dense"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total_queries"] == 3
+    assert [len(entry["results"]) for entry in body["results"]] == [2, 2, 2]
+    assert client.post("/knowledge/search/batch", json={"queries": []}).status_code == 422
+
+
+def test_chat_batch_reports_errors_per_item(knowledge_base, monkeypatch):
+    engine = main.ChatbotEngine(knowledge_base)
+    answer_turn = engine._achat_turn
+
+    async def failing_turn(message, conversation_id, retrieved=None):
+        if message == "boom":
+            raise RuntimeError("LLM exploded")
+        return await answer_turn(message, conversation_id, retrieved)
+
+    monkeypatch.setattr(engine, "_achat_turn", failing_turn)
+    main.app.dependency_overrides[main.get_chatbot] = lambda: engine
+    try:
+        response = TestClient(main.app).post("/chat/batch", json={"messages": [
+            {"message": "What projects has Hunter built?"},
+            {"message": "boom"},
+            {"message": "How can I contact Hunter?", "conversation_id": "batch-test"},
+        ]})
+    finally:
+        main.app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["total"], body["errors"]) == (3, 1)
+    assert [item["index"] for item in body["results"]] == [0, 1, 2]
+    assert body["results"][1]["result"] is None and body["results"][1]["error"]
+    assert body["results"][0]["result"]["response"] and body["results"][0]["error"] is None
+    assert body["results"][2]["result"]["conversation_id"] == "batch-test"
+
+
+def test_achat_batch_matches_item_order(knowledge_base):
+    engine = main.ChatbotEngine(knowledge_base)
+    items = asyncio.run(engine.achat_batch([(query, None) for query in QUERIES[:3]]))
+    assert [item["index"] for item in items] == [0, 1, 2]
+    assert all("result" in item for item in items)
@@ -0,0 +1,81 @@
+"""
+Conversation stores: bounded history with rolling summaries, and the SQLite store shared by
+several worker processes losing no turns when they write to one conversation at once.
+
+    python -m pytest test_conversation_store.py
+"""
+import multiprocessing
+import threading
+
+import pytest
+
+from conversation_store import ConversationStore, SharedConversationStore
+
+TURNS_PER_WRITER = 25
+
+
+def _turn(writer: int, turn: int):
+    return [{"role": "user", "content": f"q{writer}-{turn}"}, {"role": "assistant", "content": f"a{writer}-{turn}"}]
+
+
+@pytest.fixture(params=["memory", "shared"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return ConversationStore(max_messages=4)
+    return SharedConversationStore(str(tmp_path / "conversations.db"), max_messages=4)
+
+
+def test_keeps_last_messages_and_summary(store):
+    for turn in range(3):
+        store.append("c", _turn(0, turn))
+    assert [message["content"] for message in store.get("c")] == ["q0-1", "a0-1", "q0-2", "a0-2"]
+
+    summary, fold, covers = store.pending_summary("c", keep_recent=2)
+    assert (summary, covers) == ("", 4) and [message["content"] for message in fold] == ["q0-1", "a0-1"]
+    assert store.set_summary("c", "talked about q0-0 and q0-1", covers)
+    assert not store.set_summary("c", "stale summary", covers)
+    assert store.get_with_summary("c") == ("talked about q0-0 and q0-1", _turn(0, 2))
+
+
+def test_session_cap_evicts_least_recently_used(tmp_path):
+    store = SharedConversationStore(str(tmp_path / "conversations.db"), max_sessions=2)
+    for conversation_id in ("a", "b", "c"):
+        store.append(conversation_id, _turn(0, 0))
+    assert store.get("a") == [] and store.get("c") == _turn(0, 0)
+    assert store.stats()["evictions"]["lru"] == 1
+
+
+def _append_turns(path: str, writer: int):
+    store = SharedConversationStore(path, max_messages=1000)
+    for turn in range(TURNS_PER_WRITER):
+        store.append("shared", _turn(writer, turn))
+
+
+def _assert_no_turn_lost(path: str, writers: int):
+    messages = SharedConversationStore(path, max_messages=1000).get("shared")
+    assert len(messages) == 2 * writers * TURNS_PER_WRITER
+    for writer in range(writers):
+        # Each writer's turns are kept whole and in order
+        contents = [message["content"] for message in messages if message["content"][1:].startswith(f"{writer}-")]
+        assert contents == [message["content"] for turn in range(TURNS_PER_WRITER) for message in _turn(writer, turn)]
+
+
+def test_concurrent_writers_on_separate_connections_lose_no_turns(tmp_path):
+    path = str(tmp_path / "conversations.db")
+    threads = [threading.Thread(target=_append_turns, args=(path, writer)) for writer in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    _assert_no_turn_lost(path, 4)
+
+
+def test_concurrent_worker_processes_lose_no_turns(tmp_path):
+    path = str(tmp_path / "conversations.db")
+    workers = [multiprocessing.get_context("spawn").Process(target=_append_turns, args=(path, writer)) for writer in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+    _assert_no_turn_lost(path, 3)
@@ -0,0 +1,65 @@
+"""
+Lexical (BM25) and hybrid retrieval next to the dense FAISS search.
+
+    python -m pytest test_hybrid_retrieval.py
+"""
+import os
+import sys
+import subprocess
+
+import pytest
+
+from lexical_index import BM25Index, tokenize
+
+
+def test_tokenize_keeps_technical_tokens_and_drops_stopwords():
+    assert tokenize("What does Hunter know about C++, C# and Next.js?") == ["know", "c++", "c#", "next.js"]
+
+
+def test_bm25_ranks_exact_token_match_first():
+    index = BM25Index(["Operating Systems (EECS 482)", "Distributed Systems (EECS 491)", "Guitar and golf"],
+                      doc_ids=[10, 20, 30])
+    hits = index.search("EECS 482", top_k=3)
+    assert hits[0][0] == 10
+    assert [doc_id for doc_id, _ in hits] == [10, 20]
+    assert index.search("482", top_k=3, allowed_ids={20, 30}) == []
+
+
+def test_lexical_mode_finds_course_code_without_encoder(knowledge_base):
+    results, embedding = knowledge_base.retrieve("EECS 482", top_k=3, mode="lexical")
+    assert embedding is None
+    assert "EECS 482" in results[0]["content"]
+    assert all(0.0 <= result["similarity_score"] < 1.0 for result in results)
+
+
+def test_dense_mode_returns_cosine_scores(knowledge_base):
+    results, embedding = knowledge_base.retrieve("What projects has Hunter built?", top_k=5, mode="dense")
+    assert embedding.shape == (1, 128)
+    assert len(results) == 5
+    scores = [result["similarity_score"] for result in results]
+    assert scores == sorted(scores, reverse=True)
+    assert all(-1.0 <= score <= 1.0 for score in scores)
+    assert all("lexical_score" not in result for result in results)
+
+
+def test_hybrid_mode_fuses_both_rankings(knowledge_base):
+    query = "Does Hunter know Python and React?"
+    dense_ids = {result["id"] for result in knowledge_base.search(query, top_k=5, mode="dense")}
+    lexical_ids = {result["id"] for result in knowledge_base.search(query, top_k=5, mode="lexical")}
+    results, embedding = knowledge_base.retrieve(query, top_k=5, mode="hybrid")
+    assert embedding is not None
+    assert {result["id"] for result in results} <= dense_ids | lexical_ids
+    assert all("lexical_score" in result for result in results)
+
+
+def test_unknown_mode_is_rejected(knowledge_base):
+    with pytest.raises(ValueError):
+        knowledge_base.search("python", mode="fuzzy")
+
+
+def test_chat_defaults_to_dense_retrieval():
+    env = {name: value for name, value in os.environ.items() if name != "SEARCH_MODE"}
+    result = subprocess.run([sys.executable, "-c", "import main; print(main.SEARCH_MODE)"],
+                            cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "dense"
@@ -0,0 +1,59 @@
+"""
+Import-time regression test: `import main` must stay cheap and must not load heavy dependencies.
+
+    python -m pytest test_import_time.py     (or: python test_import_time.py)
+"""
+import os
+import re
+import sys
+import subprocess
+from typing import Dict
+
+# Total cumulative import time of `main`, in milliseconds
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "1500"))
+
+# Must only be loaded on first use, never by importing the service
+HEAVY_MODULES = ("torch", "sentence_transformers", "transformers", "onnxruntime", "faiss", "sklearn", "local_llm")
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def measure_imports(module: str = "main") -> Dict[str, int]:
+    """Import `module` in a fresh interpreter; map every module it loaded to its cumulative import time (us)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True
+    )
+    timings = {}
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            timings[match.group(4)] = int(match.group(2))
+    return timings
+
+
+def test_import_main_within_budget():
+    timings = measure_imports("main")
+    total_ms = timings["main"] / 1000.0
+    slowest = sorted(timings.items(), key=lambda item: item[1], reverse=True)[:10]
+    assert total_ms <= IMPORT_TIME_BUDGET_MS, (
+        f"import main took {total_ms:.0f} ms (budget {IMPORT_TIME_BUDGET_MS:.0f} ms); slowest: "
+        + ", ".join(f"{name} {us / 1000:.0f} ms" for name, us in slowest)
+    )
+
+
+def test_import_main_skips_heavy_dependencies():
+    loaded = set(measure_imports("main"))
+    eager = [name for name in HEAVY_MODULES if name in loaded or any(mod.startswith(f"{name}.") for mod in loaded)]
+    assert not eager, f"import main eagerly imported: {', '.join(eager)}"
+
+
+if __name__ == "__main__":
+    timings = measure_imports("main")
+    print(f"import main: {timings['main'] / 1000:.0f} ms (budget {IMPORT_TIME_BUDGET_MS:.0f} ms)")
+    for name, us in sorted(timings.items(), key=lambda item: item[1], reverse=True)[1:11]:
+        print(f"  {name:<40} {us / 1000:>7.1f} ms")
+    test_import_main_within_budget()
+    test_import_main_skips_heavy_dependencies()
+    print("OK")
@@ -0,0 +1,75 @@
+"""
+Intent detection: keyword priority and word-start matching, and nearest-centroid
+classification of the query embedding in the embedding and hybrid modes.
+
+    python -m pytest test_intents.py
+"""
+import numpy as np
+import pytest
+
+from conftest import HashingEncoder
+from intents import IntentClassifier, classify_intent
+
+ENCODER = HashingEncoder()
+
+
+def _encode(texts) -> np.ndarray:
+    embeddings = ENCODER.encode(texts)
+    return embeddings / np.linalg.norm(embeddings, axis=-1, keepdims=True)
+
+
+def _classifier(mode: str, min_similarity: float = 0.3) -> IntentClassifier:
+    classifier = IntentClassifier(mode=mode, min_similarity=min_similarity)
+    classifier.build_centroids(_encode)
+    return classifier
+
+
+@pytest.mark.parametrize("message, intent", [
+    ("What projects has Hunter built?", "projects"),
+    ("What is Hunter studying?", "education"),
+    ("How do I email him?", "contact"),
+    ("Which frameworks does he use?", "skills"),  # not the "work" inside "frameworks"
+    ("Which Python project was hardest?", "projects"),  # projects outranks skills
+    ("Tell me about his GitHub", "contact"),  # contact outranks personal
+    ("Good morning!", "general"),
+])
+def test_classify_intent(message, intent):
+    assert classify_intent(message) == intent
+
+
+def test_unknown_mode_raises():
+    with pytest.raises(ValueError):
+        IntentClassifier(mode="regex")
+
+
+def test_keyword_mode_ignores_embeddings():
+    classifier = _classifier("keyword")
+    message = "Where does Hunter go to college?"
+    assert classifier.classify(message, _encode(message)) == "general"
+    assert classifier.stats()["centroids"] == 0
+
+
+def test_hybrid_uses_centroids_only_when_no_keyword_matches():
+    classifier = _classifier("hybrid")
+    message = "Where does Hunter go to college?"
+    assert classify_intent(message) == "general"
+    assert classifier.classify(message, _encode(message)) == "education"
+    assert classifier.classify("Which Python project?", _encode("Which Python project?")) == "projects"
+    assert classifier.stats()["classified_by"] == {"keyword": 1, "embedding": 1}
+
+
+def test_embedding_mode_prefers_nearest_centroid_over_keywords():
+    classifier = _classifier("embedding")
+    message = "How was this website built?"
+    assert classify_intent(message) == "projects"
+    assert classifier.classify(message, _encode(message)) == "website"
+
+
+def test_low_similarity_or_missing_embedding_falls_back_to_keywords():
+    classifier = _classifier("embedding", min_similarity=0.99)
+    message = "What projects has Hunter built?"
+    assert classifier.classify(message, _encode(message)) == "projects"
+    assert classifier.classify(message) == "projects"
+    # An embedding from a different encoder (other dimension) is ignored
+    assert classifier.classify("Where does Hunter go to college?", np.ones((1, 8), dtype=np.float32)) == "general"
+    assert classifier.stats()["classified_by"] == {"keyword": 3, "embedding": 0}
@@ -0,0 +1,128 @@
+"""
+Live knowledge updates and the compiled artifact: item changes are swapped in as a new index
+snapshot without re-encoding unchanged items, and a damaged artifact is rebuilt rather than
+crashing startup.
+
+    python -m pytest test_live_updates.py
+"""
+import json
+import os
+
+import numpy as np
+import pytest
+
+from conftest import make_knowledge_base
+from knowledge_base import MANIFEST_FILENAME
+
+ITEMS = [
+    ("Hunter built ThriftSwipe, a swipe-based thrift marketplace", "projects"),
+    ("Hunter built GreekLink, a platform for Greek life organizations", "projects"),
+    ("Hunter knows Python, TypeScript and React", "skills"),
+    ("Hunter studies Computer Science at the University of Michigan", "education"),
+]
+
+
+def _ids(results):
+    return [result["id"] for result in results]
+
+
+def test_add_update_delete_swap_in_new_snapshots():
+    kb = make_knowledge_base(ITEMS)
+    version = kb.index_version
+
+    [new_id] = kb.add_items([("Hunter plays guitar and golf", "personal")])
+    assert kb.index_version > version
+    assert kb.search("guitar golf", top_k=1)[0]["id"] == new_id
+
+    kb.update_item(new_id, content="Hunter goes backpacking in Washington")
+    assert kb.search("backpacking Washington", top_k=1)[0]["id"] == new_id
+
+    assert kb.delete_items([new_id, 9999]) == 1
+    assert new_id not in _ids(kb.search("backpacking Washington", top_k=5))
+    assert len(kb.knowledge_items) == len(ITEMS)
+
+
+def test_category_only_update_keeps_vector():
+    kb = make_knowledge_base(ITEMS)
+    item_id = kb.knowledge_items[2].item_id
+    before = kb._item_vectors([kb.knowledge_items[2]])[0]
+    calls = []
+    encode = kb.encoder.encode
+    kb.encoder.encode = lambda *args, **kwargs: calls.append(args) or encode(*args, **kwargs)
+
+    kb.update_item(item_id, category="languages")
+    assert calls == []
+    assert np.allclose(kb._item_vectors([kb.knowledge_items[2]])[0], before)
+    assert _ids(kb.search("Python TypeScript React", top_k=1, category_filter="languages")) == [item_id]
+
+
+def test_searches_on_a_pinned_snapshot_are_unaffected_by_updates():
+    kb = make_knowledge_base(ITEMS)
+    snapshot = kb.snapshot
+    query = kb.encode_query("ThriftSwipe marketplace")
+    before = kb.faiss_search(query, 2, snapshot=snapshot)
+
+    kb.delete_items([kb.knowledge_items[0].item_id])
+    after = kb.faiss_search(query, 2, snapshot=snapshot)
+    assert np.array_equal(before[1], after[1])
+    assert kb.snapshot is not snapshot
+
+
+def test_compiled_artifact_round_trip(tmp_path):
+    kb = make_knowledge_base(ITEMS)
+    assert kb.compile_artifact(str(tmp_path))["encoded"] == 0  # already encoded by build_index
+
+    restored = make_knowledge_base([])
+    assert restored.load_artifact(str(tmp_path))
+    assert [item.content for item in restored.knowledge_items] == [content for content, _ in ITEMS]
+    assert _ids(restored.search("GreekLink", top_k=1)) == _ids(kb.search("GreekLink", top_k=1))
+
+
+def test_artifact_with_other_content_is_not_loaded(tmp_path):
+    make_knowledge_base(ITEMS).compile_artifact(str(tmp_path))
+    edited = make_knowledge_base([(content + " (edited)", category) for content, category in ITEMS])
+    assert not edited.load_artifact(str(tmp_path))
+
+
+def test_reload_artifact_replaces_items(tmp_path):
+    make_knowledge_base(ITEMS[:2]).compile_artifact(str(tmp_path))
+    kb = make_knowledge_base(ITEMS)
+    assert kb.reload_artifact(str(tmp_path))
+    assert len(kb.knowledge_items) == 2
+
+
+def _truncate_embeddings(directory, manifest):
+    path = os.path.join(directory, manifest["embeddings_file"])
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) // 2)
+
+
+def _drop_embeddings(directory, manifest):
+    os.remove(os.path.join(directory, manifest["embeddings_file"]))
+
+
+def _partial_manifest(directory, manifest):
+    del manifest["content_hash"], manifest["embeddings_file"]
+    with open(os.path.join(directory, MANIFEST_FILENAME), "w") as f:
+        json.dump(manifest, f)
+
+
+def _garbled_manifest(directory, manifest):
+    with open(os.path.join(directory, MANIFEST_FILENAME), "w") as f:
+        f.write('{"format_version": ')
+
+
+@pytest.mark.parametrize("damage", [_truncate_embeddings, _drop_embeddings, _partial_manifest, _garbled_manifest])
+def test_damaged_artifact_is_rebuilt(tmp_path, damage):
+    directory = str(tmp_path)
+    make_knowledge_base(ITEMS).compile_artifact(directory)
+    with open(os.path.join(directory, MANIFEST_FILENAME)) as f:
+        damage(directory, json.load(f))
+
+    kb = make_knowledge_base(ITEMS)
+    assert not kb.load_artifact(directory)
+    assert not kb.reload_artifact(directory)
+
+    kb = make_knowledge_base(ITEMS)
+    kb.load_or_build_artifact(directory)
+    assert make_knowledge_base(ITEMS).load_artifact(directory, expected_hash=kb.content_hash())
@@ -0,0 +1,75 @@
+"""
+Semantic response cache: near-duplicate questions answered from the same knowledge items
+reuse the cached answer; anything else misses.
+
+    python -m pytest test_response_cache.py
+"""
+import numpy as np
+
+from response_cache import SemanticResponseCache
+
+
+def _unit(*values) -> np.ndarray:
+    vector = np.array(values, dtype=np.float32)
+    return (vector / np.linalg.norm(vector)).reshape(1, -1)
+
+
+def test_near_duplicate_with_same_sources_hits():
+    cache = SemanticResponseCache(max_entries=4, threshold=0.9)
+    cache.store("What projects has Hunter built?", _unit(1, 0, 0), (1, 2), 1, "ThriftSwipe and GreekLink")
+    assert cache.lookup(_unit(1, 0.1, 0), (1, 2), 1) == "ThriftSwipe and GreekLink"
+    assert cache.stats()["hits"] == 1
+
+
+def test_different_sources_or_distant_question_miss():
+    cache = SemanticResponseCache(max_entries=4, threshold=0.9)
+    cache.store("What projects has Hunter built?", _unit(1, 0, 0), (1, 2), 1, "answer")
+    assert cache.lookup(_unit(1, 0.1, 0), (1, 3), 1) is None
+    assert cache.lookup(_unit(0, 1, 0), (1, 2), 1) is None
+    assert cache.stats()["misses"] == 2
+
+
+def test_index_version_change_clears_cache():
+    cache = SemanticResponseCache(max_entries=4, threshold=0.9)
+    cache.store("question", _unit(1, 0, 0), (1,), 1, "answer")
+    assert cache.lookup(_unit(1, 0, 0), (1,), 2) is None
+    assert cache.stats()["invalidations"] == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_expired_entries_miss():
+    cache = SemanticResponseCache(max_entries=4, threshold=0.9, ttl_seconds=0)
+    cache.store("question", _unit(1, 0, 0), (1,), 1, "answer")
+    assert cache.lookup(_unit(1, 0, 0), (1,), 1) is None
+
+
+def test_full_cache_evicts_least_recently_used():
+    cache = SemanticResponseCache(max_entries=2, threshold=0.99)
+    cache.store("a", _unit(1, 0, 0), (1,), 1, "answer a")
+    cache.store("b", _unit(0, 1, 0), (1,), 1, "answer b")
+    assert cache.lookup(_unit(1, 0, 0), (1,), 1) == "answer a"  # b is now least recently used
+    cache.store("c", _unit(0, 0, 1), (1,), 1, "answer c")
+    assert cache.lookup(_unit(0, 1, 0), (1,), 1) is None
+    assert cache.lookup(_unit(1, 0, 0), (1,), 1) == "answer a"
+    assert cache.lookup(_unit(0, 0, 1), (1,), 1) == "answer c"
+
+
+def test_disabled_cache_never_stores():
+    cache = SemanticResponseCache(max_entries=0)
+    cache.store("question", _unit(1, 0, 0), (1,), 1, "answer")
+    assert cache.lookup(_unit(1, 0, 0), (1,), 1) is None
+
+
+def test_source_signature_follows_prompt_source_settings(knowledge_base, monkeypatch):
+    import main
+    import prompt_builder
+
+    engine = main.ChatbotEngine(knowledge_base)
+    results = [{"id": item_id, "similarity_score": score} for item_id, score in [(7, 0.9), (3, 0.5), (5, 0.35), (1, 0.2)]]
+    assert engine._source_signature(results) == (3, 5, 7)
+
+    monkeypatch.setattr(prompt_builder, "PROMPT_MAX_SOURCES", 2)
+    assert engine._source_signature(results) == (3, 7)
+    monkeypatch.setattr(prompt_builder, "PROMPT_MIN_SOURCE_SCORE", 0.1)
+    monkeypatch.setattr(prompt_builder, "PROMPT_MAX_SOURCES", 4)
+    assert engine._source_signature(results) == (1, 3, 5, 7)
@@ -0,0 +1,55 @@
+"""
+Index backends: IVF nprobe is calibrated against exact search so the recall target holds.
+
+    python -m pytest test_vector_index.py
+"""
+import faiss
+import numpy as np
+import pytest
+
+from vector_index import IndexSpec, build_faiss_index, choose_index_spec, search_parameters
+
+
+def _clustered(count: int, rng: np.random.Generator, dimension: int = 32) -> np.ndarray:
+    centers = rng.standard_normal((50, dimension)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), count)] + 0.5 * rng.standard_normal((count, dimension), dtype=np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def _recall(index, spec, queries, corpus, k=10) -> float:
+    _, truth = faiss.knn(queries, corpus, k, metric=faiss.METRIC_INNER_PRODUCT)
+    _, found = index.search(queries, k, params=search_parameters(spec))
+    return sum(len(set(a) & set(b)) for a, b in zip(found, truth)) / truth.size
+
+
+@pytest.mark.parametrize("target_recall", [0.8, 0.95])
+def test_calibrated_nprobe_meets_target_on_unseen_queries(target_recall):
+    vectors = _clustered(20300, np.random.default_rng(1))
+    corpus, queries = vectors[:20000], vectors[20000:]
+    spec = choose_index_spec(len(corpus), corpus.shape[1], kind="ivf", target_recall=target_recall)
+    assert "nprobe" not in spec.params
+
+    index = build_faiss_index(spec, corpus, np.arange(len(corpus), dtype=np.int64))
+    assert 1 <= spec.params["nprobe"] < spec.params["nlist"]
+    assert spec.params["calibrated_recall"] >= target_recall
+    # Fresh queries from the same distribution, scored against exact search
+    assert _recall(index, spec, queries, corpus) >= target_recall - 0.03
+
+
+def test_higher_target_probes_more_lists():
+    corpus = _clustered(20000, np.random.default_rng(2))
+    ids = np.arange(len(corpus), dtype=np.int64)
+    nprobes = []
+    for target_recall in (0.7, 0.99):
+        spec = choose_index_spec(len(corpus), corpus.shape[1], kind="ivf", target_recall=target_recall)
+        build_faiss_index(spec, corpus, ids)
+        nprobes.append(spec.params["nprobe"])
+    assert nprobes[0] < nprobes[1]
+
+
+def test_saved_nprobe_is_reused():
+    corpus = _clustered(5000, np.random.default_rng(3))
+    spec = IndexSpec.from_dict({"kind": "ivf", "params": {"nlist": 64, "nprobe": 7}})
+    index = build_faiss_index(spec, corpus, np.arange(len(corpus), dtype=np.int64))
+    assert index.nprobe == 7 and spec.params == {"nlist": 64, "nprobe": 7}
@@ -0,0 +1,264 @@
+"""
+FAISS index backends (Flat, HNSW, IVF, IVF-PQ) and automatic backend selection
+"""
+from __future__ import annotations
+
+import os
+import math
+import logging
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from lazy_imports import lazy_import
+
+faiss = lazy_import("faiss")
+
+logger = logging.getLogger(__name__)
+
+INDEX_KINDS = ("flat", "hnsw", "ivf", "ivfpq")
+STORAGE_TYPES = ("float32", "float16", "int8")
+
+# How Flat/HNSW/IVF indexes store vectors; float16 halves and int8 quarters memory per item
+# (IVF-PQ always stores compressed product-quantization codes)
+EMBEDDING_STORAGE = os.getenv("EMBEDDING_STORAGE", "float32")
+
+# "auto" picks a backend from the corpus size and the targets below
+INDEX_TYPE = os.getenv("INDEX_TYPE", "auto")
+INDEX_TARGET_RECALL = float(os.getenv("INDEX_TARGET_RECALL", "0.95"))
+# An exact scan is used while it is expected to stay under this per-query latency
+INDEX_TARGET_LATENCY_MS = float(os.getenv("INDEX_TARGET_LATENCY_MS", "5"))
+# Above this much raw float32 vector data, compress with product quantization instead of HNSW
+INDEX_MAX_MEMORY_MB = float(os.getenv("INDEX_MAX_MEMORY_MB", "1024"))
+# Approximate backends search category partitions up to this size exactly
+INDEX_EXACT_FILTER_MAX = int(os.getenv("INDEX_EXACT_FILTER_MAX", "10000"))
+# IVF nprobe is calibrated at build time on this many held-out corpus vectors, for recall@k
+INDEX_CALIBRATION_QUERIES = int(os.getenv("INDEX_CALIBRATION_QUERIES", "200"))
+INDEX_CALIBRATION_K = int(os.getenv("INDEX_CALIBRATION_K", "10"))
+
+# Rough single-core inner-product throughput used to estimate exact-scan latency
+_FLAT_SCAN_FLOPS = 4e9
+
+_BYTES_PER_VALUE = {"float32": 4, "float16": 2, "int8": 1}
+_SCALAR_QUANTIZER_NAMES = {"float16": "QT_fp16", "int8": "QT_8bit"}
+
+
+@dataclass
+class IndexSpec:
+    """Backend choice plus its build/search parameters; persisted in the artifact manifest"""
+    kind: str = "flat"
+    params: Dict[str, Any] = field(default_factory=dict)
+    storage: str = "float32"
+
+    @property
+    def exact(self) -> bool:
+        """Exhaustive search (vectors may still be stored at reduced precision)"""
+        return self.kind == "flat"
+
+    @property
+    def lossless(self) -> bool:
+        """Vectors decoded from the index equal the vectors that were added"""
+        return self.kind != "ivfpq" and self.storage == "float32"
+
+    @property
+    def supports_removal(self) -> bool:
+        # HNSW graphs can't drop vectors; changes to an HNSW index rebuild it
+        return self.kind != "hnsw"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "IndexSpec":
+        if data.get("kind") not in INDEX_KINDS:
+            raise ValueError(f"Unknown index kind: {data.get('kind')}")
+        if data.get("storage", "float32") not in STORAGE_TYPES:
+            raise ValueError(f"Unknown embedding storage: {data.get('storage')}")
+        return cls(kind=data["kind"], params=dict(data.get("params", {})), storage=data.get("storage", "float32"))
+
+
+def choose_index_spec(count: int, dimension: int, kind: str = INDEX_TYPE,
+                      target_recall: float = INDEX_TARGET_RECALL,
+                      target_latency_ms: float = INDEX_TARGET_LATENCY_MS,
+                      max_memory_mb: float = INDEX_MAX_MEMORY_MB,
+                      storage: str = EMBEDDING_STORAGE) -> IndexSpec:
+    """Pick Flat, HNSW or IVF(-PQ) for a corpus and fill in parameters for the recall target"""
+    if storage not in STORAGE_TYPES:
+        raise ValueError(f"Unknown embedding storage: {storage}")
+    if kind == "auto":
+        flat_cost_ms = count * dimension / _FLAT_SCAN_FLOPS * 1000.0
+        memory_mb = count * dimension * _BYTES_PER_VALUE[storage] / (1024 * 1024)
+        if flat_cost_ms <= target_latency_ms:
+            kind = "flat"
+        elif memory_mb <= max_memory_mb:
+            kind = "hnsw"
+        else:
+            kind = "ivfpq"
+    if kind not in INDEX_KINDS:
+        raise ValueError(f"Unknown index kind: {kind}")
+
+    if kind == "flat":
+        return IndexSpec("flat", storage=storage)
+
+    if kind == "hnsw":
+        ef_search = 32 if target_recall < 0.9 else 64 if target_recall < 0.97 else 128
+        return IndexSpec("hnsw", {"M": 32, "ef_construction": 80, "ef_search": ef_search}, storage=storage)
+
+    # IVF: ~4 * sqrt(n) lists; nprobe is left to calibrate_nprobe once the index is built
+    nlist = max(1, min(int(4 * math.sqrt(count)), count // 39 or 1))
+    params = {"nlist": nlist, "target_recall": target_recall}
+    if kind == "ivfpq":
+        # 4 dimensions per sub-quantizer at 8 bits; fewer bytes per vector trade off recall.
+        # Each sub-quantizer trains 2^nbits centroids, so tiny corpora get fewer bits.
+        params.update({
+            "pq_m": _pq_subquantizers(dimension, 4 if target_recall >= 0.9 else 8),
+            "pq_nbits": min(8, max(1, int(math.log2(max(count, 2)))))
+        })
+        storage = "float32"  # PQ codes replace the stored vectors
+    return IndexSpec(kind, params, storage=storage)
+
+
+def _pq_subquantizers(dimension: int, dims_per_subquantizer: int) -> int:
+    m = max(1, dimension // dims_per_subquantizer)
+    while dimension % m:
+        m -= 1
+    return m
+
+
+def build_faiss_index(spec: IndexSpec, embeddings: np.ndarray, ids: np.ndarray) -> faiss.Index:
+    """Build (and train, for IVF and int8) an inner-product index over normalized vectors keyed by ids"""
+    dimension = embeddings.shape[1]
+    quantizer_name = _SCALAR_QUANTIZER_NAMES.get(spec.storage)
+    quantizer_type = getattr(faiss.ScalarQuantizer, quantizer_name) if quantizer_name else None
+    if spec.kind == "flat":
+        if quantizer_type is None:
+            flat = faiss.IndexFlatIP(dimension)
+        else:
+            flat = faiss.IndexScalarQuantizer(dimension, quantizer_type, faiss.METRIC_INNER_PRODUCT)
+            flat.train(embeddings)
+        index = faiss.IndexIDMap2(flat)
+    elif spec.kind == "hnsw":
+        if quantizer_type is None:
+            hnsw = faiss.IndexHNSWFlat(dimension, spec.params["M"], faiss.METRIC_INNER_PRODUCT)
+        else:
+            hnsw = faiss.IndexHNSWSQ(dimension, quantizer_type, spec.params["M"], faiss.METRIC_INNER_PRODUCT)
+            hnsw.train(embeddings)
+        hnsw.hnsw.efConstruction = spec.params["ef_construction"]
+        hnsw.hnsw.efSearch = spec.params["ef_search"]
+        index = faiss.IndexIDMap2(hnsw)
+    else:
+        # IVF indexes store ids in their inverted lists, so they need no ID map
+        quantizer = faiss.IndexFlatIP(dimension)
+        nlist = min(spec.params["nlist"], max(1, len(embeddings)))
+        if spec.kind == "ivfpq":
+            index = faiss.IndexIVFPQ(quantizer, dimension, nlist, spec.params["pq_m"],
+                                     spec.params["pq_nbits"], faiss.METRIC_INNER_PRODUCT)
+        elif quantizer_type is None:
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist, faiss.METRIC_INNER_PRODUCT)
+        else:
+            index = faiss.IndexIVFScalarQuantizer(quantizer, dimension, nlist, quantizer_type, faiss.METRIC_INNER_PRODUCT)
+        index.train(embeddings)
+        # Lets reconstruct() look vectors up by id (and still supports remove_ids)
+        index.set_direct_map_type(faiss.DirectMap.Hashtable)
+
+    if len(embeddings):
+        index.add_with_ids(embeddings, ids)
+    if spec.kind in ("ivf", "ivfpq"):
+        if "nprobe" not in spec.params:
+            spec.params.update(calibrate_nprobe(index, embeddings, ids, spec.params.get("target_recall", INDEX_TARGET_RECALL)))
+        index.nprobe = spec.params["nprobe"]
+    return index
+
+
+def calibrate_nprobe(index: faiss.Index, embeddings: np.ndarray, ids: np.ndarray, target_recall: float,
+                     queries: int = INDEX_CALIBRATION_QUERIES, k: int = INDEX_CALIBRATION_K,
+                     seed: int = 0) -> Dict[str, Any]:
+    """
+    Smallest nprobe whose recall@k reaches target_recall, measured against exact search.
+    The queries are a sample of the corpus vectors, each held out of its own neighbor list
+    (leave-one-out). If no nprobe reaches the target (e.g. PQ codes cap recall), the smallest
+    nprobe with the best recall is used.
+    """
+    nlist = index.nlist
+    k = min(k, len(ids) - 1)
+    if k < 1 or nlist == 1:
+        return {"nprobe": nlist}
+    sample = np.random.default_rng(seed).choice(len(ids), size=min(queries, len(ids)), replace=False)
+    query_vectors = np.ascontiguousarray(embeddings[sample])
+    truth = _without_self(faiss.knn(query_vectors, embeddings, k + 1, metric=faiss.METRIC_INNER_PRODUCT)[1], sample, k)
+    truth = ids[truth]
+
+    def recall(nprobe: int) -> float:
+        params = faiss.SearchParametersIVF()
+        params.nprobe = nprobe
+        _, found = index.search(query_vectors, k + 1, params=params)
+        found = _without_self(found, ids[sample], k)
+        return sum(len(set(row_found) & set(row_truth)) for row_found, row_truth in zip(found, truth)) / truth.size
+
+    # Double nprobe until the target is met, then bisect down to the smallest value that meets it
+    measured = {}
+    nprobe = 1
+    while True:
+        measured[nprobe] = recall(nprobe)
+        if measured[nprobe] >= target_recall or nprobe == nlist:
+            break
+        nprobe = min(nlist, nprobe * 2)
+    if measured[nprobe] >= target_recall:
+        low = nprobe // 2
+        while nprobe - low > 1:
+            middle = (low + nprobe) // 2
+            measured[middle] = recall(middle)
+            if measured[middle] >= target_recall:
+                nprobe = middle
+            else:
+                low = middle
+    else:
+        best = max(measured.values())
+        nprobe = min(value for value, value_recall in measured.items() if value_recall == best)
+        logger.warning(f"IVF index reaches recall@{k} {best:.3f} at most (target {target_recall}); using nprobe={nprobe}")
+    logger.info(f"Calibrated IVF nprobe={nprobe}/{nlist} for recall@{k} {measured[nprobe]:.3f} on {len(sample)} queries")
+    return {"nprobe": nprobe, "calibrated_recall": round(measured[nprobe], 4)}
+
+
+def _without_self(neighbors: np.ndarray, own: np.ndarray, k: int) -> np.ndarray:
+    """Drop each query's own entry (row index or id) from its k+1 neighbors, keeping k"""
+    kept = np.empty((len(neighbors), k), dtype=neighbors.dtype)
+    for row, (row_neighbors, self_id) in enumerate(zip(neighbors, own)):
+        others = row_neighbors[row_neighbors != self_id]
+        kept[row] = others[:k] if len(others) >= k else np.pad(others, (0, k - len(others)), constant_values=-1)
+    return kept
+
+
+def reconstruct(index: faiss.Index, ids: np.ndarray) -> np.ndarray:
+    """Decode the stored vectors for ids back to float32 (lossy for reduced-precision storage)"""
+    if len(ids) == 0:
+        return np.empty((0, index.d), dtype=np.float32)
+    return index.reconstruct_batch(np.asarray(ids, dtype=np.int64))
+
+
+def search_parameters(spec: IndexSpec, selector: Optional[faiss.IDSelector] = None) -> Optional[faiss.SearchParameters]:
+    """Per-search parameters for the backend, optionally restricted to a set of ids"""
+    if spec.kind == "hnsw":
+        params = faiss.SearchParametersHNSW()
+        params.efSearch = spec.params["ef_search"]
+    elif spec.kind in ("ivf", "ivfpq"):
+        params = faiss.SearchParametersIVF()
+        params.nprobe = spec.params["nprobe"]
+    elif selector is None:
+        return None
+    else:
+        params = faiss.SearchParameters()
+    if selector is not None:
+        params.sel = selector
+    return params
+
+
+def exact_search(queries: np.ndarray, matrix: np.ndarray, ids: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Brute-force inner-product top-k over a small matrix, in FAISS's (scores, ids) layout"""
+    k = min(k, len(ids))
+    scores = queries @ matrix.T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k] if k < len(ids) else np.tile(np.arange(len(ids)), (len(queries), 1))
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1)
+    return np.take_along_axis(top_scores, order, axis=1), ids[np.take_along_axis(top, order, axis=1)]
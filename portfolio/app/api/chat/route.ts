@@ -32,6 +32,36 @@ export async function POST(request: NextRequest) {
       );
     }
 
+    // Streaming requests are piped straight through so tokens reach the browser as they arrive
+    if (body.stream) {
+      const streamResponse = await fetch(`${CHATBOT_API_URL}/chat/stream`, {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+        },
+        body: JSON.stringify({
+          message: body.message,
+          conversation_id: body.conversation_id,
+        }),
+      });
+
+      if (!streamResponse.ok || !streamResponse.body) {
+        throw new Error(
+          `Chatbot API responded with status: ${streamResponse.status}`
+        );
+      }
+
+      return new Response(streamResponse.body, {
+        headers: {
+          "Content-Type": "application/x-ndjson",
+          "Cache-Control": "no-cache",
+          "Access-Control-Allow-Origin": "*",
+          "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
+          "Access-Control-Allow-Headers": "Content-Type, Authorization",
+        },
+      });
+    }
+
     // Forward request to Python chatbot API
     const response = await fetch(`${CHATBOT_API_URL}/chat`, {
       method: "POST",
@@ -30,11 +30,20 @@ interface ChatbotResponse {
   suggested_questions: string[];
 }
 
+// Frames sent by /chat/stream as newline-delimited JSON
+type ChatStreamFrame =
+  | { type: "start"; conversation_id: string }
+  | { type: "token"; content: string }
+  | ({ type: "final" } & ChatbotResponse);
+
+const STREAMING_MESSAGE_ID = "bot-streaming";
+
 const PortfolioChatbot: React.FC = () => {
   const [isOpen, setIsOpen] = useState(false);
   const [messages, setMessages] = useState<ChatMessage[]>([]);
   const [inputMessage, setInputMessage] = useState("");
   const [isLoading, setIsLoading] = useState(false);
+  const [isStreaming, setIsStreaming] = useState(false);
   const [conversationId, setConversationId] = useState<string | null>(null);
   const messagesEndRef = useRef<HTMLDivElement>(null);
   const inputRef = useRef<HTMLInputElement>(null);
@@ -98,6 +107,7 @@ const PortfolioChatbot: React.FC = () => {
         body: JSON.stringify({
           message: text,
           conversation_id: conversationId,
+          stream: true,
         }),
       });
 
@@ -105,7 +115,11 @@ const PortfolioChatbot: React.FC = () => {
         throw new Error("Failed to get response");
       }
 
-      const data: ChatbotResponse = await response.json();
+      const contentType = response.headers.get("Content-Type") || "";
+      const data: ChatbotResponse =
+        contentType.includes("ndjson") && response.body
+          ? await readChatStream(response.body)
+          : await response.json();
 
       const botMessage: ChatMessage = {
         id: `bot-${Date.now()}`,
@@ -117,7 +131,10 @@ const PortfolioChatbot: React.FC = () => {
         suggestedQuestions: data.suggested_questions,
       };
 
-      setMessages((prev) => [...prev, botMessage]);
+      setMessages((prev) => [
+        ...prev.filter((message) => message.id !== STREAMING_MESSAGE_ID),
+        botMessage,
+      ]);
       setConversationId(data.conversation_id);
     } catch (error) {
       console.error("Chat error:", error);
@@ -133,12 +150,60 @@ const PortfolioChatbot: React.FC = () => {
           "How can I contact Hunter?",
         ],
       };
-      setMessages((prev) => [...prev, errorMessage]);
+      setMessages((prev) => [
+        ...prev.filter((message) => message.id !== STREAMING_MESSAGE_ID),
+        errorMessage,
+      ]);
     } finally {
       setIsLoading(false);
+      setIsStreaming(false);
     }
   };
 
+  // Render tokens into a placeholder message as they arrive and resolve with the final frame
+  const readChatStream = async (
+    body: ReadableStream<Uint8Array>
+  ): Promise<ChatbotResponse> => {
+    const reader = body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = "";
+    let streamedText = "";
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+
+      buffered += decoder.decode(value, { stream: true });
+      const lines = buffered.split("\n");
+      buffered = lines.pop() || "";
+
+      for (const line of lines) {
+        if (!line.trim()) continue;
+        const frame: ChatStreamFrame = JSON.parse(line);
+
+        if (frame.type === "token") {
+          streamedText += frame.content;
+          const partial: ChatMessage = {
+            id: STREAMING_MESSAGE_ID,
+            message: streamedText,
+            isUser: false,
+            timestamp: new Date(),
+          };
+          setIsStreaming(true);
+          setMessages((prev) => [
+            ...prev.filter((message) => message.id !== STREAMING_MESSAGE_ID),
+            partial,
+          ]);
+        } else if (frame.type === "final") {
+          const { type, ...result } = frame;
+          return result;
+        }
+      }
+    }
+
+    throw new Error("Chat stream ended without a final frame");
+  };
+
   const handleKeyPress = (e: React.KeyboardEvent) => {
     if (e.key === "Enter" && !e.shiftKey) {
       e.preventDefault();
@@ -297,8 +362,8 @@ const PortfolioChatbot: React.FC = () => {
                 </motion.div>
               ))}
 
-              {/* Loading indicator */}
-              {isLoading && (
+              {/* Loading indicator (hidden once tokens start streaming in) */}
+              {isLoading && !isStreaming && (
                 <motion.div
                   initial={{ opacity: 0, y: 10 }}
                   animate={{ opacity: 1, y: 0 }}